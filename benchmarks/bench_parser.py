@@ -0,0 +1,109 @@
+"""
+Micro-benchmark: đọc bảng tblgridtd bằng lxml so với cách cũ (gọi WebDriver cho từng ô)
+Dùng iframe_page_source.html làm dữ liệu mẫu
+
+Chạy:
+    python benchmarks/bench_parser.py [--iterations 200] [--no-selenium]
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from evn_scraper.parser import parse_table  # noqa: E402
+
+FIXTURE = ROOT / "iframe_page_source.html"
+
+
+def bench_lxml(html, iterations):
+    """Thời gian (giây) mỗi lần parse bằng lxml"""
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        rows = parse_table(html)
+        timings.append(time.perf_counter() - start)
+    return timings, len(rows)
+
+
+def extract_all_selenium(driver):
+    """Cách cũ của extract_table_data: row.text + find_elements + .text cho từng ô, mở rộng cho mọi hàng"""
+    from selenium.webdriver.common.by import By
+
+    table = driver.find_element(By.CLASS_NAME, "tblgridtd")
+    results = []
+    for row in table.find_elements(By.TAG_NAME, "tr"):
+        text = row.text
+        if not text:
+            continue
+        cols = row.find_elements(By.TAG_NAME, "td")
+        if len(cols) >= 11:
+            results.append([cols[0].text.split('\n')[0]] + [col.text for col in cols[1:11]])
+    return results
+
+
+def bench_selenium(iterations):
+    """Thời gian (giây) mỗi lần trích xuất bằng WebDriver, None nếu không chạy được Chrome"""
+    try:
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+
+        chrome_options = Options()
+        chrome_options.add_argument('--headless=new')
+        chrome_options.add_argument('--no-sandbox')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+        # Trang mẫu tham chiếu script/CSS từ server EVN, chặn JS để DOM giữ nguyên như bản lưu
+        chrome_options.add_experimental_option(
+            'prefs', {'profile.managed_default_content_settings.javascript': 2})
+        driver = webdriver.Chrome(options=chrome_options)
+    except Exception as e:
+        print(f"Bỏ qua benchmark Selenium (không khởi tạo được Chrome): {e}")
+        return None, 0
+
+    try:
+        driver.get(FIXTURE.as_uri())
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            rows = extract_all_selenium(driver)
+            timings.append(time.perf_counter() - start)
+        return timings, len(rows)
+    finally:
+        driver.quit()
+
+
+def report(label, timings, row_count):
+    """In thống kê thời gian"""
+    mean = statistics.mean(timings) * 1000
+    p50 = statistics.median(timings) * 1000
+    print(f"{label:<10} {row_count:>4} hàng  mean={mean:9.3f} ms  p50={p50:9.3f} ms  "
+          f"min={min(timings) * 1000:9.3f} ms  (n={len(timings)})")
+    return mean
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--iterations', type=int, default=200, help="Số lần lặp cho lxml")
+    arg_parser.add_argument('--selenium-iterations', type=int, default=5, help="Số lần lặp cho Selenium")
+    arg_parser.add_argument('--no-selenium', action='store_true', help="Chỉ đo lxml")
+    args = arg_parser.parse_args()
+
+    html = FIXTURE.read_text(encoding='utf-8')
+    print(f"Dữ liệu mẫu: {FIXTURE.name} ({os.path.getsize(FIXTURE) / 1024:.1f} KB)")
+
+    lxml_mean = report("lxml", *bench_lxml(html, args.iterations))
+
+    if not args.no_selenium:
+        timings, row_count = bench_selenium(args.selenium_iterations)
+        if timings:
+            selenium_mean = report("selenium", timings, row_count)
+            print(f"lxml nhanh hơn {selenium_mean / lxml_mean:.0f} lần")
+
+
+if __name__ == "__main__":
+    main()
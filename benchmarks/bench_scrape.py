@@ -0,0 +1,198 @@
+"""
+Benchmark end-to-end: scrape_date_range với từng backend trên server EVN giả lập (không cần mạng)
+Đo số trang/giây, latency tải trang p50/p95, thời gian parse mỗi trang và peak RSS
+
+Mỗi chế độ chạy trong một tiến trình riêng để peak RSS không lẫn giữa các chế độ
+(RSS của Chrome nằm ở tiến trình browser, không tính vào đây).
+
+Chạy:
+    python benchmarks/bench_scrape.py [--hours 48] [--modes http,parallel,selenium,selenium-pool]
+                                      [--latency 0.05] [--jitter 0.02] [--error-rate 0.05]
+                                      [--concurrency 4] [--page-cache evn_page_cache] [--json out.json]
+"""
+
+import sys
+import json
+import time
+import logging
+import argparse
+import resource
+import statistics
+import threading
+import multiprocessing
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_evn_server import FakeEVNServer  # noqa: E402
+
+# Chế độ -> (backend, tải song song)
+MODES = {
+    'http': ('http', False),
+    'parallel': ('http', True),
+    'selenium': ('selenium', False),
+    'selenium-pool': ('selenium-pool', True),
+}
+
+
+class TimedFetcher:
+    """Bọc một backend tải trang, ghi lại thời gian mỗi lần tải"""
+
+    def __init__(self, inner, latencies):
+        self.inner = inner
+        self.name = inner.name
+        self.thread_safe = getattr(inner, 'thread_safe', False)
+        self.latencies = latencies
+
+    def open(self):
+        self.inner.open()
+
+    def close(self):
+        self.inner.close()
+
+    def fetch(self, url):
+        start = time.perf_counter()
+        try:
+            return self.inner.fetch(url)
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+
+def percentile(values, fraction):
+    """Phân vị (nội suy tuyến tính), None nếu rỗng"""
+    if not values:
+        return None
+    values = sorted(values)
+    position = (len(values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def run_mode(mode, base_url, start_date, end_date, concurrency):
+    """
+    Chạy một chế độ (trong tiến trình con)
+
+    Returns:
+        dict: Kết quả đo, hoặc {'mode', 'skipped'} nếu không khởi tạo được backend
+    """
+    from evn_scraper import EVNMultiReservoirScraper, ParallelRangeScraper, create_fetcher
+    from evn_scraper.pacing import AdaptivePacer
+    from evn_scraper.resilience import CircuitBreaker, RetryPolicy
+
+    # Trang mẫu thiếu vài hồ: bỏ các cảnh báo lặp lại ở mỗi trang
+    logging.basicConfig(level=logging.ERROR)
+
+    backend, parallel = MODES[mode]
+    latencies, parse_times = [], []
+    lock = threading.Lock()
+
+    def make_fetcher():
+        return TimedFetcher(create_fetcher(backend, headless=True, pool_size=concurrency, lean=True), latencies)
+
+    fetcher = make_fetcher()
+    try:
+        fetcher.open()
+    except Exception as e:
+        message = str(e).strip().splitlines()[0] if str(e).strip() else type(e).__name__
+        return {'mode': mode, 'skipped': f"không khởi tạo được backend {backend}: {message}"}
+
+    # Đo tốc độ của scraper, không phải khoảng nghỉ lịch sự với server thật
+    scraper = EVNMultiReservoirScraper("all", fetcher=fetcher, pacer=AdaptivePacer(min_delay=0, max_delay=0),
+                                       retry=RetryPolicy(attempts=4, base_delay=0.01, max_delay=0.1),
+                                       breaker=CircuitBreaker(cooldown=1.0, max_cooldown=5.0))
+    scraper.base_url = base_url
+
+    extract = scraper.extract_readings
+
+    def timed_extract(html, requested_at, changes=None):
+        start = time.perf_counter()
+        readings = extract(html, requested_at, changes)
+        with lock:
+            parse_times.append(time.perf_counter() - start)
+        return readings
+
+    scraper.extract_readings = timed_extract
+
+    started = time.perf_counter()
+    if parallel:
+        factory = None if fetcher.thread_safe else make_fetcher
+        df = ParallelRangeScraper(scraper, concurrency, None, fetcher_factory=factory).scrape_date_range(
+            start_date, end_date)
+    else:
+        df = scraper.scrape_date_range(start_date, end_date)
+    elapsed = time.perf_counter() - started
+
+    pages = len(parse_times)
+    return {
+        'mode': mode,
+        'pages': pages,
+        'failed': len(scraper.failed_times),
+        'requests': len(latencies),
+        'rows': 0 if df is None else len(df),
+        'seconds': elapsed,
+        'pages_per_second': pages / elapsed if elapsed else None,
+        'latency_p50_ms': (percentile(latencies, 0.5) or 0) * 1000,
+        'latency_p95_ms': (percentile(latencies, 0.95) or 0) * 1000,
+        'parse_ms': statistics.mean(parse_times) * 1000 if parse_times else None,
+        # ru_maxrss trên Linux tính bằng KB
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def report(result):
+    """In một dòng kết quả"""
+    if 'skipped' in result:
+        print(f"{result['mode']:<14} bỏ qua: {result['skipped']}")
+        return
+    print(f"{result['mode']:<14} {result['pages']:>5} trang  {result['pages_per_second']:8.1f} trang/s  "
+          f"p50={result['latency_p50_ms']:7.1f} ms  p95={result['latency_p95_ms']:7.1f} ms  "
+          f"parse={result['parse_ms'] or 0:6.2f} ms/trang  RSS={result['peak_rss_mb']:6.1f} MB  "
+          f"lỗi={result['failed']} (request={result['requests']})")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--hours', type=int, default=48, help="Số giờ trong khoảng thời gian tải")
+    arg_parser.add_argument('--modes', default=','.join(MODES), help="Các chế độ, cách nhau bởi dấu phẩy")
+    arg_parser.add_argument('--latency', type=float, default=0.05, help="Độ trễ trung bình của server (giây)")
+    arg_parser.add_argument('--jitter', type=float, default=0.02, help="Độ lệch độ trễ (giây)")
+    arg_parser.add_argument('--error-rate', type=float, default=0.0, help="Tỉ lệ lỗi 503 (0..1)")
+    arg_parser.add_argument('--concurrency', type=int, default=4, help="Số luồng / browser cho chế độ song song")
+    arg_parser.add_argument('--page-cache', help="Thư mục PageCache chứa trang đã tải thật (mặc định trang mẫu)")
+    arg_parser.add_argument('--seed', type=int, default=0, help="Seed cho độ trễ / lỗi giả lập")
+    arg_parser.add_argument('--json', help="Ghi kết quả ra file JSON (so sánh giữa các lần chạy)")
+    args = arg_parser.parse_args()
+
+    modes = [mode.strip() for mode in args.modes.split(',') if mode.strip()]
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown:
+        arg_parser.error(f"Chế độ không hợp lệ: {', '.join(unknown)}")
+
+    start_date = datetime(2025, 7, 15, 0, 0)
+    end_date = start_date + timedelta(hours=args.hours - 1)
+
+    server = FakeEVNServer(page_cache=args.page_cache, latency=args.latency, jitter=args.jitter,
+                           error_rate=args.error_rate, seed=args.seed)
+    results = []
+    with server:
+        print(f"Server giả lập: {server.base_url}  latency={args.latency * 1000:.0f}±{args.jitter * 1000:.0f} ms  "
+              f"lỗi={args.error_rate:.0%}  {args.hours} giờ")
+        context = multiprocessing.get_context('spawn')
+        for mode in modes:
+            with context.Pool(1) as pool:
+                result = pool.apply(run_mode, (mode, server.base_url, start_date, end_date, args.concurrency))
+            report(result)
+            results.append(result)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'args': vars(args), 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"Đã ghi kết quả vào {args.json}")
+
+
+if __name__ == "__main__":
+    main()
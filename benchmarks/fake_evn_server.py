@@ -0,0 +1,172 @@
+"""
+Server HTTP giả lập hochuathuydien.evn.com.vn để benchmark / thử nghiệm không cần mạng
+Trả về trang đã lưu cho PageHoChuaThuyDienEmbedEVN.aspx, có độ trễ và lỗi giả lập
+
+Chạy riêng (ví dụ để thử dòng lệnh với --base-url trỏ vào server này):
+    python benchmarks/fake_evn_server.py [--port 8765] [--latency 0.05] [--error-rate 0.05]
+    python -m evn_scraper --base-url http://127.0.0.1:8765/PageHoChuaThuyDienEmbedEVN.aspx ...
+"""
+
+import sys
+import gzip
+import hashlib
+import time
+import random
+import argparse
+import threading
+from datetime import timedelta
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+FIXTURE = ROOT / "iframe_page_source.html"
+PAGE_PATH = "/PageHoChuaThuyDienEmbedEVN.aspx"
+
+
+class FakeEVNServer:
+    """Server giả lập chạy trong một luồng nền"""
+
+    def __init__(self, html=None, page_cache=None, latency=0.0, jitter=0.0, error_rate=0.0,
+                 host="127.0.0.1", port=0, seed=None, etag=False):
+        """
+        Args:
+            html (str): Trang trả về cho mọi request (mặc định iframe_page_source.html)
+            page_cache (str): Thư mục PageCache chứa các trang đã tải thật (ưu tiên dùng nếu có trang)
+            latency (float): Độ trễ trung bình mỗi request (giây)
+            jitter (float): Độ lệch ngẫu nhiên tối đa của độ trễ (giây)
+            error_rate (float): Tỉ lệ request trả về lỗi 503 (0..1)
+            host (str): Địa chỉ lắng nghe
+            port (int): Cổng (0: chọn cổng trống)
+            seed (int): Seed cho độ trễ / lỗi ngẫu nhiên
+            etag (bool): Trả về ETag và 304 cho request If-None-Match khớp (như server hỗ trợ
+                request có điều kiện)
+        """
+        self.html = html if html is not None else FIXTURE.read_text(encoding='utf-8')
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.etag = etag
+        self.requests = 0
+        self.errors = 0
+        self.not_modified = 0
+
+        self._body = gzip.compress(self.html.encode('utf-8'), mtime=0)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._cache = None
+        if page_cache:
+            from evn_scraper.page_cache import PageCache
+            # Trang đã lưu không bao giờ hết hạn
+            self._cache = PageCache(page_cache, ttl=timedelta(days=36500), offline=True, max_bytes=None)
+
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """URL thay cho EVNMultiReservoirScraper.base_url"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{PAGE_PATH}"
+
+    def _page(self, url):
+        """Nội dung gzip của trang cho một URL"""
+        if self._cache is not None:
+            html = self._cache.get(url)
+            if html is not None:
+                return gzip.compress(html.encode('utf-8'), mtime=0)
+        return self._body
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if not self.path.startswith(PAGE_PATH):
+                    self.send_error(404)
+                    return
+
+                with server._lock:
+                    server.requests += 1
+                    delay = max(0.0, server.latency + server._random.uniform(-server.jitter, server.jitter))
+                    failed = server._random.random() < server.error_rate
+                    if failed:
+                        server.errors += 1
+                time.sleep(delay)
+
+                if failed:
+                    self.send_error(503, "Service Unavailable")
+                    return
+
+                body = server._page(self.path)
+                if server.etag:
+                    etag = f'"{hashlib.md5(body).hexdigest()}"'
+                    if self.headers.get('If-None-Match') == etag:
+                        with server._lock:
+                            server.not_modified += 1
+                        self.send_response(304)
+                        self.send_header('ETag', etag)
+                        self.end_headers()
+                        return
+
+                self.send_response(200)
+                if server.etag:
+                    self.send_header('ETag', etag)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        """Chạy server trong luồng nền"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-evn', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Dừng server"""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._cache is not None:
+            self._cache.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--port', type=int, default=8765)
+    arg_parser.add_argument('--latency', type=float, default=0.05, help="Độ trễ trung bình (giây)")
+    arg_parser.add_argument('--jitter', type=float, default=0.02, help="Độ lệch độ trễ (giây)")
+    arg_parser.add_argument('--error-rate', type=float, default=0.0, help="Tỉ lệ lỗi 503 (0..1)")
+    arg_parser.add_argument('--page-cache', help="Thư mục PageCache chứa trang đã tải thật")
+    arg_parser.add_argument('--etag', action='store_true', help="Hỗ trợ ETag / 304 Not Modified")
+    args = arg_parser.parse_args()
+
+    server = FakeEVNServer(page_cache=args.page_cache, latency=args.latency, jitter=args.jitter,
+                           error_rate=args.error_rate, port=args.port, etag=args.etag)
+    server.start()
+    print(f"Server giả lập: {server.base_url} (Ctrl+C để dừng)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+"""
+EVN Water Level Scraper cho nhiều hồ chứa
+Mỗi giờ chỉ tải trang một lần rồi ghi dữ liệu của từng hồ vào file riêng
+
+Giữ lại để tương thích với lịch chạy cũ, tương đương `python -m evn_scraper`:
+
+    python evn_multi_scraper.py --reservoirs 26,27,46 --mode incremental
+    python evn_multi_scraper.py --help
+"""
+
+import sys
+
+from evn_scraper.cli import main
+
+
+if __name__ == "__main__":
+    sys.exit(main())
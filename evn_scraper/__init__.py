@@ -0,0 +1,42 @@
+"""
+Thư viện lấy dữ liệu mực nước hồ thủy điện từ website EVN
+"""
+
+from .browser_pool import BrowserPool
+from .catalog import Reservoir, ReservoirCatalog, get_catalog, use_catalog
+from .fetchers import FetchError, HttpFetcher, SeleniumFetcher, FallbackFetcher, create_fetcher
+from .gaps import FetchRun, build_fetch_plan, execute_plan, find_gaps, plan_from_csv
+from .pacing import AdaptivePacer
+from .parallel import ParallelRangeScraper, RateLimiter
+from .records import Reading, ReadingBatch
+from .reservoirs import RESERVOIRS, resolve_reservoirs
+from .state import HighWaterMarks
+from .scraper import EVNMultiReservoirScraper, OUTPUT_COLUMNS
+
+__all__ = [
+    'BrowserPool',
+    'Reservoir',
+    'ReservoirCatalog',
+    'get_catalog',
+    'use_catalog',
+    'FetchError',
+    'HttpFetcher',
+    'SeleniumFetcher',
+    'FallbackFetcher',
+    'create_fetcher',
+    'FetchRun',
+    'build_fetch_plan',
+    'execute_plan',
+    'find_gaps',
+    'plan_from_csv',
+    'AdaptivePacer',
+    'ParallelRangeScraper',
+    'RateLimiter',
+    'Reading',
+    'ReadingBatch',
+    'RESERVOIRS',
+    'resolve_reservoirs',
+    'EVNMultiReservoirScraper',
+    'HighWaterMarks',
+    'OUTPUT_COLUMNS',
+]
@@ -0,0 +1,9 @@
+"""
+python -m evn_scraper [tham số]: xem evn_scraper/cli.py
+"""
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
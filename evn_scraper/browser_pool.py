@@ -0,0 +1,211 @@
+"""
+Pool nhiều Chrome WebDriver đã khởi động sẵn cho backend Selenium
+Mỗi thời điểm mượn một browser rồi trả lại, browser hỏng hoặc đã tải quá nhiều trang được thay mới
+"""
+
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from .fetchers import FetchError, SeleniumFetcher
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserPool:
+    """Pool N browser headless dùng chung cho nhiều luồng"""
+
+    name = 'selenium-pool'
+    thread_safe = True  # Một instance dùng được cho mọi luồng của ParallelRangeScraper
+
+    def __init__(self, size=4, headless=True, max_pages=200, checkout_timeout=120, lean=False):
+        """
+        Args:
+            size (int): Số browser trong pool
+            headless (bool): Chạy browser ở chế độ ẩn
+            max_pages (int): Số trang tối đa một browser tải trước khi được thay mới
+                (giới hạn bộ nhớ tăng dần của Chrome)
+            checkout_timeout (float): Thời gian chờ tối đa để mượn browser (giây)
+            lean (bool): Dùng chế độ Chrome nhẹ (xem SeleniumFetcher)
+        """
+        self.size = max(1, size)
+        self.headless = headless
+        self.max_pages = max_pages
+        self.checkout_timeout = checkout_timeout
+        self.lean = lean
+
+        self._idle = queue.Queue()
+        self._browsers = set()      # Mọi browser đang sống (rảnh hoặc đang được mượn)
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()     # Chỉ một luồng khởi động pool
+        self._started = False
+
+    def _new_browser(self):
+        """Khởi động một browser mới và đăng ký vào pool"""
+        browser = SeleniumFetcher(headless=self.headless, lean=self.lean)
+        browser.open()
+        with self._lock:
+            self._browsers.add(browser)
+        return browser
+
+    def _discard(self, browser):
+        """Đóng một browser và bỏ khỏi pool"""
+        with self._lock:
+            self._browsers.discard(browser)
+        try:
+            browser.close()
+        except Exception as e:
+            logger.warning(f"Lỗi khi đóng browser: {e}")
+
+    @staticmethod
+    def is_healthy(browser):
+        """
+        Kiểm tra browser còn phản hồi hay không
+
+        Args:
+            browser (SeleniumFetcher): Browser cần kiểm tra
+
+        Returns:
+            bool: True nếu browser còn dùng được
+        """
+        if browser.driver is None:
+            return False
+        try:
+            return browser.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def open(self):
+        """
+        Khởi động sẵn toàn bộ browser trong pool (song song)
+
+        Raises:
+            FetchError: Nếu có browser không khởi động được (các browser đã khởi động được đóng lại,
+                lần gọi sau khởi động lại từ đầu)
+        """
+        with self._open_lock:
+            if self._started:
+                return
+
+            try:
+                with ThreadPoolExecutor(max_workers=self.size) as executor:
+                    browsers = list(executor.map(lambda _: self._new_browser(), range(self.size)))
+            except Exception as e:
+                # Không để pool thiếu browser: checkout() sẽ chờ hết checkout_timeout
+                self.close()
+                raise FetchError(f"Không khởi động được browser trong pool: {e}") from e
+
+            for browser in browsers:
+                self._idle.put(browser)
+            self._started = True
+
+        logger.info(f"Đã khởi động {self.size} browser trong pool")
+
+    def close(self):
+        """Đóng toàn bộ browser"""
+        with self._lock:
+            browsers, self._browsers = list(self._browsers), set()
+            self._started = False
+
+        for browser in browsers:
+            try:
+                browser.close()
+            except Exception as e:
+                logger.warning(f"Lỗi khi đóng browser: {e}")
+
+        self._idle = queue.Queue()
+
+    def checkout(self):
+        """
+        Mượn một browser còn hoạt động
+
+        Returns:
+            SeleniumFetcher: Browser đã sẵn sàng
+
+        Raises:
+            FetchError: Nếu không có browser rảnh trong checkout_timeout giây
+        """
+        self.open()
+        try:
+            browser = self._idle.get(timeout=self.checkout_timeout)
+        except queue.Empty:
+            raise FetchError(f"Không mượn được browser sau {self.checkout_timeout} giây")
+
+        if not self.is_healthy(browser):
+            logger.warning("Browser không phản hồi, khởi động browser mới")
+            self._discard(browser)
+            try:
+                browser = self._new_browser()
+            except Exception as e:
+                # Giữ nguyên kích thước pool cho lần mượn sau
+                self._idle.put(self._new_browser_placeholder())
+                raise FetchError(f"Không khởi động được browser: {e}") from e
+        return browser
+
+    def _new_browser_placeholder(self):
+        """Browser chưa khởi động, sẽ bị coi là hỏng và khởi động lại khi được mượn"""
+        browser = SeleniumFetcher(headless=self.headless, lean=self.lean)
+        with self._lock:
+            self._browsers.add(browser)
+        return browser
+
+    def checkin(self, browser, failed=False):
+        """
+        Trả browser về pool, thay mới nếu hỏng hoặc đã tải đủ max_pages trang
+
+        Args:
+            browser (SeleniumFetcher): Browser đã mượn
+            failed (bool): Lần tải trang vừa rồi có lỗi hay không
+        """
+        recycle = browser.page_count >= self.max_pages
+        if failed and not self.is_healthy(browser):
+            recycle = True
+
+        if recycle:
+            logger.info(f"Thay mới browser sau {browser.page_count} trang")
+            self._discard(browser)
+            try:
+                browser = self._new_browser()
+            except Exception as e:
+                logger.error(f"Không khởi động được browser mới: {e}")
+                browser = self._new_browser_placeholder()
+
+        self._idle.put(browser)
+
+    @contextmanager
+    def browser(self):
+        """Mượn browser trong khối with, tự trả lại khi xong"""
+        browser = self.checkout()
+        failed = False
+        try:
+            yield browser
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.checkin(browser, failed=failed)
+
+    def fetch(self, url):
+        """
+        Tải page source bằng một browser trong pool
+
+        Args:
+            url (str): URL cần tải
+
+        Returns:
+            str: Page source
+
+        Raises:
+            FetchError: Nếu không tải được bảng dữ liệu
+        """
+        with self.browser() as browser:
+            return browser.fetch(url)
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,263 @@
+"""
+Danh mục hồ chứa (ID -> tên -> vùng miền) lấy tự động từ trang dữ liệu
+
+Dropdown ddlHoChua liệt kê mọi hồ kèm ID (tham số hc), bảng tblgridtd xếp hồ theo vùng miền.
+Danh mục được đọc từ trang một lần, lưu trong file JSON nhỏ và dùng lại cho đến khi cũ;
+không tải được trang thì dùng file đã lưu, hoặc danh sách RESERVOIRS / RESERVOIR_REGIONS có sẵn.
+Tra cứu theo ID, tên (đã chuẩn hóa) hoặc vùng miền đều là tra dict.
+"""
+
+import os
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+from .parser import parse_reservoir_options, parse_table
+from .reservoirs import PAGE_URL, RESERVOIR_REGIONS, RESERVOIRS, normalize_name
+
+logger = logging.getLogger(__name__)
+
+CATALOG_FILE = "evn_reservoirs.json"
+
+
+class Reservoir(NamedTuple):
+    """Một hồ chứa trong danh mục"""
+    reservoir_id: str
+    name: str
+    region: str         # '' nếu trang không ghi vùng miền
+
+
+class ReservoirCatalog:
+    """Danh mục hồ chứa với chỉ mục theo ID, tên và vùng miền"""
+
+    def __init__(self, reservoirs, updated_at=None):
+        """
+        Args:
+            reservoirs (iterable): Các Reservoir theo thứ tự trên trang
+            updated_at (datetime): Thời điểm đọc danh mục từ trang (None: danh sách có sẵn)
+        """
+        self.updated_at = updated_at
+        self._by_id = {}
+        self._by_name = {}
+        self._by_region = {}
+
+        for reservoir in reservoirs:
+            self._by_id[reservoir.reservoir_id] = reservoir
+            self._by_name[normalize_name(reservoir.name)] = reservoir.reservoir_id
+            if reservoir.region:
+                self._by_region.setdefault(normalize_name(reservoir.region), []).append(reservoir.reservoir_id)
+
+    @classmethod
+    def builtin(cls):
+        """Danh mục từ RESERVOIRS và RESERVOIR_REGIONS"""
+        return cls(Reservoir(reservoir_id, name, RESERVOIR_REGIONS.get(reservoir_id, ''))
+                   for reservoir_id, name in RESERVOIRS.items())
+
+    @classmethod
+    def from_html(cls, html):
+        """
+        Đọc danh mục từ page source
+
+        Vùng miền lấy theo nhãn optgroup của dropdown nếu có, nếu không thì theo hàng
+        vùng miền phía trên hồ trong bảng dữ liệu (hồ không có trong bảng: RESERVOIR_REGIONS)
+
+        Args:
+            html (str): Page source của trang dữ liệu
+
+        Returns:
+            ReservoirCatalog: Danh mục, hoặc None nếu trang không có dropdown ddlHoChua
+        """
+        options = parse_reservoir_options(html)
+        if not options:
+            return None
+
+        table_regions = {normalize_name(row.name): row.region for row in parse_table(html)}
+        return cls((Reservoir(reservoir_id, name, group or table_regions.get(normalize_name(name))
+                              or RESERVOIR_REGIONS.get(reservoir_id, ''))
+                    for reservoir_id, name, group in options), updated_at=datetime.now())
+
+    @classmethod
+    def load(cls, path=CATALOG_FILE):
+        """
+        Args:
+            path (str): File JSON đã lưu bằng save()
+
+        Returns:
+            ReservoirCatalog: Danh mục, hoặc None nếu chưa có file
+        """
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        updated_at = data.get('updated_at')
+        return cls((Reservoir(item['id'], item['name'], item.get('region', '')) for item in data['reservoirs']),
+                   updated_at=datetime.fromisoformat(updated_at) if updated_at else None)
+
+    def save(self, path=CATALOG_FILE):
+        """Ghi danh mục ra file JSON (ghi file tạm rồi đổi tên)"""
+        data = {
+            'updated_at': self.updated_at.isoformat(timespec='seconds') if self.updated_at else None,
+            'reservoirs': [{'id': reservoir.reservoir_id, 'name': reservoir.name, 'region': reservoir.region}
+                           for reservoir in self],
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def discover(cls, path=CATALOG_FILE, fetcher=None, max_age=timedelta(days=7)):
+        """
+        Danh mục từ file đã lưu nếu còn mới, nếu không thì đọc lại từ trang và lưu lại
+
+        Args:
+            path (str): File JSON lưu danh mục (None: không lưu, luôn đọc từ trang)
+            fetcher: Backend tải trang (mặc định HttpFetcher)
+            max_age (timedelta): Tuổi tối đa của file đã lưu
+
+        Returns:
+            ReservoirCatalog: Danh mục (không tải được trang: file đã lưu hoặc danh sách có sẵn)
+        """
+        cached = cls.load(path) if path else None
+        if cached is not None and cached.updated_at is not None \
+                and datetime.now() - cached.updated_at < max_age:
+            return cached
+
+        if fetcher is None:
+            from .fetchers import HttpFetcher
+            fetcher = HttpFetcher()
+
+        url = f"{PAGE_URL}?td={datetime.now().strftime('%d/%m/%Y %H:00')}&hc={next(iter(RESERVOIRS))}"
+        try:
+            fetcher.open()
+            try:
+                catalog = cls.from_html(fetcher.fetch(url))
+            finally:
+                fetcher.close()
+        except Exception as e:
+            logger.warning(f"Không tải được danh mục hồ chứa: {e}")
+            catalog = None
+
+        if catalog is None:
+            return cached or cls.builtin()
+
+        logger.info(f"Đã đọc danh mục {len(catalog)} hồ chứa từ trang")
+        if path:
+            catalog.save(path)
+        return catalog
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        return iter(self._by_id.values())
+
+    def __contains__(self, reservoir_id):
+        return str(reservoir_id) in self._by_id
+
+    def get(self, reservoir_id):
+        """
+        Args:
+            reservoir_id (str | int): ID hồ chứa
+
+        Returns:
+            Reservoir: Hồ chứa, hoặc None nếu không có
+        """
+        return self._by_id.get(str(reservoir_id).strip())
+
+    def id_for(self, name):
+        """
+        Args:
+            name (str): Tên hồ (không phân biệt hoa thường, khoảng trắng)
+
+        Returns:
+            str: ID hồ chứa, hoặc None nếu không có
+        """
+        return self._by_name.get(normalize_name(name))
+
+    def in_region(self, region):
+        """
+        Args:
+            region (str): Tên vùng miền (ví dụ 'Tây Nguyên')
+
+        Returns:
+            list: ID các hồ trong vùng (rỗng nếu không có)
+        """
+        return list(self._by_region.get(normalize_name(region), []))
+
+    @property
+    def regions(self):
+        """Tên các vùng miền theo thứ tự trên trang"""
+        names = {}
+        for reservoir in self:
+            if reservoir.region:
+                names.setdefault(normalize_name(reservoir.region), reservoir.region)
+        return list(names.values())
+
+    def resolve(self, selection="all"):
+        """
+        Chuyển lựa chọn của người dùng thành các hồ cần lấy dữ liệu
+
+        Args:
+            selection (str | int | iterable): "all", một ID / tên hồ / vùng miền,
+                hoặc danh sách các giá trị đó (ví dụ [26, "Sông Ba Hạ", "Tây Nguyên"])
+
+        Returns:
+            dict: {reservoir_id: reservoir_name} theo thứ tự yêu cầu
+
+        Raises:
+            ValueError: Nếu có giá trị không khớp với ID, tên hồ hay vùng miền nào
+        """
+        if isinstance(selection, (str, int)):
+            selection = [selection]
+
+        selected = {}
+        for item in selection:
+            key = str(item).strip()
+
+            if key.lower() == 'all':
+                return {reservoir.reservoir_id: reservoir.name for reservoir in self}
+
+            if key in self._by_id:
+                reservoir_ids = [key]
+            elif self.id_for(key) is not None:
+                reservoir_ids = [self.id_for(key)]
+            else:
+                reservoir_ids = self.in_region(key)
+                if not reservoir_ids and not self._by_region:
+                    raise ValueError(f"Không xác định được hồ chứa: {item} "
+                                     f"(danh mục không có vùng miền, chỉ chọn được theo ID / tên hồ)")
+                if not reservoir_ids:
+                    raise ValueError(f"Không xác định được hồ chứa: {item}")
+
+            for reservoir_id in reservoir_ids:
+                selected[reservoir_id] = self._by_id[reservoir_id].name
+
+        if not selected:
+            raise ValueError("Chưa chọn hồ chứa nào")
+
+        return selected
+
+
+_catalog = None
+
+
+def get_catalog():
+    """Danh mục đang dùng (mặc định danh sách có sẵn RESERVOIRS)"""
+    global _catalog
+    if _catalog is None:
+        _catalog = ReservoirCatalog.builtin()
+    return _catalog
+
+
+def use_catalog(catalog):
+    """
+    Đặt danh mục dùng chung (ví dụ danh mục từ discover()) cho resolve_reservoirs
+    và việc gán ID hồ khi chuyển dữ liệu sang dạng có kiểu
+
+    Args:
+        catalog (ReservoirCatalog): Danh mục
+    """
+    global _catalog
+    _catalog = catalog
@@ -0,0 +1,80 @@
+"""
+Nhận biết trang / hàng dữ liệu không đổi giữa các lần poll
+
+Trang của giờ hiện tại thường giống hệt lần poll trước cho đến khi có hồ đồng bộ số liệu mới.
+ChangeDetector băm riêng bảng tblgridtd (bỏ qua __VIEWSTATE, script... đổi theo từng request)
+để bỏ qua bước phân tích khi bảng không đổi, và băm từng hàng theo hồ để chỉ trả về các hồ
+có số liệu thay đổi.
+"""
+
+import hashlib
+import threading
+
+from .parser import _table_markup
+
+
+def _digest(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+def table_digest(html):
+    """
+    Mã băm của bảng tblgridtd
+
+    Args:
+        html (str): Page source của trang dữ liệu
+
+    Returns:
+        bytes: Mã băm của đoạn <table class="tblgridtd">...</table>, hoặc None nếu không có bảng
+    """
+    markup = _table_markup(html) if html else None
+    return _digest(markup) if markup is not None else None
+
+
+class ChangeDetector:
+    """Ghi nhớ mã băm của bảng và của từng hàng đã thấy ở lần trước"""
+
+    def __init__(self):
+        self.table = None
+        self.rows = {}                  # reservoir_id -> mã băm hàng gần nhất
+        self._lock = threading.Lock()
+
+    def table_changed(self, html):
+        """
+        Args:
+            html (str): Page source vừa tải
+
+        Returns:
+            bool: True nếu bảng khác bảng của lần gọi trước (hoặc không có bảng)
+        """
+        digest = table_digest(html)
+        with self._lock:
+            if digest is not None and digest == self.table:
+                return False
+            self.table = digest
+            return True
+
+    def filter(self, matched_rows):
+        """
+        Chỉ giữ các hàng khác hàng đã thấy của cùng hồ
+
+        Args:
+            matched_rows (list): Các tuple (reservoir_id, ReservoirRow)
+
+        Returns:
+            list: Các tuple có hàng thay đổi (hồ chưa thấy lần nào luôn được giữ)
+        """
+        changed = []
+        with self._lock:
+            for reservoir_id, row in matched_rows:
+                digest = _digest('\x1f'.join(row))
+                if self.rows.get(reservoir_id) != digest:
+                    self.rows[reservoir_id] = digest
+                    changed.append((reservoir_id, row))
+        return changed
+
+    def reset(self):
+        """Quên mọi mã băm (lần sau mọi hàng đều được coi là thay đổi)"""
+        with self._lock:
+            self.table = None
+            self.rows.clear()
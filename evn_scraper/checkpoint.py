@@ -0,0 +1,199 @@
+"""
+Checkpoint cho các lần tải dài (backfill nhiều tháng)
+
+Ghi định kỳ các giờ yêu cầu đã tải xong cùng dữ liệu của chúng, để khi bị ngắt giữa chừng
+(mất mạng, Ctrl+C, máy khởi động lại) lần chạy sau chỉ tải các giờ còn lại.
+
+Cấu trúc file:
+    <path>.json     # khóa (danh sách hồ), các khoảng giờ đã tải xong và các giờ đang được ghi
+    <path>.csv      # dữ liệu của các giờ đó (cột như file CSV kết quả)
+"""
+
+import os
+import json
+import logging
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from .records import ReadingBatch
+from .state import ID_COLUMN, REQUESTED_COLUMN
+from .timeutil import REQUESTED_FORMAT, parse_requested_time
+
+logger = logging.getLogger(__name__)
+
+
+class Checkpoint:
+    """Các giờ đã tải xong và dữ liệu của chúng, ghi xuống đĩa sau mỗi flush_every giờ"""
+
+    def __init__(self, path="evn_checkpoint", key=None, flush_every=24):
+        """
+        Args:
+            path (str): Đường dẫn file checkpoint (không có phần mở rộng)
+            key (str): Khóa của lần chạy (ví dụ danh sách ID hồ); checkpoint có khóa khác bị bỏ qua
+            flush_every (int): Số giờ tải xong giữa hai lần ghi xuống đĩa
+        """
+        self.path = path
+        self.key = key
+        self.flush_every = max(1, flush_every)
+        self.completed = set()
+        self.writing = set()            # Giờ đang được ghi vào file kết quả (ghi trước khi ghi dữ liệu)
+        self.unconfirmed = set()        # Giờ bị ngắt giữa lúc ghi ở lần chạy trước: có thể đã có trong file
+
+        self._pending_slots = []
+        self._pending_rows = ReadingBatch()
+
+        if os.path.exists(self._state_path):
+            with open(self._state_path, encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('key') != key:
+                logger.info(f"Checkpoint {path} của lần chạy khác, bắt đầu lại")
+                self.clear()
+            else:
+                self.completed = _expand_runs(data.get('completed', []))
+                self.unconfirmed = _expand_runs(data.get('writing', [])) - self.completed
+                logger.info(f"Tiếp tục từ checkpoint {path}: {len(self.completed)} giờ đã tải")
+                if self.unconfirmed:
+                    logger.info(f"{len(self.unconfirmed)} giờ bị ngắt giữa lúc ghi, bỏ các dòng đã có trong file")
+
+    @property
+    def _state_path(self):
+        return f"{self.path}.json"
+
+    @property
+    def _rows_path(self):
+        return f"{self.path}.csv"
+
+    def add(self, date_time, readings):
+        """
+        Ghi nhận một giờ đã tải xong
+
+        Args:
+            date_time (datetime): Giờ yêu cầu
+            readings (list): Các Reading cần lưu của giờ đó
+        """
+        self._pending_slots.append(date_time)
+        self._pending_rows.extend(readings)
+        if len(self._pending_slots) >= self.flush_every:
+            self.flush()
+
+    def begin_write(self, slots):
+        """
+        Ghi xuống đĩa các giờ sắp được ghi vào file kết quả, trước khi ghi
+
+        Bị ngắt sau khi đã ghi file kết quả nhưng trước flush() thì lần chạy sau biết các giờ
+        này (unconfirmed) có thể đã có dòng trong file
+
+        Args:
+            slots (iterable): Các giờ yêu cầu của lô sắp ghi
+        """
+        # Giờ còn unconfirmed của lần chạy trước được tải lại trong lô này hoặc lô sau
+        self.writing = set(slots) | (self.unconfirmed - self.completed)
+        self._save_state()
+
+    def flush(self):
+        """Ghi các giờ đang chờ xuống đĩa (dữ liệu trước, danh sách giờ sau)"""
+        if not self._pending_slots and not self.writing:
+            return
+
+        if len(self._pending_rows):
+            df = self._pending_rows.to_text_frame()
+            header = not os.path.exists(self._rows_path)
+            if not header:
+                # Giữ đúng cột của file đã có (checkpoint tạo trước khi có ID_COLUMN)
+                columns = pd.read_csv(self._rows_path, nrows=0, encoding='utf-8').columns
+                df = df.reindex(columns=columns)
+            df.to_csv(self._rows_path, mode='a', header=header, index=False, encoding='utf-8')
+
+        self.completed.update(self._pending_slots)
+        self._pending_slots = []
+        self._pending_rows = ReadingBatch()
+        self.writing = set()
+        self._save_state()
+
+    def _save_state(self):
+        """Ghi file JSON (ghi file tạm rồi đổi tên)"""
+        data = {
+            'key': self.key,
+            'completed': _collapse_runs(self.completed),
+            'writing': _collapse_runs(self.writing),
+            'updated_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        tmp_path = f"{self._state_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self._state_path)
+
+    def read_rows(self, times=None):
+        """
+        Đọc dữ liệu đã ghi của các giờ đã tải xong
+
+        Args:
+            times (iterable): Chỉ lấy các giờ này (None: tất cả)
+
+        Returns:
+            pd.DataFrame: Dữ liệu dạng text (cột như file CSV), hoặc None nếu không có
+        """
+        if not os.path.exists(self._rows_path):
+            return None
+
+        df = pd.read_csv(self._rows_path, dtype=str, keep_default_na=False, encoding='utf-8')
+        wanted = self.completed if times is None else self.completed.intersection(times)
+        wanted = {slot.strftime(REQUESTED_FORMAT) for slot in wanted}
+        df = df[df[REQUESTED_COLUMN].isin(wanted)]
+        # Bị ngắt giữa lúc ghi dữ liệu và danh sách giờ thì giờ đó được tải lại: giữ bản mới nhất
+        df = df.drop_duplicates([ID_COLUMN if ID_COLUMN in df.columns else 'Tên hồ', REQUESTED_COLUMN], keep='last')
+        return df.reset_index(drop=True) if not df.empty else None
+
+    def seed(self, tracker, reservoirs):
+        """
+        Đặt quan trắc gần nhất của từng hồ trong tracker từ dữ liệu đã ghi
+
+        Args:
+            tracker (ObservationTracker): Tracker cần khởi tạo
+            reservoirs (dict): {ID hồ: tên hồ}
+        """
+        df = self.read_rows()
+        if df is None:
+            return
+        order = df[REQUESTED_COLUMN].map(parse_requested_time).argsort(kind='stable')
+        # Theo ID hồ; checkpoint tạo trước khi có ID_COLUMN thì theo tên
+        key = ID_COLUMN if ID_COLUMN in df.columns else 'Tên hồ'
+        last_rows = df.iloc[order].drop_duplicates(key, keep='last')
+        for reservoir_id, name in reservoirs.items():
+            rows = last_rows[last_rows[key] == (reservoir_id if key == ID_COLUMN else name)]
+            if not rows.empty:
+                tracker.seed_from_row(reservoir_id, rows.iloc[0].to_dict())
+
+    def clear(self):
+        """Xóa checkpoint (gọi sau khi đã lưu kết quả thành công)"""
+        self.completed = set()
+        self.writing = set()
+        self.unconfirmed = set()
+        self._pending_slots = []
+        self._pending_rows = ReadingBatch()
+        for path in (self._state_path, self._rows_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def _collapse_runs(slots):
+    """Các giờ -> list [bắt đầu, kết thúc] (ISO) của các khoảng giờ liên tục"""
+    runs = []
+    for slot in sorted(slots):
+        if runs and slot - runs[-1][1] == timedelta(hours=1):
+            runs[-1][1] = slot
+        else:
+            runs.append([slot, slot])
+    return [[start.isoformat(), end.isoformat()] for start, end in runs]
+
+
+def _expand_runs(runs):
+    """Ngược lại với _collapse_runs"""
+    slots = set()
+    for start, end in runs:
+        slot, end = datetime.fromisoformat(start), datetime.fromisoformat(end)
+        while slot <= end:
+            slots.add(slot)
+            slot += timedelta(hours=1)
+    return slots
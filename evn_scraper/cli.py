@@ -0,0 +1,407 @@
+"""
+Dòng lệnh chung cho mọi hồ chứa (thay cho các script riêng từng hồ)
+
+Một tiến trình, một backend tải trang (HTTP session hoặc Chrome) cho mọi hồ được chọn:
+
+    python -m evn_scraper --reservoirs 26,27,46 --mode incremental
+    python -m evn_scraper --reservoirs "Tây Nguyên" --mode backfill --start "01/07/2025 00:00" --end "31/07/2025 23:00"
+    python -m evn_scraper --reservoirs 27 --mode gaps --backend selenium --headless --format csv,excel
+    python -m evn_scraper --reservoirs all --mode follow --metrics-port 9108
+"""
+
+import os
+import time
+import logging
+import signal
+import argparse
+import threading
+from datetime import datetime, timedelta
+
+from .catalog import CATALOG_FILE, ReservoirCatalog, use_catalog
+from .follow import Follower
+from .gaps import execute_plan, plan_from_csv
+from .lag import ObservationTracker
+from .metrics import MetricsServer, get_metrics
+from .parallel import ParallelRangeScraper
+from .pipeline import ResultWriter, iter_batches
+from .records import ReadingBatch
+from .reservoirs import PAGE_URL
+from .scraper import EVNMultiReservoirScraper, hourly_range
+from .state import HighWaterMarks
+from .stride import HourStride
+from .timeutil import REQUESTED_FORMAT, floor_hour
+
+logger = logging.getLogger(__name__)
+
+# File CSV của các hồ đã theo dõi từ trước (hồ khác ghi vào ho_<ID>_water_level.csv)
+OUTPUT_FILES = {
+    "26": "ban_ve_water_level.csv",
+    "27": "song_ba_ha_water_level.csv",
+    "46": "don_duong_water_level.csv",
+}
+
+MODES = ('backfill', 'incremental', 'gaps', 'follow')
+BACKENDS = ('auto', 'http', 'selenium', 'selenium-pool')
+FORMATS = ('csv', 'excel', 'parquet', 'sqlite')
+
+# Hồ chưa có mốc trong chế độ incremental (không chỉ định --start): lấy từ chừng này giờ trước
+INCREMENTAL_LOOKBACK = timedelta(hours=24)
+
+
+def parse_datetime(value):
+    """
+    Đọc thời điểm từ dòng lệnh
+
+    Args:
+        value (str): 'DD/MM/YYYY HH:MM', 'DD/MM/YYYY' hoặc ISO ('2025-07-15T08:00')
+
+    Returns:
+        datetime: Thời điểm (làm tròn xuống đầu giờ)
+
+    Raises:
+        argparse.ArgumentTypeError: Nếu không đọc được
+    """
+    for parse in (lambda text: datetime.strptime(text, REQUESTED_FORMAT),
+                  lambda text: datetime.strptime(text, "%d/%m/%Y"),
+                  datetime.fromisoformat):
+        try:
+            return floor_hour(parse(value.strip()))
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f"Thời điểm không hợp lệ: {value}")
+
+
+def parse_output(value):
+    """
+    Args:
+        value (str): 'ID=file.csv'
+
+    Returns:
+        tuple: (ID hồ, file CSV)
+    """
+    reservoir_id, sep, path = value.partition('=')
+    if not sep or not reservoir_id.strip() or not path.strip():
+        raise argparse.ArgumentTypeError(f"Cần dạng ID=file.csv: {value}")
+    return reservoir_id.strip(), path.strip()
+
+
+def parse_formats(value):
+    """
+    Args:
+        value (str): Các định dạng cách nhau bởi dấu phẩy, ví dụ 'csv,excel'
+
+    Returns:
+        set: Các định dạng (luôn có 'csv': file CSV là nguồn của mốc trạng thái và chế độ gaps)
+    """
+    formats = {item.strip().lower() for item in value.split(',') if item.strip()}
+    unknown = formats - set(FORMATS)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"Định dạng không hợp lệ: {', '.join(sorted(unknown))}")
+    return formats | {'csv'}
+
+
+def build_parser():
+    """Bộ đọc tham số dòng lệnh"""
+    parser = argparse.ArgumentParser(
+        prog='python -m evn_scraper',
+        description="Lấy dữ liệu mực nước hồ thủy điện EVN cho nhiều hồ từ một lần tải trang mỗi giờ")
+
+    selection = parser.add_argument_group("hồ chứa và thời gian")
+    selection.add_argument('--reservoirs', default=','.join(OUTPUT_FILES),
+                           help="ID, tên hồ, vùng miền hoặc 'all', cách nhau bởi dấu phẩy (mặc định %(default)s)")
+    selection.add_argument('--mode', choices=MODES, default='incremental',
+                           help="backfill: lấy --start..--end; incremental: các giờ còn thiếu từ mốc đã lưu "
+                                "đến hiện tại; gaps: lấy bù giờ thiếu / số liệu cũ trong file CSV; "
+                                "follow: như incremental rồi chạy liên tục, poll ngay sau mỗi lần nguồn "
+                                "đồng bộ (mặc định %(default)s)")
+    selection.add_argument('--start', type=parse_datetime,
+                           help="Thời điểm bắt đầu 'DD/MM/YYYY HH:MM' (bắt buộc với backfill; incremental: "
+                                "cho hồ chưa có mốc, mặc định 24 giờ trước)")
+    selection.add_argument('--end', type=parse_datetime,
+                           help="Thời điểm kết thúc (mặc định giờ hiện tại)")
+    selection.add_argument('--catalog-file', default=CATALOG_FILE,
+                           help="File danh mục hồ đọc từ trang, làm mới mỗi tuần (mặc định %(default)s)")
+
+    fetching = parser.add_argument_group("tải trang")
+    fetching.add_argument('--backend', choices=BACKENDS, default='auto',
+                          help="auto: HTTP, lỗi thì dùng Selenium (mặc định %(default)s)")
+    fetching.add_argument('--base-url', default=PAGE_URL,
+                          help="URL trang dữ liệu (ví dụ server giả lập benchmarks/fake_evn_server.py)")
+    fetching.add_argument('--headless', action='store_true', help="Chạy Chrome ở chế độ ẩn")
+    fetching.add_argument('--lean', action='store_true', help="Chrome chế độ nhẹ (chặn ảnh, CSS, font, script bên thứ ba)")
+    fetching.add_argument('--concurrency', type=int, default=4,
+                          help="Số luồng tải trang đồng thời mỗi tiến trình (mặc định %(default)s)")
+    fetching.add_argument('--shards', type=int, default=1,
+                          help="Số tiến trình chia nhau khoảng giờ khi backfill dài (mặc định %(default)s)")
+    fetching.add_argument('--requests-per-second', type=float, default=2.0,
+                          help="Giới hạn tổng số request/giây tới server EVN (mặc định %(default)s)")
+    fetching.add_argument('--adaptive-stride', action='store_true',
+                          help="Tải tuần tự, nhảy qua các giờ không thể có quan trắc mới")
+    fetching.add_argument('--page-cache', default="evn_page_cache",
+                          help="Thư mục cache page source (mặc định %(default)s)")
+    fetching.add_argument('--no-page-cache', dest='page_cache', action='store_const', const=None,
+                          help="Luôn tải lại trang")
+    fetching.add_argument('--checkpoint', default="evn_checkpoint",
+                          help="Checkpoint để tiếp tục backfill bị ngắt (mặc định %(default)s)")
+    fetching.add_argument('--no-checkpoint', dest='checkpoint', action='store_const', const=None)
+    fetching.add_argument('--refetch-lagging-after', type=float, default=0,
+                          help="Chờ N giây rồi tải lại (bỏ qua cache) các giờ gần đây bị nguồn trễ; "
+                               "mặc định không tải lại, lần chạy incremental sau hoặc chế độ follow sẽ lấy")
+
+    follow = parser.add_argument_group("chế độ follow")
+    follow.add_argument('--poll-grace', type=float, default=2,
+                        help="Số phút chờ sau thời điểm đồng bộ dự kiến trước khi poll (mặc định %(default)s)")
+    follow.add_argument('--poll-retry', type=float, default=3,
+                        help="Số phút giữa hai lần poll khi nguồn đồng bộ trễ hoặc tải lỗi (mặc định %(default)s)")
+    follow.add_argument('--stale-after', type=float, default=180,
+                        help="/health báo lỗi khi không poll thành công trong số phút này (mặc định %(default)s)")
+
+    output = parser.add_argument_group("kết quả")
+    output.add_argument('--format', dest='formats', type=parse_formats, default=parse_formats('csv,parquet,sqlite'),
+                        help="Các định dạng ghi: csv, excel (theo tháng), parquet, sqlite "
+                             "(mặc định csv,parquet,sqlite; csv luôn được ghi)")
+    output.add_argument('--output', action='append', type=parse_output, default=[], metavar='ID=FILE',
+                        help="File CSV của một hồ (lặp lại cho nhiều hồ)")
+    output.add_argument('--parquet-dir', default="evn_parquet", help="Kho Parquet (mặc định %(default)s)")
+    output.add_argument('--sqlite-db', default="evn_water_level.db", help="File SQLite (mặc định %(default)s)")
+    output.add_argument('--state-file', default="evn_scraper_state.json",
+                        help="Mốc 'Thời điểm yêu cầu' đã lưu của từng hồ (mặc định %(default)s)")
+    output.add_argument('--batch-hours', type=int, default=24 * 7,
+                        help="Số giờ yêu cầu mỗi lô ghi vào file / database (mặc định %(default)s)")
+    output.add_argument('--metrics-file', default="evn_metrics.json",
+                        help="Thời gian từng bước và bộ đếm của lần chạy (mặc định %(default)s)")
+    output.add_argument('--metrics-port', type=int,
+                        help="Cổng endpoint http://127.0.0.1:<port>/metrics và /health khi đang chạy")
+    return parser
+
+
+def run(args):
+    """
+    Chạy một lần thu thập theo tham số đã đọc
+
+    Args:
+        args (argparse.Namespace): Kết quả build_parser().parse_args()
+
+    Returns:
+        int: Mã thoát (0: thành công)
+    """
+    metrics_server = MetricsServer(port=args.metrics_port).start() if args.metrics_port else None
+
+    cache = None
+    if args.page_cache:
+        from .page_cache import PageCache
+        cache = PageCache(args.page_cache)
+
+    checkpoint = None
+    writer = None
+    try:
+        catalog = ReservoirCatalog.discover(args.catalog_file)
+        use_catalog(catalog)
+        reservoirs = [item.strip() for item in args.reservoirs.split(',') if item.strip()]
+        # Một backend tải trang dùng chung cho mọi hồ
+        scraper = EVNMultiReservoirScraper(reservoirs, backend=args.backend, headless=args.headless,
+                                           lean=args.lean, cache=cache, catalog=catalog)
+        scraper.base_url = args.base_url
+
+        custom_files = dict(args.output)
+        output_files = {reservoir_id: custom_files.get(reservoir_id) or OUTPUT_FILES.get(reservoir_id)
+                        or f"ho_{reservoir_id}_water_level.csv"
+                        for reservoir_id in scraper.reservoirs}
+        range_scraper = ParallelRangeScraper(scraper, args.concurrency, args.requests_per_second)
+
+        marks = HighWaterMarks(args.state_file)
+        # Bỏ các bản ghi trùng hoàn toàn với quan trắc đã lưu trước đó (nguồn chưa cập nhật)
+        tracker = ObservationTracker()
+        for reservoir_id, output_file in output_files.items():
+            marks.bootstrap_from_csv(reservoir_id, output_file)
+            tracker.seed_from_csv(reservoir_id, output_file)
+
+        writer = ResultWriter(output_files, scraper.reservoirs, marks,
+                              select_new=(args.mode in ("incremental", "follow")),
+                              parquet_dir=args.parquet_dir if 'parquet' in args.formats else None,
+                              sqlite_db=args.sqlite_db if 'sqlite' in args.formats else None,
+                              excel='excel' in args.formats)
+
+        def save_progress():
+            # Giờ chỉ có quan trắc lặp vẫn là giờ đã xử lý
+            for reservoir_id, latest in tracker.latest_requested.items():
+                marks.mark_collapsed(reservoir_id, tracker.collapsed.get(reservoir_id, ()))
+                if args.mode != "gaps":
+                    marks.advance(reservoir_id, latest)
+            marks.save()
+
+        if args.mode == "follow":
+            return follow(args, scraper, range_scraper, writer, tracker, marks, save_progress, metrics_server)
+
+        if args.mode == "gaps":
+            plan = plan_from_csv(output_files, start_date=args.start, end_date=args.end, marks=marks)
+            if not plan:
+                logger.info("Không có giờ nào cần lấy bù")
+                return 0
+            start_date = min(fetch_run.start for fetch_run in plan)
+            end_date = max(fetch_run.end for fetch_run in plan)
+        elif args.mode == "incremental":
+            default_start = args.start or floor_hour(datetime.now()) - INCREMENTAL_LOOKBACK
+            window = marks.pending_range(scraper.reservoirs, default_start=default_start, end_date=args.end)
+            if window is None:
+                logger.info("Dữ liệu đã được cập nhật đến giờ hiện tại")
+                return 0
+            start_date, end_date = window
+        else:
+            if args.start is None:
+                logger.error("Chế độ backfill cần --start")
+                return 2
+            start_date, end_date = args.start, args.end or floor_hour(datetime.now())
+
+        logger.info(f"Bắt đầu thu thập dữ liệu cho {', '.join(scraper.reservoirs.values())}")
+        logger.info(f"Khoảng thời gian: {start_date} đến {end_date}")
+
+        if args.mode == "gaps":
+            writer.write(execute_plan(scraper, plan, range_scraper, tracker=tracker))
+            save_progress()
+        else:
+            if args.adaptive_stride:
+                results = scraper.iter_date_range(start_date, end_date, tracker=tracker, stride=HourStride())
+            else:
+                if args.checkpoint:
+                    from .checkpoint import Checkpoint
+                    checkpoint = Checkpoint(args.checkpoint, key=','.join(sorted(scraper.reservoirs)))
+                    # Lần trước bị ngắt sau khi ghi file kết quả nhưng trước khi ghi checkpoint
+                    writer.skip_existing(checkpoint.unconfirmed)
+                streamer = range_scraper
+                if args.shards > 1:
+                    from .sharding import ShardedRangeScraper
+                    streamer = ShardedRangeScraper(scraper, args.shards, args.concurrency, args.requests_per_second,
+                                                   batch_hours=args.batch_hours)
+                results = streamer.iter_readings(hourly_range(start_date, end_date), tracker=tracker,
+                                                 checkpoint=checkpoint)
+
+            # Ghi từng lô ngay khi tải xong: bộ nhớ không tăng theo độ dài khoảng thời gian
+            for slots, df_batch in iter_batches(results, args.batch_hours):
+                if checkpoint is not None:
+                    checkpoint.begin_write(slots)
+                writer.write(df_batch)
+                if checkpoint is not None:
+                    # Dữ liệu đã ghi vào file kết quả, checkpoint chỉ cần danh sách giờ
+                    for slot in slots:
+                        if slot not in scraper.failed_times:
+                            checkpoint.add(slot, ())
+                    checkpoint.flush()
+                save_progress()
+
+        refetch = tracker.refetch_slots() if args.refetch_lagging_after else []
+        if refetch:
+            logger.info(f"Nguồn trễ ở {len(refetch)} giờ gần đây, tải lại sau {args.refetch_lagging_after:.0f} giây")
+            time.sleep(args.refetch_lagging_after)
+            # Các giờ này đã qua mốc nhưng quan trắc mới (đã qua tracker) chưa được lưu
+            writer.write(range_scraper.scrape_times(refetch, tracker=tracker, fresh=True), select_new=False)
+            save_progress()
+
+        if checkpoint is not None:
+            # Kết quả đã lưu: lần chạy sau không cần tiếp tục từ checkpoint
+            checkpoint.clear()
+
+        print("\n" + "="*70)
+        print("TÓM TẮT THU THẬP DỮ LIỆU")
+        print("="*70)
+        print(f"Khoảng thời gian: {start_date.strftime('%d/%m/%Y %H:%M')} đến {end_date.strftime('%d/%m/%Y %H:%M')}")
+
+        for reservoir_id, name in scraper.reservoirs.items():
+            if writer.rows[reservoir_id]:
+                excel = f" (+ {os.path.splitext(output_files[reservoir_id])[0]}_YYYY-MM.xlsx)" if writer.excel else ""
+                print(f"  - {name}: {writer.rows[reservoir_id]} bản ghi -> {output_files[reservoir_id]}{excel}")
+            else:
+                logger.warning(f"Không có dữ liệu mới cho {name}")
+        if tracker.skipped:
+            print(f"  - Bỏ {tracker.skipped} bản ghi trùng quan trắc trước đó")
+        if writer.parquet_dir and writer.parquet_rows:
+            print(f"  - Parquet: {writer.parquet_rows} bản ghi -> {writer.parquet_dir}/")
+        if writer.sqlite_db and writer.sqlite_rows:
+            print(f"  - SQLite: {writer.sqlite_rows} bản ghi -> {writer.sqlite_db}")
+        return 1 if scraper.failed_times else 0
+
+    except Exception as e:
+        logger.error(f"Lỗi trong quá trình thực thi: {e}")
+        import traceback
+        traceback.print_exc()
+        return 1
+
+    finally:
+        if writer is not None:
+            writer.close()
+        if cache is not None:
+            cache.close()
+
+        # Bước nào chiếm thời gian: chờ, tải trang hay phân tích HTML
+        get_metrics().log_summary()
+        if args.metrics_file:
+            get_metrics().save_json(args.metrics_file)
+        if metrics_server is not None:
+            metrics_server.stop()
+
+
+def follow(args, scraper, range_scraper, writer, tracker, marks, save_progress, metrics_server=None):
+    """
+    Chế độ follow: lấy bù các giờ còn thiếu rồi poll liên tục cho đến khi bị dừng (Ctrl+C, SIGTERM)
+
+    Args:
+        args (argparse.Namespace): Tham số dòng lệnh
+        scraper (EVNMultiReservoirScraper): Scraper của các hồ được chọn
+        range_scraper (ParallelRangeScraper): Bộ tải song song cho phần lấy bù
+        writer (ResultWriter): Bước ghi kết quả
+        tracker (ObservationTracker): Bỏ các quan trắc đã lưu
+        marks (HighWaterMarks): Mốc đã lưu của từng hồ
+        save_progress (callable): Lưu mốc sau mỗi lần ghi
+        metrics_server (MetricsServer): Server /metrics, được gắn thêm /health của Follower
+
+    Returns:
+        int: Mã thoát
+    """
+    default_start = args.start or floor_hour(datetime.now()) - INCREMENTAL_LOOKBACK
+    window = marks.pending_range(scraper.reservoirs, default_start=default_start)
+    if window is not None:
+        logger.info(f"Lấy bù {window[0]} đến {window[1]} trước khi theo dõi")
+        for _, df_batch in iter_batches(range_scraper.iter_readings(hourly_range(*window), tracker=tracker),
+                                        args.batch_hours):
+            writer.write(df_batch)
+            save_progress()
+
+    def write(rows):
+        # Quan trắc mới của giờ đang poll: mốc của giờ này có thể đã có từ lần poll trước
+        writer.write(ReadingBatch(rows).to_text_frame(), select_new=False)
+        save_progress()
+
+    follower = Follower(scraper, tracker, write,
+                        grace=timedelta(minutes=args.poll_grace),
+                        retry_interval=timedelta(minutes=args.poll_retry),
+                        stale_after=timedelta(minutes=args.stale_after))
+    if metrics_server is not None:
+        metrics_server.health = follower.health
+
+    stop = threading.Event()
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    try:
+        follower.run(stop)
+    except KeyboardInterrupt:
+        pass
+    logger.info(f"Dừng theo dõi sau {follower.polls} lần poll")
+    return 0
+
+
+def main(argv=None):
+    """
+    Args:
+        argv (list): Tham số dòng lệnh (mặc định sys.argv[1:])
+
+    Returns:
+        int: Mã thoát
+    """
+    args = build_parser().parse_args(argv)
+
+    # Cấu hình logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    return run(args)
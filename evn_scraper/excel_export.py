@@ -0,0 +1,161 @@
+"""
+Xuất dữ liệu ra Excel bằng chế độ ghi tuần tự (write-only) của openpyxl
+- append_monthly_excel: ghi thêm dữ liệu mới vào workbook theo tháng, chỉ ghi lại
+  các tháng có dữ liệu mới thay vì đọc - gộp - ghi lại toàn bộ lịch sử
+- export_excel_window: tạo workbook cho một khoảng thời gian từ file CSV khi cần
+"""
+
+import os
+import logging
+
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+
+from .state import REQUESTED_COLUMN
+from .timeutil import REQUESTED_FORMAT
+
+logger = logging.getLogger(__name__)
+
+SHEET_NAME = 'Sheet1'
+
+
+def _cell_value(value):
+    """Giá trị ghi vào ô (NaN/None thành ô trống)"""
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    return value
+
+
+def write_excel(path, columns, rows):
+    """
+    Ghi workbook tuần tự, không giữ toàn bộ cây XML trong bộ nhớ
+
+    Ghi ra file tạm rồi đổi tên, nên file cũ vẫn nguyên vẹn nếu bị ngắt giữa chừng
+
+    Args:
+        path (str): File .xlsx cần ghi
+        columns (list): Tên cột (dòng tiêu đề)
+        rows (iterable): Các dòng dữ liệu (tuple/list giá trị)
+
+    Returns:
+        int: Số dòng dữ liệu đã ghi
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(SHEET_NAME)
+    sheet.append(list(columns))
+
+    count = 0
+    for row in rows:
+        sheet.append([_cell_value(value) for value in row])
+        count += 1
+
+    tmp_path = f"{path}.tmp.xlsx"
+    workbook.save(tmp_path)
+    os.replace(tmp_path, path)
+    return count
+
+
+def _read_rows(path):
+    """Đọc tuần tự các dòng dữ liệu (bỏ dòng tiêu đề) của workbook đã có"""
+    workbook = load_workbook(path, read_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        rows = sheet.iter_rows(values_only=True)
+        next(rows, None)
+        for row in rows:
+            yield row
+    finally:
+        workbook.close()
+
+
+def month_of(requested):
+    """
+    Args:
+        requested (pd.Series): Cột 'Thời điểm yêu cầu' dạng 'DD/MM/YYYY HH:MM'
+
+    Returns:
+        pd.Series: Tháng dạng 'YYYY-MM'
+    """
+    return requested.str.slice(6, 10) + '-' + requested.str.slice(3, 5)
+
+
+def append_monthly_excel(df, prefix):
+    """
+    Ghi thêm dữ liệu vào các workbook theo tháng: <prefix>_YYYY-MM.xlsx
+
+    Chi phí mỗi lần chạy tỉ lệ với số dòng mới và kích thước các tháng có dữ liệu mới,
+    không phụ thuộc vào toàn bộ lịch sử đã thu thập
+
+    Args:
+        df (pd.DataFrame): Dữ liệu mới (có cột 'Thời điểm yêu cầu')
+        prefix (str): Tiền tố tên file, ví dụ 'ban_ve_water_level'
+
+    Returns:
+        list: Các file đã ghi
+    """
+    if df is None or df.empty:
+        return []
+
+    columns = list(df.columns)
+    written = []
+    for month, part in df.groupby(month_of(df[REQUESTED_COLUMN]), sort=True):
+        path = f"{prefix}_{month}.xlsx"
+        new_rows = part.itertuples(index=False, name=None)
+
+        if os.path.exists(path):
+            def rows(existing=_read_rows(path), new_rows=new_rows):
+                yield from existing
+                yield from new_rows
+            count = write_excel(path, columns, rows())
+        else:
+            count = write_excel(path, columns, new_rows)
+
+        logger.info(f"Đã thêm {len(part)} dòng vào {path} (Tổng: {count} dòng)")
+        written.append(path)
+
+    return written
+
+
+def export_excel_window(csv_path, excel_path, start_date=None, end_date=None, chunksize=50000):
+    """
+    Tạo workbook cho một khoảng thời gian từ file CSV (đọc CSV theo từng khối)
+
+    Args:
+        csv_path (str): File CSV kết quả
+        excel_path (str): File .xlsx cần tạo
+        start_date (datetime): Thời điểm yêu cầu bắt đầu (bao gồm, mặc định: không giới hạn)
+        end_date (datetime): Thời điểm yêu cầu kết thúc (bao gồm, mặc định: không giới hạn)
+        chunksize (int): Số dòng CSV đọc mỗi lần
+
+    Returns:
+        int: Số dòng đã ghi
+    """
+    reader = pd.read_csv(csv_path, dtype=str, keep_default_na=False, encoding='utf-8-sig',
+                         chunksize=chunksize)
+    columns = []
+
+    def rows():
+        for chunk in reader:
+            if not columns:
+                columns.extend(chunk.columns)
+            requested = pd.to_datetime(chunk[REQUESTED_COLUMN], format=REQUESTED_FORMAT, errors='coerce')
+            mask = requested.notna()
+            if start_date is not None:
+                mask &= requested >= start_date
+            if end_date is not None:
+                mask &= requested <= end_date
+            yield from chunk[mask].itertuples(index=False, name=None)
+
+    # Lấy tiêu đề trước khi ghi dòng đầu tiên
+    iterator = rows()
+    first = next(iterator, None)
+    if first is None:
+        count = write_excel(excel_path, columns, [])
+    else:
+        def all_rows():
+            yield first
+            yield from iterator
+        count = write_excel(excel_path, columns, all_rows())
+
+    logger.info(f"Đã xuất {count} dòng từ {csv_path} ra {excel_path}")
+    return count
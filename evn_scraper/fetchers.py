@@ -0,0 +1,368 @@
+"""
+Các backend tải trang dữ liệu EVN
+- HttpFetcher: gọi HTTP trực tiếp (trang được render sẵn ở server), không cần Chrome
+- SeleniumFetcher: dùng Chrome WebDriver như các script cũ
+- FallbackFetcher: thử HTTP trước, lỗi thì chuyển sang Selenium
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+
+import requests
+from selenium import webdriver
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.chrome.options import Options
+
+from .metrics import get_metrics
+from .parser import has_data_table
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+# Một lần gọi execute_script kiểm tra toàn bộ điều kiện sẵn sàng của trang:
+# - document đã parse xong (không còn 'loading')
+# - bảng tblgridtd là bảng mới (chưa bị đánh dấu ở trang trước)
+# - bảng đã có dữ liệu
+# Trả về chuỗi 'Thời điểm' của các hồ, hoặc null nếu chưa sẵn sàng
+_READY_SCRIPT = """
+if (document.readyState === 'loading') return null;
+var table = document.querySelector('table.tblgridtd');
+if (!table || table.getAttribute('data-evn-seen')) return null;
+var stamps = [];
+var rows = table.querySelectorAll('tbody > tr');
+for (var i = 0; i < rows.length; i++) {
+    var cell = rows[i].querySelector('td.tdclass');
+    if (cell) stamps.push(cell.textContent.trim());
+}
+return stamps.length ? stamps.join('|') : null;
+"""
+
+# Chế độ "lean": bảng được render ở server nên không cần ảnh, CSS, font hay script bên thứ ba
+LEAN_ARGUMENTS = [
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--disable-component-update',
+    '--disable-default-apps',
+    '--disable-sync',
+    '--disable-features=Translate,MediaRouter,OptimizationHints',
+    '--metrics-recording-only',
+    '--no-first-run',
+    '--mute-audio',
+    '--blink-settings=imagesEnabled=false',
+]
+
+# Chrome chỉ hỗ trợ tắt ảnh qua content settings; CSS và font được chặn bằng LEAN_BLOCKED_URLS
+LEAN_PREFS = {
+    'profile.managed_default_content_settings.images': 2,
+}
+
+# Chặn qua CDP (Network.setBlockedURLs), áp dụng cho mọi domain. Script của chính trang vẫn
+# được tải, chỉ chặn script phân tích / quảng cáo / mạng xã hội của bên thứ ba
+LEAN_BLOCKED_URLS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.svg', '*.ico', '*.webp',
+    '*.css', '*.woff', '*.woff2', '*.ttf', '*.eot',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*', '*googlesyndication.com*',
+    '*facebook.net*', '*facebook.com*', '*connect.facebook*', '*hotjar.com*', '*addthis.com*',
+]
+
+# Đánh dấu bảng của trang hiện tại để nhận ra khi trang mới đã thay thế nó
+_MARK_SCRIPT = """
+var table = document.querySelector('table.tblgridtd');
+if (table) table.setAttribute('data-evn-seen', '1');
+"""
+
+
+class FetchError(Exception):
+    """Lỗi khi tải trang dữ liệu"""
+
+
+class HttpFetcher:
+    """
+    Tải trang bằng HTTP với session keep-alive và nén gzip
+
+    Nếu server trả về ETag / Last-Modified, lần tải lại cùng URL gửi request có điều kiện
+    (If-None-Match / If-Modified-Since); phản hồi 304 dùng lại trang đã nhận lần trước.
+    """
+
+    name = 'http'
+
+    def __init__(self, timeout=30, validator_cache_size=32):
+        """
+        Args:
+            timeout (float): Thời gian chờ tối đa cho mỗi request (giây)
+            validator_cache_size (int): Số URL gần nhất được giữ ETag / Last-Modified và trang
+                để gửi request có điều kiện (0: tắt)
+        """
+        self.timeout = timeout
+        self.validator_cache_size = validator_cache_size
+        self.session = None
+        self._validators = OrderedDict()    # url -> (etag, last_modified, html)
+        self._lock = threading.Lock()
+
+    def open(self):
+        """Tạo session HTTP (giữ kết nối giữa các request)"""
+        if self.session is None:
+            self.session = requests.Session()
+            self.session.headers.update({
+                'User-Agent': USER_AGENT,
+                'Accept': 'text/html,application/xhtml+xml',
+                'Accept-Encoding': 'gzip, deflate',
+                'Accept-Language': 'vi-VN,vi;q=0.9',
+            })
+            logger.info("HTTP session đã được khởi tạo")
+
+    def close(self):
+        """Đóng session HTTP"""
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+            logger.info("HTTP session đã đóng")
+
+    def fetch(self, url):
+        """
+        Tải page source của một URL
+
+        Args:
+            url (str): URL cần tải
+
+        Returns:
+            str: Page source
+
+        Raises:
+            FetchError: Nếu request lỗi hoặc trang không có bảng dữ liệu
+        """
+        self.open()
+        with self._lock:
+            cached = self._validators.get(url)
+        headers = {}
+        if cached is not None:
+            etag, last_modified, _ = cached
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            raise FetchError(f"Lỗi HTTP khi tải {url}: {e}") from e
+
+        if response.status_code == 304 and cached is not None:
+            logger.debug(f"Trang không đổi (304): {url}")
+            get_metrics().inc('not_modified')
+            return cached[2]
+
+        # Server không luôn khai báo charset, trang luôn là UTF-8
+        if 'charset' not in response.headers.get('Content-Type', '').lower():
+            response.encoding = 'utf-8'
+
+        html = response.text
+        if not has_data_table(html):
+            raise FetchError(f"Trang không có bảng dữ liệu: {url}")
+        self._remember(url, response, html)
+        return html
+
+    def _remember(self, url, response, html):
+        """Giữ ETag / Last-Modified và trang của URL (chỉ khi server có trả về)"""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not self.validator_cache_size or not (etag or last_modified):
+            return
+        with self._lock:
+            self._validators[url] = (etag, last_modified, html)
+            self._validators.move_to_end(url)
+            while len(self._validators) > self.validator_cache_size:
+                self._validators.popitem(last=False)
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class SeleniumFetcher:
+    """Tải trang bằng Chrome WebDriver"""
+
+    name = 'selenium'
+
+    def __init__(self, headless=False, timeout=20, lean=False):
+        """
+        Args:
+            headless (bool): Chạy browser ở chế độ ẩn
+            timeout (float): Thời gian chờ tối đa để trang sẵn sàng (giây)
+            lean (bool): Chế độ nhẹ: headless mới, chặn ảnh/CSS/font và script bên thứ ba,
+                tắt extension và các kết nối nền của Chrome
+        """
+        self.headless = headless
+        self.timeout = timeout
+        self.lean = lean
+        self.driver = None
+        self.last_stamps = None     # Chuỗi 'Thời điểm' của trang trước
+        self.page_count = 0         # Số trang đã tải từ khi khởi động browser
+
+    def setup_driver(self):
+        """Thiết lập Chrome WebDriver với các tùy chọn phù hợp"""
+        chrome_options = Options()
+
+        if self.headless:
+            chrome_options.add_argument('--headless=new' if self.lean else '--headless')
+
+        chrome_options.add_argument('--no-sandbox')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+        chrome_options.add_argument('--disable-gpu')
+        chrome_options.add_argument('--window-size=1920,1080')
+        chrome_options.add_argument(f'--user-agent={USER_AGENT}')
+
+        if self.lean:
+            for argument in LEAN_ARGUMENTS:
+                chrome_options.add_argument(argument)
+            chrome_options.add_experimental_option('prefs', LEAN_PREFS)
+
+        # Bảng được render ở server: không cần đợi ảnh, CSS, script tải xong
+        chrome_options.page_load_strategy = 'eager'
+
+        with get_metrics().timer('driver_start'):
+            # Khởi tạo driver (không dùng implicitly_wait, chỉ chờ theo điều kiện sẵn sàng)
+            self.driver = webdriver.Chrome(options=chrome_options)
+
+            if self.lean:
+                self.driver.execute_cdp_cmd('Network.enable', {})
+                self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': LEAN_BLOCKED_URLS})
+        self.page_count = 0
+        self.last_stamps = None
+
+        logger.info("WebDriver đã được khởi tạo thành công")
+
+    def open(self):
+        """Khởi tạo WebDriver nếu chưa có"""
+        if self.driver is None:
+            self.setup_driver()
+
+    def close(self):
+        """Đóng WebDriver"""
+        if self.driver is not None:
+            self.driver.quit()
+            self.driver = None
+            logger.info("WebDriver đã đóng")
+
+    def fetch(self, url):
+        """
+        Tải page source của một URL bằng browser
+
+        Args:
+            url (str): URL cần tải
+
+        Returns:
+            str: Page source
+
+        Raises:
+            FetchError: Nếu không tải được bảng dữ liệu
+        """
+        self.open()
+        self.page_count += 1
+        try:
+            self.driver.execute_script(_MARK_SCRIPT)
+            self.driver.get(url)
+
+            with get_metrics().timer('ready_wait'):
+                stamps = WebDriverWait(self.driver, self.timeout, poll_frequency=0.1).until(
+                    lambda driver: driver.execute_script(_READY_SCRIPT)
+                )
+        except Exception as e:
+            raise FetchError(f"Lỗi Selenium khi tải {url}: {e}") from e
+
+        if stamps == self.last_stamps:
+            # Trang mới nhưng nguồn chưa có số liệu mới hơn trang trước
+            logger.debug(f"'Thời điểm' không đổi so với trang trước: {url}")
+        self.last_stamps = stamps
+
+        return self.driver.page_source
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class FallbackFetcher:
+    """Dùng backend chính, chuyển sang backend dự phòng khi backend chính lỗi"""
+
+    name = 'auto'
+
+    def __init__(self, primary, fallback):
+        """
+        Args:
+            primary: Backend chính (thường là HttpFetcher)
+            fallback: Backend dự phòng (thường là SeleniumFetcher), chỉ khởi tạo khi cần
+        """
+        self.primary = primary
+        self.fallback = fallback
+
+    def open(self):
+        self.primary.open()
+
+    def close(self):
+        self.primary.close()
+        self.fallback.close()
+
+    def fetch(self, url):
+        """
+        Tải page source, thử backend dự phòng nếu backend chính lỗi
+
+        Args:
+            url (str): URL cần tải
+
+        Returns:
+            str: Page source
+
+        Raises:
+            FetchError: Nếu cả hai backend đều lỗi
+        """
+        try:
+            return self.primary.fetch(url)
+        except FetchError as e:
+            logger.warning(f"{e} - chuyển sang {self.fallback.name}")
+            return self.fallback.fetch(url)
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def create_fetcher(backend="auto", headless=False, pool_size=4, lean=False):
+    """
+    Tạo backend tải trang theo tên
+
+    Args:
+        backend (str): 'http', 'selenium', 'selenium-pool' (nhiều browser dùng chung)
+            hoặc 'auto' (HTTP, dự phòng Selenium)
+        headless (bool): Chạy browser ở chế độ ẩn (cho Selenium)
+        pool_size (int): Số browser cho backend 'selenium-pool'
+        lean (bool): Dùng chế độ Chrome nhẹ cho các backend Selenium
+
+    Returns:
+        Backend có các phương thức open(), fetch(url), close()
+
+    Raises:
+        ValueError: Nếu tên backend không hợp lệ
+    """
+    if backend == 'http':
+        return HttpFetcher()
+    if backend == 'selenium':
+        return SeleniumFetcher(headless=headless, lean=lean)
+    if backend == 'selenium-pool':
+        from .browser_pool import BrowserPool
+        return BrowserPool(size=pool_size, headless=headless, lean=lean)
+    if backend == 'auto':
+        return FallbackFetcher(HttpFetcher(), SeleniumFetcher(headless=headless, lean=lean))
+    raise ValueError(f"Backend không hợp lệ: {backend}")
@@ -0,0 +1,178 @@
+"""
+Chế độ theo dõi (follow): một tiến trình chạy liên tục, lấy số liệu mới ngay sau khi nguồn cập nhật
+
+Giữ một HTTP session / browser mở suốt thời gian chạy. Mỗi lần poll tải trang của giờ hiện tại
+(bỏ qua cache) cho mọi hồ được chọn. Hồ đồng bộ số liệu theo chu kỳ (thường mỗi giờ, cùng phút
+'Đồng bộ lúc'), nên lần poll tiếp theo được hẹn ngay sau lần đồng bộ kế tiếp sớm nhất của các hồ;
+nguồn đồng bộ trễ thì poll lại sau retry_interval. Trang có bảng giống lần poll trước không được
+phân tích lại, chỉ các hồ có hàng thay đổi (ChangeDetector) và là quan trắc mới (ObservationTracker)
+được chuyển cho bước ghi.
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from .changes import ChangeDetector
+from .metrics import get_metrics
+from .timeutil import floor_hour
+
+logger = logging.getLogger(__name__)
+
+
+class Follower:
+    """Poll trang dữ liệu theo lịch 'Đồng bộ lúc' của các hồ và ghi các quan trắc mới"""
+
+    def __init__(self, scraper, tracker, write, grace=timedelta(minutes=2), retry_interval=timedelta(minutes=3),
+                 min_interval=timedelta(minutes=1), max_interval=timedelta(hours=1),
+                 sync_period=timedelta(hours=1), stale_after=timedelta(hours=3), changes=None):
+        """
+        Args:
+            scraper (EVNMultiReservoirScraper): Scraper (backend tải trang được giữ mở)
+            tracker (ObservationTracker): Bỏ các quan trắc đã lưu
+            write (callable): Ghi các bản ghi mới: write(list Reading), chỉ gọi khi có bản ghi
+            grace (timedelta): Chờ thêm sau thời điểm đồng bộ dự kiến trước khi poll
+            retry_interval (timedelta): Poll lại sau khoảng này khi nguồn đồng bộ trễ hoặc tải lỗi
+            min_interval (timedelta): Khoảng cách tối thiểu giữa hai lần poll
+            max_interval (timedelta): Khoảng cách tối đa giữa hai lần poll
+            sync_period (timedelta): Chu kỳ đồng bộ của nguồn
+            stale_after (timedelta): /health báo lỗi khi không poll thành công trong khoảng này
+            changes (ChangeDetector): Nhận biết bảng / hàng không đổi giữa các lần poll
+                (mặc định tạo mới)
+        """
+        self.scraper = scraper
+        self.tracker = tracker
+        self.write = write
+        self.grace = grace
+        self.retry_interval = retry_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.sync_period = sync_period
+        self.stale_after = stale_after
+        self.changes = changes if changes is not None else ChangeDetector()
+
+        self.started_at = datetime.now()
+        self.polls = 0
+        self.failures = 0               # Số lần poll lỗi liên tiếp
+        self.last_poll = None
+        self.last_success = None
+        self.last_change = None         # Lần poll gần nhất có quan trắc mới
+        self.next_poll_at = None
+        self.synced = {}                # reservoir_id -> 'Đồng bộ lúc' mới nhất đã thấy
+
+    def next_poll(self, now):
+        """
+        Thời điểm poll tiếp theo
+
+        Args:
+            now (datetime): Thời điểm hiện tại
+
+        Returns:
+            datetime: Sau lần đồng bộ dự kiến sớm nhất của các hồ (cộng grace); hồ đồng bộ trễ
+                trong chu kỳ hiện tại được poll lại sau retry_interval, hồ đã ngừng đồng bộ
+                lâu hơn một chu kỳ chỉ được chờ ở đúng phút đồng bộ của các chu kỳ sau
+        """
+        if not self.synced:
+            return now + self.retry_interval
+
+        candidates = []
+        for synced_at in self.synced.values():
+            due = synced_at + self.sync_period + self.grace
+            if due > now:
+                candidates.append(due)
+            elif now - due < self.sync_period:
+                candidates.append(now + self.retry_interval)
+            else:
+                cycles = (now - due) // self.sync_period + 1
+                candidates.append(due + cycles * self.sync_period)
+        return min(max(min(candidates), now + self.min_interval), now + self.max_interval)
+
+    def poll(self, now=None):
+        """
+        Tải trang của giờ hiện tại một lần và ghi các quan trắc mới
+
+        Args:
+            now (datetime): Thời điểm hiện tại (mặc định datetime.now())
+
+        Returns:
+            list: Các Reading mới đã ghi (rỗng nếu không có gì thay đổi hoặc tải lỗi)
+        """
+        now = now or datetime.now()
+        slot = floor_hour(now)
+        self.polls += 1
+        self.last_poll = now
+        get_metrics().inc('polls')
+
+        rows = self.scraper.scrape_single_time(slot, fresh=True, changes=self.changes)
+        if slot in self.scraper.failed_times:
+            # Giờ hiện tại sẽ được poll lại, không tính là giờ tải lỗi của lần chạy
+            self.scraper.failed_times.discard(slot)
+            self.failures += 1
+            logger.warning(f"Poll {slot.strftime('%d/%m/%Y %H:%M')} lỗi ({self.failures} lần liên tiếp)")
+            return []
+
+        self.failures = 0
+        self.last_success = now
+        for reading in rows:
+            if reading.synced_at is not None:
+                self.synced[reading.reservoir_id] = reading.synced_at
+
+        new_rows = self.tracker.filter(rows)
+        if new_rows:
+            self.last_change = now
+            get_metrics().inc('polls_changed')
+            self.write(new_rows)
+            logger.info(f"Có {len(new_rows)} quan trắc mới: "
+                        f"{', '.join(reading.reservoir_name for reading in new_rows)}")
+        return new_rows
+
+    def run(self, stop=None, max_polls=None):
+        """
+        Poll liên tục cho đến khi có tín hiệu dừng
+
+        Args:
+            stop (threading.Event): Đặt để dừng (mặc định chạy đến khi bị ngắt)
+            max_polls (int): Dừng sau số lần poll này (None: không giới hạn)
+        """
+        stop = stop or threading.Event()
+        self.scraper.fetcher.open()
+        logger.info(f"Theo dõi {len(self.scraper.reservoirs)} hồ: {', '.join(self.scraper.reservoirs.values())}")
+
+        try:
+            while not stop.is_set():
+                self.poll()
+                if max_polls is not None and self.polls >= max_polls:
+                    break
+
+                now = datetime.now()
+                self.next_poll_at = self.next_poll(now) if not self.failures else now + self.retry_interval
+                logger.info(f"Poll tiếp theo lúc {self.next_poll_at.strftime('%H:%M:%S')}")
+                stop.wait((self.next_poll_at - now).total_seconds())
+        finally:
+            self.scraper.fetcher.close()
+
+    def health(self):
+        """
+        Trạng thái cho endpoint /health
+
+        Returns:
+            dict: 'status' ('ok', 'starting' hoặc 'stale') và các mốc thời gian poll
+        """
+        now = datetime.now()
+        if self.last_success is not None:
+            status = 'ok' if now - self.last_success <= self.stale_after else 'stale'
+        else:
+            status = 'starting' if now - self.started_at <= self.stale_after else 'stale'
+
+        def iso(value):
+            return value.isoformat(timespec='seconds') if value is not None else None
+
+        return {
+            'status': status,
+            'polls': self.polls,
+            'consecutive_failures': self.failures,
+            'last_poll': iso(self.last_poll),
+            'last_success': iso(self.last_success),
+            'last_change': iso(self.last_change),
+            'next_poll': iso(self.next_poll_at),
+        }
@@ -0,0 +1,210 @@
+"""
+Phát hiện giờ bị thiếu / số liệu cũ trong dữ liệu đã lưu và lập kế hoạch lấy bù
+Chỉ tải lại đúng các khoảng giờ cần thiết thay vì lấy lại cả khoảng thời gian
+"""
+
+import os
+import logging
+from datetime import timedelta
+from typing import NamedTuple
+
+import pandas as pd
+
+from .parallel import ParallelRangeScraper
+from .records import ReadingBatch
+from .scraper import build_dataframe, hourly_range
+from .state import REQUESTED_COLUMN
+from .timeutil import floor_hour, parse_observed_time, parse_requested_time
+
+logger = logging.getLogger(__name__)
+
+OBSERVED_COLUMN = 'Thời điểm'
+HOUR = timedelta(hours=1)
+
+
+class ReservoirGaps(NamedTuple):
+    """Các giờ cần lấy bù của một hồ"""
+    missing: frozenset      # Giờ chưa có dòng nào
+    stale: frozenset        # Giờ có dòng nhưng số liệu cũ hơn giờ yêu cầu (nguồn trễ)
+
+
+class FetchRun(NamedTuple):
+    """Một khoảng giờ liên tục cần tải lại"""
+    start: object           # datetime, giờ đầu (bao gồm)
+    end: object             # datetime, giờ cuối (bao gồm)
+    reservoir_ids: frozenset
+
+    @property
+    def hours(self):
+        return int((self.end - self.start) / HOUR) + 1
+
+
+def load_stored_times(csv_path):
+    """
+    Đọc cột thời gian của file CSV kết quả (bỏ qua các cột số liệu)
+
+    Args:
+        csv_path (str): File CSV của một hồ
+
+    Returns:
+        pd.DataFrame: Cột 'Thời điểm' và 'Thời điểm yêu cầu', hoặc DataFrame rỗng
+    """
+    if not os.path.exists(csv_path):
+        return pd.DataFrame(columns=[OBSERVED_COLUMN, REQUESTED_COLUMN])
+    return pd.read_csv(csv_path, usecols=[OBSERVED_COLUMN, REQUESTED_COLUMN],
+                       dtype=str, encoding='utf-8-sig', keep_default_na=False)
+
+
+def find_gaps(df, start_date=None, end_date=None, stale_after=HOUR, recheck_stale_within=timedelta(days=2),
+              collapsed=frozenset()):
+    """
+    Tìm các giờ thiếu và giờ có số liệu cũ trong dữ liệu của một hồ
+
+    Args:
+        df (pd.DataFrame): Dữ liệu đã lưu (cần cột 'Thời điểm', 'Thời điểm yêu cầu')
+        start_date (datetime): Đầu khoảng kiểm tra (mặc định: giờ yêu cầu sớm nhất đã lưu)
+        end_date (datetime): Cuối khoảng kiểm tra (mặc định: giờ yêu cầu muộn nhất đã lưu)
+        stale_after (timedelta): Số liệu trễ hơn giờ yêu cầu từ mức này trở lên là số liệu cũ
+        recheck_stale_within (timedelta): Chỉ lấy lại giờ có số liệu cũ trong khoảng này tính
+            từ end_date; giờ cũ hơn coi như nguồn không có số liệu, tải lại cũng vô ích
+        collapsed (frozenset): Các giờ không có dòng vì đã bỏ quan trắc lặp
+            (HighWaterMarks.collapsed_slots), không tính là giờ thiếu
+
+    Returns:
+        ReservoirGaps: Các giờ thiếu và giờ có số liệu cũ
+    """
+    observed_by_slot = {}
+    for observed, requested in zip(df[OBSERVED_COLUMN], df[REQUESTED_COLUMN]):
+        try:
+            slot = parse_requested_time(requested)
+        except ValueError:
+            continue
+        # Dòng ghi sau cùng (lần tải mới nhất) được ưu tiên
+        observed_by_slot[slot] = parse_observed_time(observed, slot)
+
+    if not observed_by_slot and (start_date is None or end_date is None):
+        return ReservoirGaps(frozenset(), frozenset())
+
+    start_date = floor_hour(start_date or min(observed_by_slot))
+    end_date = floor_hour(end_date or max(observed_by_slot))
+
+    missing = set()
+    stale = set()
+    slot = start_date
+    while slot <= end_date:
+        if slot not in observed_by_slot:
+            if slot not in collapsed:
+                missing.add(slot)
+        else:
+            observed = observed_by_slot[slot]
+            if (observed is None or slot - observed >= stale_after) and end_date - slot <= recheck_stale_within:
+                stale.add(slot)
+        slot += HOUR
+
+    return ReservoirGaps(frozenset(missing), frozenset(stale))
+
+
+def collapse_runs(slots):
+    """
+    Gộp các giờ liên tiếp thành các khoảng
+
+    Args:
+        slots (iterable): Các giờ (datetime)
+
+    Returns:
+        list: Danh sách (start, end) theo thứ tự thời gian
+    """
+    runs = []
+    for slot in sorted(slots):
+        if runs and slot - runs[-1][1] == HOUR:
+            runs[-1][1] = slot
+        else:
+            runs.append([slot, slot])
+    return [tuple(run) for run in runs]
+
+
+def build_fetch_plan(gaps_by_reservoir):
+    """
+    Lập kế hoạch tải tối thiểu cho nhiều hồ
+
+    Mỗi lần tải trang có dữ liệu của mọi hồ, nên các giờ cần lấy của các hồ được gộp
+    chung rồi chia thành các khoảng liên tục. Khoảng gần hiện tại nhất được tải trước
+
+    Args:
+        gaps_by_reservoir (dict): {reservoir_id: ReservoirGaps}
+
+    Returns:
+        list: Danh sách FetchRun, khoảng mới nhất trước
+    """
+    needed_by_slot = {}
+    for reservoir_id, gaps in gaps_by_reservoir.items():
+        for slot in gaps.missing | gaps.stale:
+            needed_by_slot.setdefault(slot, set()).add(reservoir_id)
+
+    plan = []
+    for start, end in collapse_runs(needed_by_slot):
+        reservoir_ids = set()
+        slot = start
+        while slot <= end:
+            reservoir_ids |= needed_by_slot[slot]
+            slot += HOUR
+        plan.append(FetchRun(start, end, frozenset(reservoir_ids)))
+
+    plan.sort(key=lambda run: run.end, reverse=True)
+    return plan
+
+
+def plan_from_csv(output_files, start_date=None, end_date=None, marks=None, **kwargs):
+    """
+    Quét file CSV của từng hồ và lập kế hoạch lấy bù
+
+    Args:
+        output_files (dict): {reservoir_id: đường dẫn file CSV}
+        start_date (datetime): Đầu khoảng kiểm tra (mặc định theo dữ liệu từng hồ)
+        end_date (datetime): Cuối khoảng kiểm tra (mặc định theo dữ liệu từng hồ)
+        marks (HighWaterMarks): Trạng thái có các giờ đã bỏ vì quan trắc lặp
+        **kwargs: Tham số thêm cho find_gaps (stale_after, recheck_stale_within)
+
+    Returns:
+        list: Danh sách FetchRun, khoảng mới nhất trước
+    """
+    gaps_by_reservoir = {}
+    for reservoir_id, csv_path in output_files.items():
+        collapsed = marks.collapsed_slots(reservoir_id) if marks is not None else frozenset()
+        gaps = find_gaps(load_stored_times(csv_path), start_date, end_date, collapsed=collapsed, **kwargs)
+        if gaps.missing or gaps.stale:
+            logger.info(f"Hồ {reservoir_id}: thiếu {len(gaps.missing)} giờ, số liệu cũ {len(gaps.stale)} giờ")
+        gaps_by_reservoir[reservoir_id] = gaps
+    return build_fetch_plan(gaps_by_reservoir)
+
+
+def execute_plan(scraper, plan, range_scraper=None, tracker=None):
+    """
+    Tải dữ liệu theo kế hoạch, chỉ giữ dòng của các hồ cần lấy bù trong từng khoảng
+
+    Args:
+        scraper (EVNMultiReservoirScraper): Scraper có đủ các hồ trong kế hoạch
+        plan (list): Danh sách FetchRun (thứ tự ưu tiên)
+        range_scraper (ParallelRangeScraper): Bộ tải song song (mặc định tải tuần tự)
+        tracker (ObservationTracker): Bỏ các bản ghi trùng quan trắc trước đó (None: giữ tất cả)
+
+    Returns:
+        pd.DataFrame: Dữ liệu lấy bù, hoặc None
+    """
+    range_scraper = range_scraper or ParallelRangeScraper(scraper, concurrency=1)
+
+    # Giờ cần tải -> ID các hồ cần giữ, theo thứ tự ưu tiên của kế hoạch
+    wanted = {}
+    for run in plan:
+        reservoir_ids = {reservoir_id for reservoir_id in run.reservoir_ids if reservoir_id in scraper.reservoirs}
+        for slot in hourly_range(run.start, run.end):
+            wanted.setdefault(slot, set()).update(reservoir_ids)
+
+    logger.info(f"Kế hoạch lấy bù: {len(plan)} khoảng, {len(wanted)} giờ")
+
+    all_data = ReadingBatch()
+    for slot, rows in range_scraper.iter_times(wanted):
+        rows = [row for row in rows if row.reservoir_id in wanted[slot]]
+        all_data.extend(tracker.filter(rows) if tracker is not None else rows)
+
+    return build_dataframe(all_data)
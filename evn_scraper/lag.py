@@ -0,0 +1,152 @@
+"""
+Phát hiện nguồn dữ liệu bị trễ và bỏ các quan trắc lặp lại
+
+Trang trả về số liệu mới nhất tại hoặc trước giờ yêu cầu, nên khi nguồn chưa đồng bộ
+nhiều giờ liên tiếp trả về cùng một 'Thời điểm' với cùng số liệu
+(ví dụ '15/07 01:00' cho cả giờ yêu cầu 01:00 và 02:00). Chỉ lưu lần đầu tiên
+"""
+
+import logging
+from datetime import datetime, timedelta
+
+from .metrics import get_metrics
+from .records import FLOAT_COLUMNS, INT_COLUMNS, parse_float, parse_int
+from .state import REQUESTED_COLUMN, read_last_row
+from .timeutil import parse_observed_time, parse_requested_time
+
+logger = logging.getLogger(__name__)
+
+
+def observation_lag(reading):
+    """
+    Args:
+        reading (Reading): Bản ghi
+
+    Returns:
+        timedelta: Độ trễ của số liệu so với giờ yêu cầu, hoặc None nếu không có thời điểm đo
+    """
+    if reading.observed_at is None:
+        return None
+    return reading.requested_at - reading.observed_at
+
+
+class ObservationTracker:
+    """Theo dõi quan trắc mới nhất của từng hồ để bỏ bản ghi lặp và ghi nhận giờ nguồn bị trễ"""
+
+    def __init__(self, lag_tolerance=timedelta(hours=1)):
+        """
+        Args:
+            lag_tolerance (timedelta): Số liệu cũ hơn giờ yêu cầu từ mức này trở lên là nguồn bị trễ
+        """
+        self.lag_tolerance = lag_tolerance
+        self.last = {}                  # reservoir_id -> (observed_at, số liệu)
+        self.latest_requested = {}      # reservoir_id -> giờ yêu cầu mới nhất đã xử lý
+        self.collapsed = {}             # reservoir_id -> các giờ yêu cầu đã bỏ vì lặp
+        self.lagging = {}               # giờ yêu cầu -> các reservoir_id bị trễ
+
+    def seed(self, reservoir_id, observed_at, values=None):
+        """
+        Đặt quan trắc đã lưu gần nhất của một hồ (ví dụ dòng cuối của file CSV)
+
+        Args:
+            reservoir_id (str): ID hồ chứa
+            observed_at (datetime): Thời điểm đo đã lưu
+            values (tuple): Số liệu đã lưu (None: chỉ so sánh thời điểm đo)
+        """
+        self.last[str(reservoir_id)] = (observed_at, values)
+
+    def seed_from_csv(self, reservoir_id, csv_path):
+        """
+        Đặt quan trắc gần nhất của một hồ từ dòng cuối của file CSV (chỉ đọc phần cuối file)
+
+        Args:
+            reservoir_id (str): ID hồ chứa
+            csv_path (str): File CSV kết quả của hồ
+        """
+        row = read_last_row(csv_path)
+        if row is not None:
+            self.seed_from_row(reservoir_id, row)
+
+    def seed_from_row(self, reservoir_id, row):
+        """
+        Đặt quan trắc gần nhất của một hồ từ một dòng dạng text (cột như file CSV)
+
+        Args:
+            reservoir_id (str): ID hồ chứa
+            row (dict): {tên cột: giá trị} của dòng đã lưu
+        """
+        observed_at = parse_observed_time(row.get('Thời điểm'), parse_requested_time(row[REQUESTED_COLUMN]))
+        if observed_at is None:
+            return
+        values = tuple([parse_float(row.get(column, '')) for column in FLOAT_COLUMNS]
+                       + [parse_int(row.get(column, '')) for column in INT_COLUMNS])
+        self.seed(reservoir_id, observed_at, values)
+
+    def accept(self, reading):
+        """
+        Ghi nhận một bản ghi
+
+        Args:
+            reading (Reading): Bản ghi vừa tải
+
+        Returns:
+            bool: True nếu cần lưu, False nếu trùng hoàn toàn với quan trắc trước đó của hồ
+        """
+        reservoir_id = reading.reservoir_id
+        latest = self.latest_requested.get(reservoir_id)
+        if latest is None or reading.requested_at > latest:
+            self.latest_requested[reservoir_id] = reading.requested_at
+
+        lag = observation_lag(reading)
+        if lag is not None and lag >= self.lag_tolerance:
+            self.lagging.setdefault(reading.requested_at, set()).add(reservoir_id)
+
+        if reading.observed_at is None:
+            return True
+
+        values = tuple(reading[5:])
+        previous = self.last.get(reservoir_id)
+        if previous is not None and previous[0] == reading.observed_at \
+                and previous[1] in (None, values):
+            self.collapsed.setdefault(reservoir_id, set()).add(reading.requested_at)
+            return False
+
+        # Tải lại giờ cũ (nguồn đã bắt kịp) không được làm lùi quan trắc mới nhất
+        if previous is None or reading.observed_at >= previous[0]:
+            self.last[reservoir_id] = (reading.observed_at, values)
+        self.collapsed.get(reservoir_id, set()).discard(reading.requested_at)
+        return True
+
+    def filter(self, readings):
+        """
+        Args:
+            readings (iterable): Các bản ghi theo thứ tự thời gian
+
+        Returns:
+            list: Các bản ghi cần lưu
+        """
+        readings = list(readings)
+        kept = [reading for reading in readings if self.accept(reading)]
+        get_metrics().inc('rows_deduped', len(readings) - len(kept))
+        return kept
+
+    @property
+    def skipped(self):
+        """Số bản ghi đã bỏ vì lặp"""
+        return sum(len(slots) for slots in self.collapsed.values())
+
+    def refetch_slots(self, now=None, within=timedelta(hours=6)):
+        """
+        Các giờ yêu cầu gần hiện tại mà nguồn bị trễ, nên tải lại sau ít phút
+
+        Giờ cũ hơn `within` không tải lại: nguồn đã không có số liệu thì tải lại cũng vậy
+
+        Args:
+            now (datetime): Thời điểm hiện tại (mặc định datetime.now())
+            within (timedelta): Chỉ xét các giờ yêu cầu trong khoảng này
+
+        Returns:
+            list: Các giờ yêu cầu (datetime) theo thứ tự thời gian
+        """
+        now = now or datetime.now()
+        return sorted(slot for slot in self.lagging if now - slot <= within)
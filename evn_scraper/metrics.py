@@ -0,0 +1,315 @@
+"""
+Đo thời gian từng bước và đếm sự kiện khi tải dữ liệu
+
+Các bước (histogram, giây):
+- driver_start: khởi động Chrome WebDriver
+- fetch: tải một trang (gồm cả chờ trang sẵn sàng với Selenium)
+- ready_wait: chờ bảng dữ liệu sẵn sàng trong browser
+- throttle: nghỉ theo giới hạn request/giây, bộ điều nhịp hoặc trước khi thử lại
+- parse: trích xuất bản ghi từ page source
+- write: ghi một lô vào CSV / Parquet / SQLite
+
+Bộ đếm: pages_fetched, cache_hits, not_modified (HTTP 304), fetch_errors, retries, empty_pages,
+rows_extracted, rows_deduped, rows_written, polls, polls_changed, pages_unchanged (chế độ follow)
+
+Xem kết quả bằng summary() / save_json() (tóm tắt JSON cuối lần chạy) hoặc
+MetricsServer (endpoint /metrics dạng text Prometheus, /health) để biết thời gian chờ,
+mạng hay phân tích HTML chiếm phần lớn.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Cận trên các bucket (giây), từ trang lấy trong cache đến trang chờ lâu
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+PREFIX = "evn_scraper"
+
+
+class Histogram:
+    """Histogram có bucket cố định (như Prometheus), ước lượng phân vị từ bucket"""
+
+    def __init__(self, buckets=BUCKETS):
+        """
+        Args:
+            buckets (tuple): Cận trên các bucket theo thứ tự tăng dần (bucket +Inf luôn có)
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        """Ghi nhận một giá trị"""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, fraction):
+        """
+        Ước lượng phân vị bằng nội suy tuyến tính trong bucket (như histogram_quantile)
+
+        Args:
+            fraction (float): Phân vị (0..1)
+
+        Returns:
+            float: Giá trị ước lượng, hoặc None nếu chưa có giá trị nào
+        """
+        if not self.count:
+            return None
+
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index else 0.0
+                # Không vượt quá giá trị lớn nhất đã thấy (bucket cuối không có cận trên)
+                upper = min(self.buckets[index], self.max) if index < len(self.buckets) else self.max
+                lower = min(lower, upper)
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.max
+
+    def merge(self, state):
+        """Cộng dồn histogram từ state() của tiến trình khác (cùng bucket)"""
+        self.counts = [a + b for a, b in zip(self.counts, state['counts'])]
+        self.count += state['count']
+        self.sum += state['sum']
+        self.max = max(self.max, state['max'])
+
+    def state(self):
+        return {'counts': list(self.counts), 'count': self.count, 'sum': self.sum, 'max': self.max}
+
+
+class Metrics:
+    """Bộ đếm và histogram dùng chung cho mọi luồng"""
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1):
+        """
+        Tăng bộ đếm
+
+        Args:
+            name (str): Tên bộ đếm (ví dụ 'pages_fetched')
+            value (int): Giá trị cộng thêm
+        """
+        if not value:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, seconds):
+        """
+        Ghi nhận thời gian của một bước
+
+        Args:
+            name (str): Tên bước (ví dụ 'fetch')
+            seconds (float): Thời gian (giây)
+        """
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name):
+        """Đo thời gian khối lệnh `with` vào histogram `name` (kể cả khi có lỗi)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def state(self):
+        """Trạng thái đầy đủ (picklable) để gộp từ tiến trình worker bằng merge()"""
+        with self._lock:
+            return {
+                'counters': dict(self.counters),
+                'histograms': {name: histogram.state() for name, histogram in self.histograms.items()},
+            }
+
+    def merge(self, state):
+        """
+        Cộng dồn số liệu của tiến trình khác
+
+        Args:
+            state (dict): Kết quả state() của tiến trình đó
+        """
+        with self._lock:
+            for name, value in state['counters'].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            for name, histogram_state in state['histograms'].items():
+                histogram = self.histograms.get(name)
+                if histogram is None:
+                    histogram = self.histograms[name] = Histogram()
+                histogram.merge(histogram_state)
+
+    def summary(self):
+        """
+        Tóm tắt dạng dict (ghi JSON)
+
+        Returns:
+            dict: {'elapsed_seconds', 'counters', 'stages': {bước: count, total/mean/p50/p95/max giây}}
+        """
+        with self._lock:
+            stages = {}
+            for name, histogram in sorted(self.histograms.items()):
+                stages[name] = {
+                    'count': histogram.count,
+                    'total_seconds': round(histogram.sum, 6),
+                    'mean_seconds': round(histogram.sum / histogram.count, 6) if histogram.count else None,
+                    'p50_seconds': _round(histogram.quantile(0.5)),
+                    'p95_seconds': _round(histogram.quantile(0.95)),
+                    'max_seconds': round(histogram.max, 6),
+                }
+            return {
+                'elapsed_seconds': round(time.time() - self.started_at, 3),
+                'counters': dict(sorted(self.counters.items())),
+                'stages': stages,
+            }
+
+    def save_json(self, path):
+        """Ghi summary() ra file JSON (ghi file tạm rồi đổi tên)"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def to_prometheus(self):
+        """
+        Returns:
+            str: Số liệu theo định dạng text của Prometheus
+        """
+        lines = []
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                metric = f"{PREFIX}_{name}_total"
+                lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+
+            for name, histogram in sorted(self.histograms.items()):
+                metric = f"{PREFIX}_{name}_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+                lines += [f"{metric}_sum {histogram.sum}", f"{metric}_count {histogram.count}"]
+        return "\n".join(lines) + "\n"
+
+    def log_summary(self):
+        """Ghi log một dòng cho mỗi bước và các bộ đếm"""
+        summary = self.summary()
+        for name, stage in summary['stages'].items():
+            logger.info(f"{name}: {stage['count']} lần, tổng {stage['total_seconds']:.2f} giây, "
+                        f"p50={_ms(stage['p50_seconds'])} ms, p95={_ms(stage['p95_seconds'])} ms")
+        if summary['counters']:
+            logger.info(", ".join(f"{name}={value}" for name, value in summary['counters'].items()))
+
+
+def _round(value):
+    return round(value, 6) if value is not None else None
+
+
+def _ms(seconds):
+    return f"{seconds * 1000:.1f}" if seconds is not None else "-"
+
+
+class MetricsServer:
+    """Endpoint HTTP /metrics (text Prometheus) và /health (JSON) chạy trong một luồng nền"""
+
+    def __init__(self, metrics=None, host="127.0.0.1", port=9108, health=None):
+        """
+        Args:
+            metrics (Metrics): Số liệu cần xuất (mặc định số liệu dùng chung)
+            host (str): Địa chỉ lắng nghe (mặc định chỉ máy cục bộ)
+            port (int): Cổng (0: chọn cổng trống)
+            health (callable): Hàm trả về dict trạng thái cho /health; 'status' == 'stale'
+                trả về HTTP 503 (None: chỉ báo tiến trình còn chạy)
+        """
+        self.metrics = metrics or get_metrics()
+        self.health = health
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?')[0]
+                if path == '/metrics':
+                    self._reply(200, 'text/plain; version=0.0.4; charset=utf-8', server.metrics.to_prometheus())
+                elif path == '/health':
+                    health = server.health() if server.health is not None else {'status': 'ok'}
+                    code = 503 if health.get('status') == 'stale' else 200
+                    self._reply(code, 'application/json', json.dumps(health, ensure_ascii=False))
+                else:
+                    self.send_error(404)
+
+            def _reply(self, code, content_type, text):
+                body = text.encode('utf-8')
+                self.send_response(code)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        """Chạy server trong luồng nền"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name='evn-metrics', daemon=True)
+        self._thread.start()
+        logger.info(f"Metrics: {self.url}")
+        return self
+
+    def stop(self):
+        """Dừng server"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+_metrics = Metrics()
+
+
+def get_metrics():
+    """Số liệu dùng chung của tiến trình"""
+    return _metrics
+
+
+def reset_metrics():
+    """Bắt đầu số liệu mới (ví dụ mỗi tiến trình worker, mỗi lần chạy)"""
+    global _metrics
+    _metrics = Metrics()
+    return _metrics
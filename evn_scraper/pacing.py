@@ -0,0 +1,75 @@
+"""
+Điều chỉnh nhịp gửi request theo tốc độ phản hồi của server EVN
+Không nghỉ cố định giữa các request, chỉ giãn nhịp khi server chậm đi hoặc báo lỗi
+"""
+
+import time
+import threading
+
+from .metrics import get_metrics
+
+
+class AdaptivePacer:
+    """Bộ điều nhịp: giữ khoảng nghỉ tối thiểu khi server nhanh, tăng dần khi server chậm"""
+
+    def __init__(self, min_delay=0.1, max_delay=30.0, slow_factor=2.0, smoothing=0.3,
+                 tolerance=0.25, baseline_decay=0.05):
+        """
+        Args:
+            min_delay (float): Khoảng nghỉ khi server phản hồi bình thường (giây)
+            max_delay (float): Khoảng nghỉ tối đa khi backoff (giây)
+            slow_factor (float): Server bị coi là chậm khi latency trung bình (EWMA) vượt
+                slow_factor lần mức nền cộng tolerance
+            smoothing (float): Hệ số làm mượt EWMA cho latency (0..1)
+            tolerance (float): Độ lệch tuyệt đối được bỏ qua (giây), để jitter của trang
+                nhanh không bị coi là chậm
+            baseline_decay (float): Tốc độ mức nền trôi lên theo latency trung bình hiện tại (0..1)
+        """
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.slow_factor = slow_factor
+        self.smoothing = smoothing
+        self.tolerance = tolerance
+        self.baseline_decay = baseline_decay
+
+        self.delay = min_delay
+        self.latency = None     # Latency trung bình (EWMA)
+        self.baseline = None    # Mức nền: latency trung bình tốt nhất gần đây
+        self._lock = threading.Lock()
+
+    def record(self, latency, ok=True):
+        """
+        Ghi nhận kết quả một request và điều chỉnh khoảng nghỉ
+
+        Args:
+            latency (float): Thời gian tải trang (giây)
+            ok (bool): Request thành công hay không
+        """
+        with self._lock:
+            if self.latency is None:
+                self.latency = latency
+            else:
+                self.latency += self.smoothing * (latency - self.latency)
+
+            if ok:
+                if self.baseline is None or self.latency < self.baseline:
+                    self.baseline = self.latency
+                else:
+                    # Mức nền không cố định ở lần nhanh nhất từ đầu lần chạy
+                    self.baseline += self.baseline_decay * (self.latency - self.baseline)
+
+            slow = self.baseline is not None \
+                and self.latency > self.slow_factor * self.baseline + self.tolerance
+            if not ok or slow:
+                # Backoff theo cấp số nhân
+                self.delay = min(self.max_delay, max(self.delay, self.min_delay, 0.5) * 2)
+            else:
+                # Server đã nhanh trở lại: giảm dần về mức tối thiểu
+                self.delay = max(self.min_delay, self.delay / 2)
+
+    def wait(self):
+        """Nghỉ theo khoảng nghỉ hiện tại trước request tiếp theo"""
+        delay = self.delay
+        if delay > 0:
+            time.sleep(delay)
+            get_metrics().observe('throttle', delay)
@@ -0,0 +1,235 @@
+"""
+Cache trên đĩa cho page source đã tải, khóa theo tham số td / hc của URL
+- Nội dung nén zstd, lưu theo mã băm nội dung (trang giống nhau chỉ lưu một lần)
+- Trang của giờ đã qua lâu (số liệu không còn thay đổi) được giữ mãi,
+  trang của giờ gần hiện tại hết hạn sau ttl
+- Vượt quá max_bytes thì xóa các trang lâu không dùng nhất (LRU)
+
+Cấu trúc thư mục:
+    <root>/index.db                     # td, hc -> mã băm, thời điểm tải / dùng gần nhất
+    <root>/objects/ab/abcdef....html.zst
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlsplit
+
+import zstandard
+
+from .timeutil import parse_requested_time
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    td TEXT NOT NULL,
+    hc TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (td, hc)
+);
+CREATE INDEX IF NOT EXISTS idx_pages_accessed_at ON pages (accessed_at);
+CREATE INDEX IF NOT EXISTS idx_pages_digest ON pages (digest);
+"""
+
+
+def cache_key(url):
+    """
+    Args:
+        url (str): URL trang dữ liệu (từ build_url)
+
+    Returns:
+        tuple: (td, hc), ví dụ ('15/07/2025 02:00', '26')
+    """
+    params = parse_qs(urlsplit(url).query)
+    return params.get('td', [''])[0].strip(), params.get('hc', [''])[0].strip()
+
+
+class PageCache:
+    """Cache page source theo (td, hc), dùng chung được giữa các luồng"""
+
+    def __init__(self, root="evn_page_cache", ttl=timedelta(hours=1), stable_after=timedelta(days=2),
+                 max_bytes=512 * 1024 * 1024, offline=False, level=10):
+        """
+        Args:
+            root (str): Thư mục cache
+            ttl (timedelta): Thời gian dùng lại trang của giờ gần hiện tại
+            stable_after (timedelta): Trang tải sau giờ yêu cầu từ mức này trở lên coi như
+                số liệu đã chốt, không bao giờ hết hạn
+            max_bytes (int): Dung lượng tối đa của các trang đã nén (None: không giới hạn)
+            offline (bool): Chỉ đọc từ cache, không tải trang (trang thiếu coi như lỗi)
+            level (int): Mức nén zstd
+        """
+        self.root = root
+        self.ttl = ttl
+        self.stable_after = stable_after
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.level = level
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.join(root, 'objects'), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(os.path.join(root, 'index.db'), check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, 'objects', digest[:2], f"{digest}.html.zst")
+
+    def _is_fresh(self, td, fetched_at, now):
+        """Trang còn dùng được: số liệu đã chốt, hoặc tải chưa quá ttl"""
+        if now - fetched_at < self.ttl.total_seconds():
+            return True
+        try:
+            requested = parse_requested_time(td)
+        except ValueError:
+            return False
+        return datetime.fromtimestamp(fetched_at) - requested >= self.stable_after
+
+    def _lookup(self, url):
+        """(digest) của trang còn hạn, hoặc None"""
+        td, hc = cache_key(url)
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT digest, fetched_at FROM pages WHERE td = ? AND hc = ?", (td, hc)).fetchone()
+            if row is None or not self._is_fresh(td, row[1], now):
+                return None
+            with self._connection:
+                self._connection.execute(
+                    "UPDATE pages SET accessed_at = ? WHERE td = ? AND hc = ?", (now, td, hc))
+        return row[0]
+
+    def contains(self, url):
+        """
+        Args:
+            url (str): URL trang dữ liệu
+
+        Returns:
+            bool: True nếu có trang còn hạn trong cache
+        """
+        digest = self._lookup(url)
+        return digest is not None and os.path.exists(self._object_path(digest))
+
+    def get(self, url):
+        """
+        Đọc page source từ cache
+
+        Args:
+            url (str): URL trang dữ liệu
+
+        Returns:
+            str: Page source, hoặc None nếu không có / đã hết hạn
+        """
+        digest = self._lookup(url)
+        if digest is not None:
+            try:
+                with open(self._object_path(digest), 'rb') as f:
+                    html = zstandard.ZstdDecompressor().decompress(f.read()).decode('utf-8')
+                self.hits += 1
+                return html
+            except (OSError, zstandard.ZstdError) as e:
+                logger.warning(f"Không đọc được trang trong cache {url}: {e}")
+
+        self.misses += 1
+        return None
+
+    def put(self, url, html):
+        """
+        Lưu page source vào cache
+
+        Args:
+            url (str): URL trang dữ liệu
+            html (str): Page source
+        """
+        body = html.encode('utf-8')
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+
+        if not os.path.exists(path):
+            compressed = zstandard.ZstdCompressor(level=self.level).compress(body)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(compressed)
+            os.replace(tmp_path, path)
+            size = len(compressed)
+        else:
+            size = os.path.getsize(path)
+
+        td, hc = cache_key(url)
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT INTO pages (td, hc, digest, size, fetched_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (td, hc) DO UPDATE SET digest = excluded.digest, size = excluded.size, "
+                "fetched_at = excluded.fetched_at, accessed_at = excluded.accessed_at",
+                (td, hc, digest, size, now, now))
+
+        if self.max_bytes:
+            self.evict()
+
+    def total_bytes(self):
+        """Dung lượng các trang đã nén (mỗi nội dung chỉ tính một lần)"""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM pages)").fetchone()
+        return row[0]
+
+    def evict(self):
+        """
+        Xóa các trang lâu không dùng nhất cho đến khi dung lượng không vượt max_bytes
+
+        Returns:
+            int: Số trang đã xóa
+        """
+        if not self.max_bytes or self.total_bytes() <= self.max_bytes:
+            return 0
+
+        removed = 0
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT td, hc, digest FROM pages ORDER BY accessed_at").fetchall()
+            total = self._connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM pages)").fetchone()[0]
+
+            with self._connection:
+                for td, hc, digest in rows:
+                    if total <= self.max_bytes:
+                        break
+                    self._connection.execute("DELETE FROM pages WHERE td = ? AND hc = ?", (td, hc))
+                    removed += 1
+
+                    # Chỉ xóa file khi không còn khóa nào trỏ tới nội dung này
+                    still_used = self._connection.execute(
+                        "SELECT 1 FROM pages WHERE digest = ? LIMIT 1", (digest,)).fetchone()
+                    if still_used is None:
+                        path = self._object_path(digest)
+                        try:
+                            total -= os.path.getsize(path)
+                            os.remove(path)
+                        except OSError:
+                            pass
+
+        logger.info(f"Đã xóa {removed} trang khỏi cache {self.root}")
+        return removed
+
+    def close(self):
+        """Đóng file index"""
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
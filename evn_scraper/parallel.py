@@ -0,0 +1,253 @@
+"""
+Lấy dữ liệu nhiều thời điểm song song bằng thread pool
+Giới hạn tổng số request/giây tới server EVN và giữ thứ tự kết quả theo thời gian
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import pandas as pd
+
+from .fetchers import create_fetcher
+from .metrics import get_metrics
+from .records import ReadingBatch
+from .scraper import build_dataframe, hourly_range
+from .state import REQUESTED_COLUMN
+from .timeutil import parse_requested_time
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Giới hạn số request/giây, dùng chung cho mọi luồng"""
+
+    def __init__(self, requests_per_second):
+        """
+        Args:
+            requests_per_second (float): Số request tối đa mỗi giây (None hoặc 0: không giới hạn)
+        """
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Chờ đến lượt được gửi request tiếp theo"""
+        if not self.interval:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+            get_metrics().observe('throttle', delay)
+
+
+class ParallelRangeScraper:
+    """Chạy scrape_single_time cho một khoảng thời gian bằng nhiều luồng"""
+
+    def __init__(self, scraper, concurrency=4, requests_per_second=2.0, fetcher_factory=None,
+                 max_pending=None):
+        """
+        Args:
+            scraper (EVNMultiReservoirScraper): Scraper cung cấp URL và cách trích xuất dữ liệu
+            concurrency (int): Số luồng tải trang đồng thời
+            requests_per_second (float): Giới hạn tổng số request/giây tới server
+            fetcher_factory (callable): Hàm tạo backend tải trang cho mỗi luồng
+                (mặc định tạo backend giống scraper; nếu backend của scraper
+                dùng chung được giữa các luồng, ví dụ BrowserPool, thì dùng luôn backend đó)
+            max_pending (int): Số thời điểm tối đa đang tải hoặc chờ được nhận kết quả
+                (mặc định gấp đôi concurrency)
+        """
+        self.scraper = scraper
+        self.concurrency = max(1, concurrency)
+        self.max_pending = max(self.concurrency, max_pending or 2 * self.concurrency)
+        self.requests_per_second = requests_per_second
+        self.rate_limiter = RateLimiter(requests_per_second)
+        self.shared_fetcher = None
+        if fetcher_factory is None and getattr(scraper.fetcher, 'thread_safe', False):
+            self.shared_fetcher = scraper.fetcher
+        self.fetcher_factory = fetcher_factory or (
+            lambda: create_fetcher(scraper.backend, headless=scraper.headless, lean=scraper.lean))
+
+        self._local = threading.local()
+        self._fetchers = []
+        self._fetchers_lock = threading.Lock()
+
+    def _get_fetcher(self):
+        """Mỗi luồng dùng một backend riêng (session HTTP / WebDriver không chia sẻ giữa các luồng)"""
+        if self.shared_fetcher is not None:
+            return self.shared_fetcher
+
+        fetcher = getattr(self._local, 'fetcher', None)
+        if fetcher is None:
+            fetcher = self.fetcher_factory()
+            fetcher.open()
+            self._local.fetcher = fetcher
+            with self._fetchers_lock:
+                self._fetchers.append(fetcher)
+        return fetcher
+
+    def _scrape(self, date_time, fresh=False):
+        """Tải và trích xuất dữ liệu cho một thời điểm (chạy trong luồng worker)"""
+        if not fresh and self.scraper.is_cached(date_time):
+            # Trang có sẵn trong cache: không chờ, không cần khởi tạo backend cho luồng
+            return self.scraper.scrape_single_time(date_time)
+
+        self.rate_limiter.wait()
+        self.scraper.pacer.wait()
+        return self.scraper.scrape_single_time(date_time, fetcher=self._get_fetcher(), fresh=fresh)
+
+    def close(self):
+        """Đóng toàn bộ backend đã tạo"""
+        with self._fetchers_lock:
+            fetchers, self._fetchers = self._fetchers, []
+        if self.shared_fetcher is not None:
+            fetchers.append(self.shared_fetcher)
+        for fetcher in fetchers:
+            fetcher.close()
+
+    def iter_times(self, times, fresh=False):
+        """
+        Tải song song các thời điểm cho trước và trả về kết quả theo đúng thứ tự đó
+
+        Chỉ gửi trước tối đa max_pending thời điểm so với nơi nhận kết quả: nơi nhận xử lý
+        chậm (ghi file, ghi database) thì các luồng tải cũng chờ, bộ nhớ không tăng theo
+        độ dài khoảng thời gian
+
+        Args:
+            times (iterable): Các thời điểm cần tải (datetime)
+            fresh (bool): Luôn tải trang, không dùng trang trong cache
+
+        Yields:
+            tuple: (datetime, list dữ liệu các hồ) theo thứ tự của times
+        """
+        hours = list(times)
+        logger.info(f"Tải {len(hours)} thời điểm với {self.concurrency} luồng, "
+                    f"giới hạn {self.requests_per_second or 'không giới hạn'} request/giây")
+
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='evn-fetch')
+        pending = deque()
+        try:
+            queued = iter(hours)
+            for date_time in islice(queued, self.max_pending):
+                pending.append((date_time, executor.submit(self._scrape, date_time, fresh)))
+
+            done = 0
+            while pending:
+                date_time, future = pending.popleft()
+                rows = future.result()
+                # Mỗi kết quả được nhận thì gửi thêm một thời điểm
+                for next_time in islice(queued, 1):
+                    pending.append((next_time, executor.submit(self._scrape, next_time, fresh)))
+
+                done += 1
+                if done % 24 == 0 or done == len(hours):
+                    logger.info(f"Tiến độ: {done}/{len(hours)} thời điểm")
+                yield date_time, rows
+        finally:
+            for _, future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+            self.close()
+
+    def iter_results(self, start_date, end_date):
+        """
+        Tải song song và trả về kết quả theo thứ tự thời gian
+
+        Args:
+            start_date (datetime): Thời điểm bắt đầu
+            end_date (datetime): Thời điểm kết thúc (bao gồm)
+
+        Yields:
+            tuple: (datetime, list dữ liệu các hồ) theo thứ tự thời gian
+        """
+        return self.iter_times(hourly_range(start_date, end_date))
+
+    def iter_readings(self, times, tracker=None, checkpoint=None, fresh=False):
+        """
+        Tải song song và trả về bản ghi cần lưu của từng thời điểm ngay khi có kết quả
+
+        Args:
+            times (iterable): Các thời điểm cần tải (datetime)
+            tracker (ObservationTracker): Bỏ các bản ghi trùng quan trắc trước đó (None: giữ tất cả)
+            checkpoint (Checkpoint): Bỏ qua các giờ đã tải xong ở lần chạy trước (None: tải tất cả)
+            fresh (bool): Luôn tải trang, không dùng trang trong cache
+
+        Yields:
+            tuple: (datetime, list Reading cần lưu) theo thứ tự của times
+        """
+        times = list(times)
+        pending = times
+        if checkpoint is not None:
+            pending = [date_time for date_time in times if date_time not in checkpoint.completed]
+            if len(pending) < len(times):
+                logger.info(f"Bỏ qua {len(times) - len(pending)} giờ đã tải trong checkpoint")
+
+        for date_time, rows in self.iter_times(pending, fresh):
+            yield date_time, tracker.filter(rows) if tracker is not None else rows
+
+        if self.scraper.failed_times:
+            logger.warning(f"{len(self.scraper.failed_times)} thời điểm tải lỗi sau khi đã thử lại")
+        if tracker is not None and tracker.skipped:
+            logger.info(f"Bỏ {tracker.skipped} bản ghi trùng quan trắc trước đó")
+
+    def scrape_times(self, times, tracker=None, checkpoint=None, fresh=False):
+        """
+        Lấy dữ liệu cho các thời điểm cho trước, tải song song
+
+        Args:
+            times (iterable): Các thời điểm cần tải (datetime)
+            tracker (ObservationTracker): Bỏ các bản ghi trùng quan trắc trước đó (None: giữ tất cả)
+            checkpoint (Checkpoint): Bỏ qua các giờ đã tải xong ở lần chạy trước và ghi lại
+                các giờ vừa tải (None: không dùng checkpoint)
+            fresh (bool): Luôn tải trang, không dùng trang trong cache (ví dụ tải lại giờ nguồn bị trễ)
+
+        Returns:
+            pd.DataFrame: Dữ liệu kết hợp theo thứ tự của times, hoặc None
+        """
+        times = list(times)
+        done = set(checkpoint.completed) if checkpoint is not None else set()
+
+        all_data = ReadingBatch()
+        try:
+            for date_time, rows in self.iter_readings(times, tracker, checkpoint, fresh):
+                all_data.extend(rows)
+                # Giờ tải lỗi (đã thử lại hết) không được coi là xong, lần chạy sau tải lại
+                if checkpoint is not None and date_time not in self.scraper.failed_times:
+                    checkpoint.add(date_time, rows)
+        finally:
+            if checkpoint is not None:
+                checkpoint.flush()
+
+        df = build_dataframe(all_data)
+        previous = checkpoint.read_rows(done.intersection(times)) if checkpoint is not None else None
+        if previous is None:
+            return df
+        if df is None:
+            return previous
+        df = pd.concat([previous, df], ignore_index=True)
+        order = df[REQUESTED_COLUMN].map(parse_requested_time).argsort(kind='stable')
+        return df.iloc[order].reset_index(drop=True)
+
+    def scrape_date_range(self, start_date, end_date, tracker=None, checkpoint=None):
+        """
+        Lấy dữ liệu theo giờ cho một khoảng thời gian, tải song song
+
+        Args:
+            start_date (datetime): Ngày bắt đầu
+            end_date (datetime): Ngày kết thúc
+            tracker (ObservationTracker): Bỏ các bản ghi trùng quan trắc trước đó (None: giữ tất cả)
+            checkpoint (Checkpoint): Tiếp tục từ các giờ đã tải ở lần chạy trước (None: không dùng)
+
+        Returns:
+            pd.DataFrame: Dữ liệu kết hợp theo thứ tự thời gian, hoặc None
+        """
+        return self.scrape_times(hourly_range(start_date, end_date), tracker, checkpoint)
@@ -0,0 +1,168 @@
+"""
+Lưu dữ liệu mực nước dạng Parquet có kiểu dữ liệu, phân vùng theo hồ và tháng
+Đọc lại có lọc theo hồ / khoảng thời gian ngay ở tầng file (predicate pushdown)
+
+Cấu trúc thư mục:
+    <root>/reservoir_id=26/month=2025-11/part-<uuid>-0.parquet
+"""
+
+import os
+import uuid
+import logging
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from .records import FLOAT_COLUMNS, INT_COLUMNS, TIMEZONE, to_typed_frame
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = pa.schema(
+    [
+        ('reservoir_id', pa.string()),
+        ('month', pa.string()),
+        ('reservoir_name', pa.string()),
+        ('observed_at', pa.timestamp('s', tz=TIMEZONE)),
+        ('requested_at', pa.timestamp('s', tz=TIMEZONE)),
+    ]
+    + [(column, pa.float32()) for column in FLOAT_COLUMNS.values()]
+    + [(column, pa.int16()) for column in INT_COLUMNS.values()]
+)
+
+PARTITIONING = ds.partitioning(
+    pa.schema([('reservoir_id', pa.string()), ('month', pa.string())]), flavor='hive')
+
+# Giữ kiểu Int16 có giá trị rỗng khi đọc lại (mặc định pyarrow trả về float64 nếu có ô trống)
+_PANDAS_TYPES = {pa.int16(): pd.Int16Dtype()}
+
+
+class ParquetStore:
+    """Kho dữ liệu Parquet phân vùng theo reservoir_id / month"""
+
+    def __init__(self, root="evn_parquet"):
+        """
+        Args:
+            root (str): Thư mục gốc của kho
+        """
+        self.root = root
+
+    def write(self, df):
+        """
+        Ghi thêm dữ liệu vào kho (mỗi lần ghi tạo file mới trong các phân vùng liên quan)
+
+        Args:
+            df (pd.DataFrame): Dữ liệu dạng text (OUTPUT_COLUMNS) hoặc đã có kiểu (SCHEMA)
+
+        Returns:
+            int: Số dòng đã ghi
+        """
+        if df is None or df.empty:
+            return 0
+
+        typed = df if 'requested_at' in df.columns else to_typed_frame(df)
+        table = pa.Table.from_pandas(typed, schema=SCHEMA, preserve_index=False)
+
+        ds.write_dataset(
+            table,
+            self.root,
+            format='parquet',
+            partitioning=PARTITIONING,
+            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+            existing_data_behavior='overwrite_or_ignore',
+        )
+        logger.info(f"Đã ghi {table.num_rows} dòng vào {self.root}")
+        return table.num_rows
+
+    def _dataset(self):
+        return ds.dataset(self.root, format='parquet', partitioning=PARTITIONING, schema=SCHEMA)
+
+    @staticmethod
+    def _filter(reservoir_ids=None, start=None, end=None, time_column='observed_at'):
+        """
+        Biểu thức lọc: phân vùng (reservoir_id, month) và thống kê row group (thời gian)
+
+        Phân vùng month theo observed_at (hoặc requested_at nếu không có thời điểm đo), nên khi lọc
+        theo requested_at khoảng tháng được nới thêm một tháng mỗi bên (quan trắc 31/07 23:00
+        của giờ yêu cầu 01/08 00:00 nằm ở phân vùng tháng 7)
+        """
+        expression = None
+        margin = pd.DateOffset(months=1 if time_column != 'observed_at' else 0)
+
+        def add(condition):
+            nonlocal expression
+            expression = condition if expression is None else expression & condition
+
+        if reservoir_ids is not None:
+            add(ds.field('reservoir_id').isin([str(reservoir_id) for reservoir_id in reservoir_ids]))
+        if start is not None:
+            start = pd.Timestamp(start)
+            start = start.tz_localize(TIMEZONE) if start.tzinfo is None else start
+            add(ds.field('month') >= (start - margin).strftime('%Y-%m'))
+            add(ds.field(time_column) >= pa.scalar(start.to_pydatetime(), pa.timestamp('s', tz=TIMEZONE)))
+        if end is not None:
+            end = pd.Timestamp(end)
+            end = end.tz_localize(TIMEZONE) if end.tzinfo is None else end
+            add(ds.field('month') <= (end + margin).strftime('%Y-%m'))
+            add(ds.field(time_column) <= pa.scalar(end.to_pydatetime(), pa.timestamp('s', tz=TIMEZONE)))
+        return expression
+
+    def read(self, reservoir_ids=None, start=None, end=None, columns=None, time_column='observed_at'):
+        """
+        Đọc dữ liệu, chỉ mở các file/row group khớp điều kiện
+
+        Args:
+            reservoir_ids (iterable): ID các hồ cần đọc (mặc định: tất cả)
+            start (datetime): Thời điểm bắt đầu (bao gồm)
+            end (datetime): Thời điểm kết thúc (bao gồm)
+            columns (list): Các cột cần đọc (mặc định: tất cả)
+            time_column (str): Cột thời gian dùng để lọc ('observed_at' hoặc 'requested_at')
+
+        Returns:
+            pd.DataFrame: Dữ liệu có kiểu, sắp theo hồ và thời gian
+        """
+        if not os.path.isdir(self.root):
+            return pa.Table.from_pylist([], schema=SCHEMA).to_pandas()
+
+        table = self._dataset().to_table(
+            columns=columns,
+            filter=self._filter(reservoir_ids, start, end, time_column),
+        )
+        df = table.to_pandas(types_mapper=_PANDAS_TYPES.get)
+        sort_columns = [column for column in ('reservoir_id', time_column) if column in df.columns]
+        if sort_columns:
+            df = df.sort_values(sort_columns, ignore_index=True)
+        return df
+
+    def compact(self):
+        """
+        Gộp các file nhỏ của mỗi phân vùng thành một file (sau nhiều lần ghi incremental)
+
+        Returns:
+            int: Số phân vùng đã gộp
+        """
+        if not os.path.isdir(self.root):
+            return 0
+
+        compacted = 0
+        for reservoir_dir in sorted(os.listdir(self.root)):
+            reservoir_path = os.path.join(self.root, reservoir_dir)
+            if not os.path.isdir(reservoir_path):
+                continue
+            for month_dir in sorted(os.listdir(reservoir_path)):
+                month_path = os.path.join(reservoir_path, month_dir)
+                files = sorted(name for name in os.listdir(month_path) if name.endswith('.parquet'))
+                if len(files) <= 1:
+                    continue
+
+                table = pq.read_table([os.path.join(month_path, name) for name in files])
+                table = table.sort_by([('observed_at', 'ascending')])
+                target = os.path.join(month_path, f"part-{uuid.uuid4().hex}-0.parquet")
+                pq.write_table(table, target)
+                for name in files:
+                    os.remove(os.path.join(month_path, name))
+                compacted += 1
+
+        logger.info(f"Đã gộp {compacted} phân vùng trong {self.root}")
+        return compacted
@@ -0,0 +1,161 @@
+"""
+Phân tích HTML của trang PageHoChuaThuyDienEmbedEVN.aspx
+Đọc bảng tblgridtd một lần bằng lxml (parser viết bằng C), không cần gọi WebDriver cho từng ô
+"""
+
+import re
+from typing import NamedTuple
+
+from lxml import etree
+
+_TABLE_RE = re.compile(r'<table[^>]*class="[^"]*\btblgridtd\b')
+_SYNC_PREFIX = 'Đồng bộ lúc:'
+_RESERVOIR_SELECT_RE = re.compile(r'<select[^>]*id="UCViewHoChuaThuyDienPublic1_ddlHoChua"')
+
+_HTML_PARSER = etree.HTMLParser(encoding='utf-8', remove_comments=True)
+
+
+class ReservoirRow(NamedTuple):
+    """Một hàng dữ liệu của bảng tblgridtd (giá trị giữ nguyên dạng text)"""
+    region: str         # Vùng miền (hàng tralter phía trên)
+    name: str           # Tên hồ
+    synced_at: str      # 'Đồng bộ lúc', ví dụ '12:13 04/12'
+    observed_at: str    # 'Thời điểm', ví dụ '04/12 11:00'
+    htl: str
+    hdbt: str
+    hc: str
+    qve: str
+    qx_total: str
+    qxt: str
+    qxm: str
+    ncxs: str
+    ncxm: str
+
+    def to_dict(self):
+        """
+        Chuyển sang dict với tên cột như các file CSV hiện có
+
+        Returns:
+            dict: {'Tên hồ': ..., 'Thời điểm': ..., ..., 'Ncxm': ...}
+        """
+        return {
+            'Tên hồ': self.name,
+            'Thời điểm': self.observed_at,
+            'Htl (m)': self.htl,
+            'Hdbt (m)': self.hdbt,
+            'Hc (m)': self.hc,
+            'Qve (m3/s)': self.qve,
+            'ΣQx (m3/s)': self.qx_total,
+            'Qxt (m3/s)': self.qxt,
+            'Qxm (m3/s)': self.qxm,
+            'Ncxs': self.ncxs,
+            'Ncxm': self.ncxm,
+        }
+
+
+def _text(element):
+    """Text của một element, gộp khoảng trắng"""
+    if not len(element):
+        # Ô số liệu chỉ có text, không có thẻ con
+        return (element.text or '').strip()
+    return ' '.join(''.join(element.itertext()).split())
+
+
+def _table_markup(html):
+    """Cắt riêng đoạn <table class="tblgridtd">...</table> (bỏ qua __VIEWSTATE, script...)"""
+    match = _TABLE_RE.search(html)
+    if match is None:
+        return None
+    end = html.find('</table>', match.start())
+    return html[match.start():end + len('</table>') if end != -1 else len(html)]
+
+
+def parse_table(html):
+    """
+    Đọc toàn bộ các hàng dữ liệu trong bảng tblgridtd
+
+    Args:
+        html (str): Page source của trang dữ liệu
+
+    Returns:
+        list: Danh sách ReservoirRow theo thứ tự trên trang (rỗng nếu không có bảng)
+    """
+    markup = _table_markup(html)
+    if markup is None:
+        return []
+
+    root = etree.fromstring(markup.encode('utf-8'), _HTML_PARSER)
+    if root is None:
+        return []
+
+    rows = []
+    region = ''
+    for tr in root.iter('tr'):
+        cells = tr.findall('td')
+
+        # Hàng vùng miền: <tr class='tralter'><td colspan='11'><strong>Tây Nguyên</strong>
+        # (hàng <strong></strong> rỗng chỉ là dòng ngăn cách, hồ phía dưới vẫn thuộc vùng trước đó)
+        if len(cells) == 1:
+            region = _text(cells[0]) or region
+            continue
+
+        # Bỏ qua hàng chú thích ký hiệu trong thead
+        if len(cells) < 11:
+            continue
+
+        name_cell = cells[0]
+        name = name_cell.findtext('b') or ''
+        small = name_cell.find('small')
+        synced_at = _text(small) if small is not None else ''
+        if synced_at.startswith(_SYNC_PREFIX):
+            synced_at = synced_at[len(_SYNC_PREFIX):].strip()
+
+        rows.append(ReservoirRow(region, name.strip(), synced_at,
+                                 *(_text(cell) for cell in cells[1:11])))
+
+    return rows
+
+
+def parse_reservoir_options(html):
+    """
+    Đọc danh sách hồ trong dropdown ddlHoChua
+
+    Args:
+        html (str): Page source của trang dữ liệu
+
+    Returns:
+        list: Các tuple (ID hồ, tên hồ, nhãn optgroup hoặc '') theo thứ tự trên trang
+            (rỗng nếu không có dropdown)
+    """
+    match = _RESERVOIR_SELECT_RE.search(html)
+    if match is None:
+        return []
+    end = html.find('</select>', match.start())
+    markup = html[match.start():end + len('</select>') if end != -1 else len(html)]
+
+    root = etree.fromstring(markup.encode('utf-8'), _HTML_PARSER)
+    if root is None:
+        return []
+
+    options = []
+    for option in root.iter('option'):
+        reservoir_id = (option.get('value') or '').strip()
+        if not reservoir_id:
+            continue
+        parent = option.getparent()
+        group = (parent.get('label') or '').strip() if parent is not None and parent.tag == 'optgroup' else ''
+        options.append((reservoir_id, _text(option), group))
+    return options
+
+
+def has_data_table(html):
+    """
+    Kiểm tra page source có chứa bảng dữ liệu hay không
+
+    Args:
+        html (str): Page source
+
+    Returns:
+        bool: True nếu có bảng tblgridtd
+    """
+    return bool(html) and _TABLE_RE.search(html) is not None
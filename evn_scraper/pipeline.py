@@ -0,0 +1,186 @@
+"""
+Ghi kết quả theo lô ngay trong lúc tải
+
+    iter_date_range / iter_readings  ->  iter_batches  ->  ResultWriter.write
+
+Mỗi bước nhận dữ liệu từ bước trước qua generator nên chỉ giữ trong bộ nhớ một lô
+(batch_hours giờ yêu cầu); bước ghi chậm thì bước tải cũng dừng chờ. Backfill nhiều năm
+dùng bộ nhớ không đổi và dữ liệu xuất hiện trong file CSV / database sau mỗi lô.
+"""
+
+import os
+import logging
+
+import pandas as pd
+
+from .metrics import get_metrics
+from .records import ReadingBatch
+from .state import ID_COLUMN, REQUESTED_COLUMN
+from .timeutil import REQUESTED_FORMAT
+
+logger = logging.getLogger(__name__)
+
+
+def iter_batches(results, batch_hours=168):
+    """
+    Gom kết quả từng giờ thành các lô
+
+    Args:
+        results (iterable): Các cặp (datetime, list Reading) theo thứ tự thời gian
+        batch_hours (int): Số giờ yêu cầu mỗi lô
+
+    Yields:
+        tuple: (list các giờ trong lô, pd.DataFrame dạng text hoặc None nếu lô không có bản ghi)
+    """
+    slots, batch = [], ReadingBatch()
+    for date_time, rows in results:
+        slots.append(date_time)
+        batch.extend(rows)
+        if len(slots) >= batch_hours:
+            yield slots, batch.to_text_frame() if len(batch) else None
+            slots, batch = [], ReadingBatch()
+
+    if slots:
+        yield slots, batch.to_text_frame() if len(batch) else None
+
+
+def _rows_of(df, reservoir_id, name):
+    """
+    Các dòng của một hồ: theo ID hồ (tên trên trang có thể đổi), dòng không có ID
+    (ví dụ đọc từ checkpoint cũ) thì theo tên
+
+    Returns:
+        pd.Series: Mask bool theo df.index
+    """
+    by_name = df['Tên hồ'] == name
+    if ID_COLUMN not in df.columns:
+        return by_name
+    ids = df[ID_COLUMN].fillna('').astype(str)
+    return (ids == str(reservoir_id)) | ((ids == '') & by_name)
+
+
+class ResultWriter:
+    """Ghi từng lô dữ liệu vào file CSV của từng hồ, Excel theo tháng, kho Parquet và SQLite"""
+
+    def __init__(self, output_files, reservoirs, marks=None, select_new=False, parquet_dir=None, sqlite_db=None,
+                 excel=False):
+        """
+        Args:
+            output_files (dict): {ID hồ: file CSV kết quả}
+            reservoirs (dict): {ID hồ: tên hồ}
+            marks (HighWaterMarks): Dời mốc của hồ theo dữ liệu đã ghi (None: không dùng mốc)
+            select_new (bool): Chỉ ghi các dòng sau mốc của hồ (chế độ incremental)
+            parquet_dir (str): Kho Parquet (None: không ghi)
+            sqlite_db (str): File SQLite (None: không ghi)
+            excel (bool): Ghi thêm vào Excel theo tháng cạnh file CSV (<tên file CSV>_YYYY-MM.xlsx)
+        """
+        self.output_files = output_files
+        self.reservoirs = reservoirs
+        self.marks = marks
+        self.select_new = select_new
+        self.parquet_dir = parquet_dir
+        self.sqlite_db = sqlite_db
+        self.excel = excel
+
+        self.rows = {reservoir_id: 0 for reservoir_id in reservoirs}
+        self.parquet_rows = 0
+        self.sqlite_rows = 0
+
+        self._parquet = None
+        self._sqlite = None
+        self._existing = {}     # reservoir_id -> 'Thời điểm yêu cầu' đã có trong CSV, không ghi lại
+
+    def skip_existing(self, slots):
+        """
+        Không ghi lại các dòng đã có trong file CSV của các giờ cho trước
+        (ví dụ giờ bị ngắt giữa lúc ghi ở lần chạy trước, xem Checkpoint.unconfirmed)
+
+        Args:
+            slots (iterable): Các giờ yêu cầu (datetime)
+        """
+        wanted = {slot.strftime(REQUESTED_FORMAT) for slot in slots}
+        if not wanted:
+            return
+        for reservoir_id, output_file in self.output_files.items():
+            if not os.path.exists(output_file):
+                continue
+            requested = pd.read_csv(output_file, usecols=[REQUESTED_COLUMN], dtype=str,
+                                    keep_default_na=False, encoding='utf-8-sig')[REQUESTED_COLUMN]
+            existing = set(requested[requested.isin(wanted)])
+            if existing:
+                self._existing.setdefault(reservoir_id, set()).update(existing)
+                logger.info(f"{self.reservoirs[reservoir_id]}: bỏ {len(existing)} giờ đã có trong {output_file}")
+
+    def write(self, df, select_new=None):
+        """
+        Ghi một lô dữ liệu
+
+        Args:
+            df (pd.DataFrame): Dữ liệu dạng text (OUTPUT_COLUMNS, ID_COLUMN) của mọi hồ, có thể None
+            select_new (bool): Ghi đè self.select_new cho lô này (ví dụ khi tải lại giờ cũ)
+
+        Returns:
+            int: Số dòng đã ghi vào file CSV
+        """
+        if df is None or df.empty:
+            return 0
+        if select_new is None:
+            select_new = self.select_new
+
+        with get_metrics().timer('write'):
+            written = self._write(df, select_new)
+
+        count = sum(len(df_reservoir) for df_reservoir in written)
+        get_metrics().inc('rows_written', count)
+        return count
+
+    def _write(self, df, select_new):
+        """Ghi một lô vào các đích, trả về list DataFrame đã ghi vào CSV của từng hồ"""
+        written = []
+        for reservoir_id, name in self.reservoirs.items():
+            df_reservoir = df[_rows_of(df, reservoir_id, name)]
+            if select_new and self.marks is not None:
+                df_reservoir = self.marks.select_new(reservoir_id, df_reservoir)
+            existing = self._existing.get(reservoir_id)
+            if existing:
+                df_reservoir = df_reservoir[~df_reservoir[REQUESTED_COLUMN].isin(existing)]
+            if df_reservoir.empty:
+                continue
+
+            # Lưu vào CSV (append mode), cột như file CSV hiện có
+            output_file = self.output_files[reservoir_id]
+            df_output = df_reservoir.drop(columns=ID_COLUMN, errors='ignore')
+            if os.path.exists(output_file):
+                df_output.to_csv(output_file, mode='a', header=False, index=False, encoding='utf-8-sig')
+            else:
+                df_output.to_csv(output_file, index=False, encoding='utf-8-sig')
+
+            if self.excel:
+                from .excel_export import append_monthly_excel
+                append_monthly_excel(df_output, os.path.splitext(output_file)[0])
+
+            written.append(df_reservoir)
+            self.rows[reservoir_id] += len(df_reservoir)
+            if self.marks is not None:
+                self.marks.advance_from(reservoir_id, df_reservoir)
+
+        if self.parquet_dir and written:
+            if self._parquet is None:
+                from .parquet_store import ParquetStore
+                self._parquet = ParquetStore(self.parquet_dir)
+            self.parquet_rows += self._parquet.write(pd.concat(written, ignore_index=True))
+
+        if self.sqlite_db:
+            # Ghi toàn bộ dữ liệu vừa tải: dòng đã có được cập nhật, không tạo dòng trùng
+            if self._sqlite is None:
+                from .sqlite_store import SQLiteStore
+                self._sqlite = SQLiteStore(self.sqlite_db)
+            self.sqlite_rows += self._sqlite.upsert(df)
+
+        return written
+
+    def close(self):
+        """Đóng kết nối SQLite"""
+        if self._sqlite is not None:
+            self._sqlite.close()
+            self._sqlite = None
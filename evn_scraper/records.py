@@ -0,0 +1,312 @@
+"""
+Bản ghi mực nước có kiểu dữ liệu
+- Reading: một hàng đã đọc số một lần (float/int/None, datetime đủ năm)
+- ReadingBatch: gom nhiều Reading theo cột (array) để tạo DataFrame mà không giữ list dict
+- to_typed_frame: chuyển DataFrame dạng text (cột như file CSV) sang DataFrame có kiểu
+Dùng chung cho các kho lưu trữ (Parquet, SQLite)
+"""
+
+import logging
+from array import array
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from .catalog import get_catalog
+from .state import ID_COLUMN, REQUESTED_COLUMN
+from .timeutil import REQUESTED_FORMAT, parse_observed_time, parse_synced_time
+
+logger = logging.getLogger(__name__)
+
+TIMEZONE = 'Asia/Ho_Chi_Minh'
+
+# Tên cột CSV -> tên cột có kiểu
+FLOAT_COLUMNS = {
+    'Htl (m)': 'htl',
+    'Hdbt (m)': 'hdbt',
+    'Hc (m)': 'hc',
+    'Qve (m3/s)': 'qve',
+    'ΣQx (m3/s)': 'qx_total',
+    'Qxt (m3/s)': 'qxt',
+    'Qxm (m3/s)': 'qxm',
+}
+INT_COLUMNS = {
+    'Ncxs': 'ncxs',
+    'Ncxm': 'ncxm',
+}
+
+OBSERVED_FORMAT = '%d/%m %H:%M'
+
+_EPOCH = datetime(1970, 1, 1)
+_MISSING_TIME = -2 ** 63
+
+
+def reservoir_id_for(name):
+    """
+    Args:
+        name (str): Tên hồ (theo bảng số liệu hoặc danh mục)
+
+    Returns:
+        str: ID hồ chứa, hoặc None nếu không có trong danh mục
+    """
+    return get_catalog().id_for(name)
+
+
+def parse_float(text):
+    """
+    Args:
+        text (str): Giá trị trong bảng, ví dụ '187.29' (ô trống: '')
+
+    Returns:
+        float: Giá trị số, hoặc None nếu ô trống / không đọc được
+    """
+    try:
+        return float(text) if text else None
+    except ValueError:
+        return None
+
+
+def parse_int(text):
+    """
+    Args:
+        text (str): Giá trị trong bảng, ví dụ '6' (ô trống: '')
+
+    Returns:
+        int: Giá trị số, hoặc None nếu ô trống / không đọc được
+    """
+    try:
+        return int(text) if text else None
+    except ValueError:
+        value = parse_float(text)
+        return int(value) if value is not None and value.is_integer() else None
+
+
+def format_number(value):
+    """Số -> text như trên trang ('200' thay vì '200.0', None -> '')"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Reading(NamedTuple):
+    """Một bản ghi mực nước đã đọc kiểu dữ liệu (None: ô trống)"""
+    reservoir_id: str
+    reservoir_name: str
+    observed_at: Optional[datetime]     # 'Thời điểm' (đã suy ra năm)
+    requested_at: datetime              # 'Thời điểm yêu cầu'
+    synced_at: Optional[datetime]       # 'Đồng bộ lúc'
+    htl: Optional[float]
+    hdbt: Optional[float]
+    hc: Optional[float]
+    qve: Optional[float]
+    qx_total: Optional[float]
+    qxt: Optional[float]
+    qxm: Optional[float]
+    ncxs: Optional[int]
+    ncxm: Optional[int]
+
+    @classmethod
+    def from_row(cls, row, reservoir_id, reservoir_name, requested_at):
+        """
+        Đọc một hàng của bảng (ReservoirRow) thành bản ghi có kiểu, mỗi ô chỉ đọc một lần
+
+        Args:
+            row (ReservoirRow): Hàng dữ liệu dạng text
+            reservoir_id (str): ID hồ chứa
+            reservoir_name (str): Tên hồ theo danh mục
+            requested_at (datetime): Thời điểm yêu cầu (để suy ra năm)
+
+        Returns:
+            Reading: Bản ghi có kiểu
+        """
+        return cls(
+            reservoir_id,
+            reservoir_name,
+            parse_observed_time(row.observed_at, requested_at),
+            requested_at,
+            parse_synced_time(row.synced_at, requested_at),
+            parse_float(row.htl),
+            parse_float(row.hdbt),
+            parse_float(row.hc),
+            parse_float(row.qve),
+            parse_float(row.qx_total),
+            parse_float(row.qxt),
+            parse_float(row.qxm),
+            parse_int(row.ncxs),
+            parse_int(row.ncxm),
+        )
+
+    def to_dict(self):
+        """
+        Chuyển sang dict dạng text với tên cột như các file CSV hiện có
+
+        Returns:
+            dict: {'Tên hồ': ..., 'Thời điểm': ..., ..., 'Thời điểm yêu cầu': ...}
+        """
+        data = {
+            'Tên hồ': self.reservoir_name,
+            'Thời điểm': self.observed_at.strftime(OBSERVED_FORMAT) if self.observed_at else '',
+        }
+        for source, column in FLOAT_COLUMNS.items():
+            data[source] = format_number(getattr(self, column))
+        for source, column in INT_COLUMNS.items():
+            data[source] = format_number(getattr(self, column))
+        data[REQUESTED_COLUMN] = self.requested_at.strftime(REQUESTED_FORMAT)
+        return data
+
+
+def _seconds(value):
+    """datetime -> số giây tính từ 1970 (None -> _MISSING_TIME)"""
+    if value is None:
+        return _MISSING_TIME
+    return int((value - _EPOCH).total_seconds())
+
+
+def _times(values):
+    """array số giây -> pd.Series datetime (NaT ở vị trí thiếu)"""
+    seconds = pd.Series(np.frombuffer(values, dtype=np.int64), dtype='int64')
+    return pd.to_datetime(seconds.where(seconds != _MISSING_TIME), unit='s')
+
+
+class ReadingBatch:
+    """
+    Gom các Reading theo cột: số lưu trong array (8 byte/giá trị thực, 2 byte/số nguyên),
+    thời gian lưu dạng số giây, thay vì mỗi hàng một dict 12 chuỗi
+    """
+
+    def __init__(self, readings=()):
+        """
+        Args:
+            readings (iterable): Các Reading ban đầu
+        """
+        self.reservoir_ids = []
+        self.reservoir_names = []
+        self.observed = array('q')
+        self.requested = array('q')
+        self.floats = {column: array('d') for column in FLOAT_COLUMNS.values()}
+        self.ints = {column: array('h') for column in INT_COLUMNS.values()}
+        self.int_missing = {column: bytearray() for column in INT_COLUMNS.values()}
+        self.extend(readings)
+
+    def __len__(self):
+        return len(self.requested)
+
+    def append(self, reading):
+        """
+        Args:
+            reading (Reading): Bản ghi cần thêm
+        """
+        self.reservoir_ids.append(reading.reservoir_id)
+        self.reservoir_names.append(reading.reservoir_name)
+        self.observed.append(_seconds(reading.observed_at))
+        self.requested.append(_seconds(reading.requested_at))
+        for column, values in self.floats.items():
+            value = getattr(reading, column)
+            values.append(float('nan') if value is None else value)
+        for column, values in self.ints.items():
+            value = getattr(reading, column)
+            values.append(0 if value is None else value)
+            self.int_missing[column].append(value is None)
+
+    def extend(self, readings):
+        """
+        Args:
+            readings (iterable): Các Reading cần thêm
+        """
+        for reading in readings:
+            self.append(reading)
+
+    def to_frame(self, float_dtype='float32'):
+        """
+        DataFrame có kiểu, cùng cột với to_typed_frame (dùng cho ParquetStore / SQLiteStore)
+
+        Args:
+            float_dtype (str): Kiểu của các cột mực nước / lưu lượng
+
+        Returns:
+            pd.DataFrame: Dữ liệu có kiểu
+        """
+        typed = pd.DataFrame({
+            'reservoir_id': pd.Series(self.reservoir_ids, dtype='string'),
+            'reservoir_name': pd.Series(self.reservoir_names, dtype='string'),
+            'observed_at': _times(self.observed).dt.tz_localize(TIMEZONE),
+            'requested_at': _times(self.requested).dt.tz_localize(TIMEZONE),
+        })
+        for column, values in self.floats.items():
+            typed[column] = np.frombuffer(values, dtype=np.float64).astype(float_dtype)
+        for column, values in self.ints.items():
+            typed[column] = pd.arrays.IntegerArray(
+                np.frombuffer(values, dtype=np.int16).copy(),
+                np.frombuffer(bytes(self.int_missing[column]), dtype=bool).copy())
+        typed['month'] = typed['observed_at'].fillna(typed['requested_at']).dt.strftime('%Y-%m')
+        return typed
+
+    def to_text_frame(self):
+        """
+        DataFrame dạng text với các cột như file CSV hiện có
+
+        Returns:
+            pd.DataFrame: Dữ liệu với các cột OUTPUT_COLUMNS và ID_COLUMN (ô trống: '')
+        """
+        observed = _times(self.observed)
+        data = {
+            'Tên hồ': self.reservoir_names,
+            'Thời điểm': observed.dt.strftime(OBSERVED_FORMAT).fillna(''),
+        }
+        for source, column in FLOAT_COLUMNS.items():
+            text = pd.Series(np.frombuffer(self.floats[column], dtype=np.float64).astype(str))
+            data[source] = text.str.replace(r'\.0$', '', regex=True).replace('nan', '')
+        for source, column in INT_COLUMNS.items():
+            text = pd.Series(np.frombuffer(self.ints[column], dtype=np.int16).astype(str))
+            missing = np.frombuffer(bytes(self.int_missing[column]), dtype=bool)
+            data[source] = text.where(~missing, '')
+        data[REQUESTED_COLUMN] = _times(self.requested).dt.strftime(REQUESTED_FORMAT)
+        data[ID_COLUMN] = self.reservoir_ids
+        return pd.DataFrame(data)
+
+
+def to_typed_frame(df, float_dtype='float32'):
+    """
+    Chuyển DataFrame dạng text (cột như file CSV) sang DataFrame có kiểu
+
+    Args:
+        df (pd.DataFrame): Dữ liệu với các cột OUTPUT_COLUMNS (ID hồ lấy từ ID_COLUMN nếu có,
+            nếu không thì theo tên hồ trong danh mục)
+        float_dtype (str): Kiểu của các cột mực nước / lưu lượng
+
+    Returns:
+        pd.DataFrame: Dữ liệu có kiểu (số float32/Int16, thời gian có múi giờ)
+    """
+    requested = pd.to_datetime(df[REQUESTED_COLUMN], format=REQUESTED_FORMAT)
+    observed = pd.to_datetime(pd.Series(
+        [parse_observed_time(value, reference) for value, reference in zip(df['Thời điểm'], requested)],
+        index=df.index, dtype='object'))
+
+    reservoir_ids = df['Tên hồ'].map(reservoir_id_for)
+    if ID_COLUMN in df.columns:
+        reservoir_ids = df[ID_COLUMN].where(df[ID_COLUMN].fillna('').astype(str) != '', reservoir_ids)
+
+    typed = pd.DataFrame({
+        'reservoir_id': reservoir_ids,
+        'reservoir_name': df['Tên hồ'].astype(str),
+        'observed_at': observed.dt.tz_localize(TIMEZONE),
+        'requested_at': requested.dt.tz_localize(TIMEZONE),
+    }, index=df.index)
+
+    for source, column in FLOAT_COLUMNS.items():
+        typed[column] = pd.to_numeric(df[source], errors='coerce').astype(float_dtype)
+    for source, column in INT_COLUMNS.items():
+        typed[column] = pd.to_numeric(df[source], errors='coerce').astype('Int16')
+
+    unknown = typed['reservoir_id'].isna()
+    if unknown.any():
+        logger.warning(f"Bỏ qua {unknown.sum()} dòng không xác định được ID hồ")
+        typed = typed[~unknown]
+
+    # Phân vùng theo tháng của thời điểm đo (thiếu thì dùng thời điểm yêu cầu)
+    typed['month'] = typed['observed_at'].fillna(typed['requested_at']).dt.strftime('%Y-%m')
+    return typed.reset_index(drop=True)
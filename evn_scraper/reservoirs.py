@@ -0,0 +1,133 @@
+"""
+Danh sách hồ chứa (và vùng miền) trên trang PageHoChuaThuyDienEmbedEVN.aspx
+Dùng để chuyển ID/tên hồ do người dùng chọn thành tập hồ cần trích xuất
+"""
+
+import unicodedata
+
+PAGE_URL = "https://hochuathuydien.evn.com.vn/PageHoChuaThuyDienEmbedEVN.aspx"
+
+# ID hồ chứa (tham số hc trên URL) -> tên hồ (theo dropdown ddlHoChua)
+RESERVOIRS = {
+    "1": "Tuyên Quang",
+    "2": "Sơn La",
+    "3": "Hòa Bình",
+    "4": "Thác Bà",
+    "9": "Buôn Tua Srah",
+    "10": "Buôn Kuốp",
+    "11": "Srêpốk 3",
+    "14": "Vĩnh Sơn A",
+    "15": "Vĩnh Sơn B",
+    "16": "Vĩnh Sơn C",
+    "19": "An Khê",
+    "20": "Ka Nak",
+    "24": "Pleikrông",
+    "25": "Ialy",
+    "26": "Bản Vẽ",
+    "27": "Sông Ba Hạ",
+    "30": "A Vương",
+    "32": "Sông Tranh 2",
+    "34": "Quảng Trị",
+    "44": "Trị An",
+    "45": "Đại Ninh",
+    "46": "Đơn Dương",
+    "47": "Đồng Nai 3",
+    "49": "Sê San 3",
+    "50": "Sê San 3A",
+    "51": "Sê San 4",
+    "52": "Sê San 4A",
+    "56": "Thác Mơ",
+    "58": "A Lưới",
+    "59": "Hàm Thuận",
+    "60": "Đa Mi",
+    "71": "Sông Hinh",
+    "72": "Đồng Nai 4",
+    "76": "Bản Chát",
+    "77": "Huội Quảng",
+    "78": "Lai Châu",
+    "80": "Trung Sơn",
+    "83": "Sông Bung 2",
+    "84": "Sông Bung 4",
+    "92": "Khe Bố",
+    "101": "Thượng Kon Tum",
+}
+
+# ID hồ chứa -> vùng miền (theo hàng vùng miền của bảng tblgridtd; Sê San 4A, Thác Mơ, A Lưới
+# không có trong bảng mẫu nên ghi theo vị trí địa lý)
+RESERVOIR_REGIONS = {
+    "1": "Đông Bắc Bộ",
+    "2": "Tây Bắc Bộ",
+    "3": "Tây Bắc Bộ",
+    "4": "Tây Bắc Bộ",
+    "9": "Tây Nguyên",
+    "10": "Tây Nguyên",
+    "11": "Tây Nguyên",
+    "14": "Nam Trung Bộ",
+    "15": "Nam Trung Bộ",
+    "16": "Nam Trung Bộ",
+    "19": "Tây Nguyên",
+    "20": "Tây Nguyên",
+    "24": "Tây Nguyên",
+    "25": "Tây Nguyên",
+    "26": "Bắc Trung Bộ",
+    "27": "Nam Trung Bộ",
+    "30": "Nam Trung Bộ",
+    "32": "Nam Trung Bộ",
+    "34": "Bắc Trung Bộ",
+    "44": "Đông Nam Bộ",
+    "45": "Tây Nguyên",
+    "46": "Tây Nguyên",
+    "47": "Tây Nguyên",
+    "49": "Tây Nguyên",
+    "50": "Tây Nguyên",
+    "51": "Tây Nguyên",
+    "52": "Tây Nguyên",
+    "56": "Đông Nam Bộ",
+    "58": "Bắc Trung Bộ",
+    "59": "Tây Nguyên",
+    "60": "Tây Nguyên",
+    "71": "Nam Trung Bộ",
+    "72": "Tây Nguyên",
+    "76": "Tây Bắc Bộ",
+    "77": "Tây Bắc Bộ",
+    "78": "Tây Bắc Bộ",
+    "80": "Bắc Trung Bộ",
+    "83": "Nam Trung Bộ",
+    "84": "Nam Trung Bộ",
+    "92": "Bắc Trung Bộ",
+    "101": "Tây Nguyên",
+}
+
+
+def normalize_name(name):
+    """
+    Chuẩn hóa tên hồ để so khớp (bảng dữ liệu ghi 'KHE BỐ', 'Kanak'
+    trong khi dropdown ghi 'Khe Bố', 'Ka Nak')
+
+    Args:
+        name (str): Tên hồ
+
+    Returns:
+        str: Tên đã chuẩn hóa (NFC, không phân biệt hoa thường, bỏ khoảng trắng)
+    """
+    name = unicodedata.normalize('NFC', name)
+    return ''.join(name.casefold().split())
+
+
+def resolve_reservoirs(selection="all", catalog=None):
+    """
+    Chuyển lựa chọn của người dùng thành các hồ cần lấy dữ liệu
+
+    Args:
+        selection (str | int | iterable): "all", một ID / tên hồ / vùng miền,
+            hoặc danh sách các giá trị đó (ví dụ [26, "Sông Ba Hạ", "46"])
+        catalog (ReservoirCatalog): Danh mục hồ chứa (mặc định danh mục dùng chung)
+
+    Returns:
+        dict: {reservoir_id: reservoir_name} theo thứ tự yêu cầu
+
+    Raises:
+        ValueError: Nếu có ID hoặc tên hồ không xác định
+    """
+    from .catalog import get_catalog
+    return (catalog or get_catalog()).resolve(selection)
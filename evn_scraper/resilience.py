@@ -0,0 +1,114 @@
+"""
+Chống lỗi tạm thời khi tải trang EVN
+- RetryPolicy: thử lại với thời gian chờ tăng theo cấp số nhân, có jitter ngẫu nhiên
+- CircuitBreaker: tạm dừng mọi request khi tỉ lệ lỗi tăng vọt, thử lại sau một khoảng nghỉ
+"""
+
+import time
+import random
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class RetryPolicy:
+    """Số lần thử và thời gian chờ giữa các lần thử (full jitter)"""
+
+    def __init__(self, attempts=4, base_delay=1.0, max_delay=30.0):
+        """
+        Args:
+            attempts (int): Tổng số lần thử cho một request (1: không thử lại)
+            base_delay (float): Thời gian chờ cơ sở trước lần thử lại đầu tiên (giây)
+            max_delay (float): Thời gian chờ tối đa (giây)
+        """
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt):
+        """
+        Args:
+            attempt (int): Lần thử vừa lỗi (bắt đầu từ 1)
+
+        Returns:
+            float: Thời gian chờ ngẫu nhiên trong [0, min(max_delay, base_delay * 2^(attempt-1))]
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """
+    Ngắt mạch khi lỗi nhiều: trong `window` request gần nhất có từ `failure_threshold`
+    lỗi trở lên thì mọi luồng tạm dừng `cooldown` giây, sau đó cho một request thử
+    (half-open); thành công thì đóng mạch, lỗi thì ngắt tiếp với thời gian nghỉ gấp đôi
+    """
+
+    def __init__(self, failure_threshold=5, window=10, cooldown=60.0, max_cooldown=900.0):
+        """
+        Args:
+            failure_threshold (int): Số lỗi trong cửa sổ để ngắt mạch
+            window (int): Số request gần nhất được xét
+            cooldown (float): Thời gian nghỉ khi ngắt mạch lần đầu (giây)
+            max_cooldown (float): Thời gian nghỉ tối đa (giây)
+        """
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+
+        self.state = 'closed'
+        self.trips = 0
+        self._results = deque(maxlen=window)
+        self._current_cooldown = cooldown
+        self._open_until = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Chờ đến khi được phép gửi request (mạch đóng, hoặc đến lượt request thử)"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if self.state == 'closed':
+                    return
+                if self.state == 'open' and now >= self._open_until:
+                    self.state = 'half-open'
+                if self.state == 'half-open' and not self._probing:
+                    self._probing = True
+                    return
+                delay = max(self._open_until - now, 0.5)
+            time.sleep(delay)
+
+    def record(self, ok):
+        """
+        Ghi nhận kết quả một request
+
+        Args:
+            ok (bool): Request thành công hay không
+        """
+        with self._lock:
+            if self.state == 'half-open' and self._probing:
+                self._probing = False
+                if ok:
+                    logger.info("Server EVN đã phản hồi bình thường, tiếp tục tải")
+                    self.state = 'closed'
+                    self._current_cooldown = self.cooldown
+                    self._results.clear()
+                else:
+                    self._current_cooldown = min(self._current_cooldown * 2, self.max_cooldown)
+                    self._trip()
+                return
+
+            self._results.append(ok)
+            failures = self._results.count(False)
+            if self.state == 'closed' and failures >= self.failure_threshold:
+                self._trip()
+
+    def _trip(self):
+        """Ngắt mạch (gọi khi đang giữ lock)"""
+        self.state = 'open'
+        self.trips += 1
+        self._open_until = time.monotonic() + self._current_cooldown
+        self._results.clear()
+        logger.warning(f"Server EVN lỗi liên tục, tạm dừng {self._current_cooldown:.0f} giây")
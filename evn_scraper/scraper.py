@@ -0,0 +1,382 @@
+"""
+EVN Water Level Scraper cho nhiều hồ chứa
+Mỗi thời điểm chỉ tải trang một lần và trích xuất dữ liệu cho tất cả các hồ được chọn
+"""
+
+import time
+import logging
+from datetime import timedelta
+
+from .fetchers import FetchError, create_fetcher
+from .metrics import get_metrics
+from .pacing import AdaptivePacer
+from .parser import parse_table
+from .records import Reading, ReadingBatch
+from .resilience import CircuitBreaker, RetryPolicy
+from .catalog import get_catalog
+from .reservoirs import PAGE_URL
+from .timeutil import REQUESTED_FORMAT
+
+logger = logging.getLogger(__name__)
+
+# Các cột dữ liệu theo thứ tự trong bảng tblgridtd
+TABLE_COLUMNS = [
+    'Tên hồ', 'Thời điểm', 'Htl (m)', 'Hdbt (m)', 'Hc (m)', 'Qve (m3/s)',
+    'ΣQx (m3/s)', 'Qxt (m3/s)', 'Qxm (m3/s)', 'Ncxs', 'Ncxm',
+]
+
+# Các cột trong file kết quả (giống các script một hồ)
+OUTPUT_COLUMNS = TABLE_COLUMNS + ['Thời điểm yêu cầu']
+
+
+def hourly_range(start_date, end_date):
+    """
+    Các thời điểm theo giờ trong khoảng [start_date, end_date]
+
+    Args:
+        start_date (datetime): Thời điểm bắt đầu
+        end_date (datetime): Thời điểm kết thúc (bao gồm)
+
+    Yields:
+        datetime: Từng giờ trong khoảng
+    """
+    current_date = start_date
+    while current_date <= end_date:
+        yield current_date
+        current_date += timedelta(hours=1)
+
+
+def build_dataframe(all_data, typed=False):
+    """
+    Tạo DataFrame kết quả từ danh sách bản ghi
+
+    Args:
+        all_data (ReadingBatch | iterable): Các bản ghi (Reading)
+        typed (bool): True: DataFrame có kiểu (như to_typed_frame);
+            False: DataFrame dạng text với các cột OUTPUT_COLUMNS và cột ID hồ (ID_COLUMN)
+
+    Returns:
+        pd.DataFrame: Dữ liệu kết quả, hoặc None nếu rỗng
+    """
+    batch = all_data if isinstance(all_data, ReadingBatch) else ReadingBatch(all_data)
+    if not len(batch):
+        logger.warning("Không thu thập được dữ liệu")
+        return None
+
+    df = batch.to_frame() if typed else batch.to_text_frame()
+    logger.info(f"Tổng số bản ghi đã thu thập: {len(df)}")
+    return df
+
+
+class EVNMultiReservoirScraper:
+    """Scraper lấy dữ liệu mực nước EVN cho nhiều hồ từ một lần tải trang"""
+
+    def __init__(self, reservoirs="all", backend="auto", headless=False, fetcher=None, pacer=None,
+                 lean=False, cache=None, retry=None, breaker=None, catalog=None):
+        """
+        Khởi tạo scraper
+
+        Args:
+            reservoirs (str | int | iterable): "all" hoặc danh sách ID/tên hồ
+            backend (str): Backend tải trang: 'http', 'selenium' hoặc 'auto'
+            headless (bool): Chạy browser ở chế độ ẩn (backend Selenium)
+            fetcher: Backend tải trang tự tạo (bỏ qua backend/headless nếu có)
+            pacer (AdaptivePacer): Bộ điều nhịp giữa các request (mặc định AdaptivePacer())
+            lean (bool): Chế độ Chrome nhẹ cho backend Selenium (chặn ảnh/CSS/font, script bên thứ ba)
+            cache (PageCache): Cache page source trên đĩa (None: luôn tải trang)
+            retry (RetryPolicy): Chính sách thử lại khi tải lỗi (mặc định RetryPolicy())
+            breaker (CircuitBreaker): Ngắt mạch khi server lỗi liên tục (mặc định CircuitBreaker())
+            catalog (ReservoirCatalog): Danh mục hồ chứa (mặc định danh mục dùng chung)
+        """
+        # URL cơ sở của iframe chứa dữ liệu
+        self.base_url = PAGE_URL
+        self.backend = backend
+        self.headless = headless
+        self.lean = lean
+        self.fetcher = fetcher or create_fetcher(backend, headless=headless, lean=lean)
+        self.pacer = pacer or AdaptivePacer()
+        self.cache = cache
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        # Các thời điểm tải lỗi sau khi đã thử lại hết (không được coi là đã hoàn thành)
+        self.failed_times = set()
+        self.catalog = catalog or get_catalog()
+        self.reservoirs = self.catalog.resolve(reservoirs)
+
+    def build_url(self, date_str):
+        """
+        Xây dựng URL với các tham số
+
+        Trang trả về toàn bộ bảng tblgridtd bất kể giá trị hc,
+        nên chỉ cần một ID hợp lệ trong số các hồ được chọn
+
+        Args:
+            date_str (str): Ngày giờ theo định dạng 'DD/MM/YYYY HH:MM'
+
+        Returns:
+            str: URL hoàn chỉnh
+        """
+        reservoir_id = next(iter(self.reservoirs))
+        url = f"{self.base_url}?td={date_str}&hc={reservoir_id}"
+        return url
+
+    def _matched_rows(self, html):
+        """
+        Các hàng của bảng thuộc các hồ được chọn
+
+        Args:
+            html (str): Page source của trang dữ liệu
+
+        Yields:
+            tuple: (reservoir_id, ReservoirRow)
+        """
+        remaining = set(self.reservoirs)
+
+        for row in parse_table(html):
+            # Tên trong bảng -> ID theo danh mục (so khớp cả tên, không so chuỗi con)
+            reservoir_id = self.catalog.id_for(row.name)
+            if reservoir_id not in remaining:
+                continue
+
+            yield reservoir_id, row
+
+            remaining.discard(reservoir_id)
+            if not remaining:
+                break
+
+        for reservoir_id in remaining:
+            logger.warning(f"Không tìm thấy dữ liệu cho {self.reservoirs[reservoir_id]}")
+
+    def is_cached(self, date_time):
+        """
+        Args:
+            date_time (datetime): Thời điểm cần lấy dữ liệu
+
+        Returns:
+            bool: True nếu trang của thời điểm này có sẵn trong cache (không cần tải, không cần chờ)
+        """
+        return self.cache is not None and self.cache.contains(self.build_url(date_time.strftime(REQUESTED_FORMAT)))
+
+    def fetch_page(self, url, fetcher=None, fresh=False):
+        """
+        Lấy page source: từ cache nếu có, nếu không thì tải và lưu vào cache
+
+        Args:
+            url (str): URL trang dữ liệu
+            fetcher: Backend tải trang (mặc định self.fetcher)
+            fresh (bool): Luôn tải trang, không dùng trang trong cache (trang mới vẫn được lưu)
+
+        Returns:
+            str: Page source
+
+        Raises:
+            FetchError: Cache ở chế độ offline mà không có trang
+            Exception: Lỗi của lần thử cuối cùng nếu mọi lần thử đều lỗi
+        """
+        metrics = get_metrics()
+        if self.cache is not None:
+            html = self.cache.get(url) if not fresh else None
+            if html is not None:
+                logger.info(f"Dùng trang trong cache: {url}")
+                metrics.inc('cache_hits')
+                return html
+            if self.cache.offline:
+                raise FetchError(f"Không có trong cache (offline): {url}")
+
+        for attempt in range(1, self.retry.attempts + 1):
+            self.breaker.wait()
+            logger.info(f"Đang truy cập: {url}")
+            start = time.monotonic()
+            try:
+                html = (fetcher or self.fetcher).fetch(url)
+                break
+            except Exception as e:
+                latency = time.monotonic() - start
+                metrics.observe('fetch', latency)
+                metrics.inc('fetch_errors')
+                self.pacer.record(latency, ok=False)
+                self.breaker.record(False)
+                if attempt == self.retry.attempts:
+                    raise
+                metrics.inc('retries')
+                delay = self.retry.delay(attempt)
+                logger.warning(f"Lỗi lần {attempt}/{self.retry.attempts} ({e}), thử lại sau {delay:.1f} giây")
+                time.sleep(delay)
+                metrics.observe('throttle', delay)
+
+        latency = time.monotonic() - start
+        metrics.observe('fetch', latency)
+        metrics.inc('pages_fetched')
+        self.pacer.record(latency)
+        self.breaker.record(True)
+
+        if self.cache is not None:
+            self.cache.put(url, html)
+        return html
+
+    def extract_table_data(self, html):
+        """
+        Trích xuất dữ liệu từ bảng cho tất cả các hồ được chọn
+
+        Args:
+            html (str): Page source của trang dữ liệu
+
+        Returns:
+            list: Danh sách dict (dạng text), mỗi dict là dữ liệu của một hồ
+        """
+        results = []
+        for reservoir_id, row in self._matched_rows(html):
+            data = row.to_dict()
+            data['Tên hồ'] = self.reservoirs[reservoir_id]
+            results.append(data)
+        return results
+
+    def extract_readings(self, html, requested_at, changes=None):
+        """
+        Trích xuất bản ghi có kiểu cho tất cả các hồ được chọn
+
+        Args:
+            html (str): Page source của trang dữ liệu
+            requested_at (datetime): Thời điểm yêu cầu của trang
+            changes (ChangeDetector): Chỉ trích xuất các hồ có hàng khác lần trước (None: mọi hồ)
+
+        Returns:
+            list: Danh sách Reading, mỗi bản ghi là dữ liệu của một hồ
+        """
+        matched = self._matched_rows(html)
+        if changes is not None:
+            matched = changes.filter(matched)
+        return [Reading.from_row(row, reservoir_id, self.reservoirs[reservoir_id], requested_at)
+                for reservoir_id, row in matched]
+
+    def scrape_single_time(self, date_time, fetcher=None, fresh=False, changes=None):
+        """
+        Lấy dữ liệu cho một thời điểm cụ thể (một lần tải trang cho mọi hồ)
+
+        Args:
+            date_time (datetime): Thời điểm cần lấy dữ liệu
+            fetcher: Backend tải trang (mặc định self.fetcher)
+            fresh (bool): Luôn tải trang, không dùng trang trong cache
+            changes (ChangeDetector): Bỏ qua trang có bảng không đổi và các hồ có hàng không đổi
+                so với lần gọi trước (None: trả về mọi hồ)
+
+        Returns:
+            list: Danh sách Reading của các hồ đã tìm thấy (chỉ các hồ thay đổi nếu có changes)
+        """
+        try:
+            # Định dạng ngày cho URL
+            date_str = date_time.strftime(REQUESTED_FORMAT)
+
+            url = self.build_url(date_str)
+            html = self.fetch_page(url, fetcher, fresh)
+
+            metrics = get_metrics()
+            if changes is not None and not changes.table_changed(html):
+                # Bảng giống hệt lần trước: không cần phân tích
+                metrics.inc('pages_unchanged')
+                logger.info(f"Bảng không đổi so với lần trước cho {date_str}")
+                self.failed_times.discard(date_time)
+                return []
+
+            # Thời điểm yêu cầu đúng như đã gửi (URL chỉ có đến phút)
+            with metrics.timer('parse'):
+                rows = self.extract_readings(html, date_time.replace(second=0, microsecond=0), changes)
+            metrics.inc('rows_extracted', len(rows))
+            if not rows and changes is None:
+                metrics.inc('empty_pages')
+
+            if changes is not None:
+                logger.info(f"Có {len(rows)}/{len(self.reservoirs)} hồ thay đổi cho {date_str}")
+            else:
+                logger.info(f"Đã trích xuất {len(rows)}/{len(self.reservoirs)} hồ cho {date_str}")
+            self.failed_times.discard(date_time)
+            return rows
+
+        except Exception as e:
+            logger.error(f"Lỗi khi lấy dữ liệu {date_time}: {e}")
+            self.failed_times.add(date_time)
+            return []
+
+    def iter_date_range(self, start_date, end_date, tracker=None, stride=None):
+        """
+        Tải tuần tự theo giờ và trả về bản ghi của từng giờ ngay khi tải xong
+
+        Args:
+            start_date (datetime): Ngày bắt đầu
+            end_date (datetime): Ngày kết thúc
+            tracker (ObservationTracker): Bỏ các bản ghi trùng quan trắc trước đó (None: giữ tất cả)
+            stride (HourStride): Nhảy qua các giờ không thể có quan trắc mới (None: tải từng giờ)
+
+        Yields:
+            tuple: (datetime, list Reading cần lưu) theo thứ tự thời gian
+        """
+        requests = 0
+
+        def scrape(date_time):
+            nonlocal requests
+            cached = self.is_cached(date_time)
+            rows = self.scrape_single_time(date_time)
+            requests += 1
+
+            # Giãn nhịp theo tốc độ phản hồi của server (trang lấy từ cache không cần chờ)
+            if not cached:
+                self.pacer.wait()
+            return rows
+
+        def keep(rows):
+            return tracker.filter(rows) if tracker is not None else rows
+
+        self.fetcher.open()
+
+        try:
+            if stride is None:
+                for current_date in hourly_range(start_date, end_date):
+                    yield current_date, keep(scrape(current_date))
+                return
+
+            previous = None
+            current_date = start_date
+            while current_date <= end_date:
+                rows = scrape(current_date)
+                skipped = list(hourly_range(previous + timedelta(hours=1), current_date - timedelta(hours=1))) \
+                    if previous is not None else []
+
+                if stride.observe(current_date, rows, self.reservoirs) and skipped:
+                    # Có hồ có thể đã báo số liệu trong các giờ vừa nhảy qua: tải lại từng giờ
+                    logger.info(f"Tải lại {len(skipped)} giờ đã nhảy qua trước {current_date}")
+                    for skipped_date in skipped:
+                        yield skipped_date, keep(scrape(skipped_date))
+                elif skipped and tracker is not None:
+                    # Các giờ nhảy qua không có quan trắc mới, không phải giờ bị thiếu
+                    for reservoir_id in self.reservoirs:
+                        tracker.collapsed.setdefault(reservoir_id, set()).update(skipped)
+
+                yield current_date, keep(rows)
+                previous = current_date
+                next_date = stride.next_time(current_date, rows, self.reservoirs)
+                # Luôn tải giờ cuối của khoảng
+                current_date = end_date if current_date < end_date < next_date else next_date
+
+            hours = int((end_date - start_date) / timedelta(hours=1)) + 1
+            logger.info(f"Bước nhảy thích ứng: {requests} request cho {hours} giờ")
+
+        finally:
+            self.fetcher.close()
+
+    def scrape_date_range(self, start_date, end_date, tracker=None, stride=None):
+        """
+        Lấy dữ liệu theo giờ cho một khoảng thời gian và cho mọi hồ được chọn
+
+        Args:
+            start_date (datetime): Ngày bắt đầu
+            end_date (datetime): Ngày kết thúc
+            tracker (ObservationTracker): Bỏ các bản ghi trùng quan trắc trước đó (None: giữ tất cả)
+            stride (HourStride): Nhảy qua các giờ không thể có quan trắc mới (None: tải từng giờ)
+
+        Returns:
+            pd.DataFrame: Dữ liệu kết hợp của mọi hồ, hoặc None
+        """
+        all_data = ReadingBatch()
+        for _, rows in self.iter_date_range(start_date, end_date, tracker, stride):
+            all_data.extend(rows)
+        return build_dataframe(all_data)
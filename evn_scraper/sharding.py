@@ -0,0 +1,189 @@
+"""
+Chia khoảng giờ cho nhiều tiến trình (backfill nhiều năm cho cả lưu vực)
+
+Khi tải trang đã nhanh (HTTP, cache), một tiến trình Python bị giới hạn bởi CPU khi phân tích
+HTML. ShardedRangeScraper chia các giờ cần tải thành các đoạn liên tục, mỗi đoạn chạy trong
+một tiến trình riêng (ProcessPoolExecutor) với ParallelRangeScraper của nó và ghi bản ghi ra
+file phân đoạn riêng; tiến trình chính đọc lần lượt các phân đoạn theo thứ tự thời gian.
+
+Chỉ chia theo giờ, không chia theo hồ: mỗi trang đã chứa toàn bộ các hồ, chia theo hồ chỉ làm
+tăng số request.
+"""
+
+import os
+import pickle
+import shutil
+import logging
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from .metrics import get_metrics, reset_metrics
+from .parallel import ParallelRangeScraper
+from .scraper import EVNMultiReservoirScraper
+
+logger = logging.getLogger(__name__)
+
+
+def split_times(times, shards):
+    """
+    Chia các giờ thành tối đa `shards` đoạn liên tiếp, độ dài gần bằng nhau
+
+    Args:
+        times (list): Các giờ cần tải (datetime) theo thứ tự thời gian
+        shards (int): Số đoạn
+
+    Returns:
+        list: Các list giờ (bỏ đoạn rỗng)
+    """
+    shards = max(1, min(shards, len(times)))
+    size, extra = divmod(len(times), shards)
+    parts, start = [], 0
+    for index in range(shards):
+        end = start + size + (1 if index < extra else 0)
+        parts.append(times[start:end])
+        start = end
+    return [part for part in parts if part]
+
+
+def _run_shard(config, index, times, work_dir):
+    """
+    Tải một đoạn giờ trong tiến trình worker và ghi bản ghi ra file phân đoạn
+
+    Args:
+        config (dict): Cấu hình scraper (hồ, danh mục, URL, backend, cache, số luồng, request/giây)
+        index (int): Số thứ tự đoạn
+        times (list): Các giờ của đoạn
+        work_dir (str): Thư mục chứa các file phân đoạn
+
+    Returns:
+        tuple: (đường dẫn file phân đoạn, set các giờ tải lỗi, số liệu đo Metrics.state())
+    """
+    # Worker có thể được dùng lại cho đoạn khác: chỉ gửi về số liệu của đoạn này
+    metrics = reset_metrics()
+    cache = None
+    if config['cache_root']:
+        from .page_cache import PageCache
+        cache = PageCache(config['cache_root'], offline=config['cache_offline'])
+
+    scraper = EVNMultiReservoirScraper(config['reservoirs'], backend=config['backend'],
+                                       headless=config['headless'], lean=config['lean'], cache=cache,
+                                       catalog=config['catalog'])
+    scraper.base_url = config['base_url']
+    range_scraper = ParallelRangeScraper(scraper, config['concurrency'], config['requests_per_second'])
+
+    path = os.path.join(work_dir, f"shard-{index:03d}.pkl")
+    try:
+        with open(path, 'wb') as f:
+            # Ghi theo lô: bộ nhớ của worker không tăng theo độ dài đoạn
+            batch = []
+            for date_time, rows in range_scraper.iter_readings(times):
+                batch.append((date_time, rows))
+                if len(batch) >= config['batch_hours']:
+                    pickle.dump(batch, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    batch = []
+            if batch:
+                pickle.dump(batch, f, protocol=pickle.HIGHEST_PROTOCOL)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    return path, set(scraper.failed_times), metrics.state()
+
+
+class ShardedRangeScraper:
+    """Tải một khoảng giờ bằng nhiều tiến trình, trả về kết quả theo thứ tự thời gian"""
+
+    def __init__(self, scraper, shards=None, concurrency=4, requests_per_second=2.0,
+                 batch_hours=168, work_dir=None):
+        """
+        Args:
+            scraper (EVNMultiReservoirScraper): Scraper cung cấp danh sách hồ, backend và cache
+                (mỗi tiến trình tạo scraper riêng với cùng cấu hình)
+            shards (int): Số tiến trình (mặc định số CPU)
+            concurrency (int): Số luồng tải trang trong mỗi tiến trình
+            requests_per_second (float): Giới hạn tổng số request/giây tới server (chia đều cho các tiến trình)
+            batch_hours (int): Số giờ mỗi lô khi worker ghi file phân đoạn
+            work_dir (str): Thư mục chứa file phân đoạn (mặc định thư mục tạm, xóa khi xong)
+        """
+        self.scraper = scraper
+        self.shards = max(1, shards or os.cpu_count() or 1)
+        self.concurrency = concurrency
+        self.requests_per_second = requests_per_second
+        self.batch_hours = batch_hours
+        self.work_dir = work_dir
+
+    def _config(self, shards):
+        cache = self.scraper.cache
+        return {
+            'reservoirs': list(self.scraper.reservoirs),
+            'catalog': self.scraper.catalog,
+            'base_url': self.scraper.base_url,
+            'backend': self.scraper.backend,
+            'headless': self.scraper.headless,
+            'lean': self.scraper.lean,
+            'cache_root': cache.root if cache is not None else None,
+            'cache_offline': cache.offline if cache is not None else False,
+            'concurrency': self.concurrency,
+            'requests_per_second': self.requests_per_second / shards if self.requests_per_second else None,
+            'batch_hours': self.batch_hours,
+        }
+
+    def iter_readings(self, times, tracker=None, checkpoint=None):
+        """
+        Tải các giờ cho trước bằng nhiều tiến trình
+
+        Đoạn đầu tiên được đọc ngay khi tiến trình của nó xong, trong khi các đoạn sau vẫn đang tải
+
+        Args:
+            times (iterable): Các thời điểm cần tải (datetime)
+            tracker (ObservationTracker): Bỏ các bản ghi trùng quan trắc trước đó (None: giữ tất cả)
+            checkpoint (Checkpoint): Bỏ qua các giờ đã tải xong ở lần chạy trước (None: tải tất cả)
+
+        Yields:
+            tuple: (datetime, list Reading cần lưu) theo thứ tự của times
+        """
+        times = list(times)
+        if checkpoint is not None:
+            pending = [date_time for date_time in times if date_time not in checkpoint.completed]
+            if len(pending) < len(times):
+                logger.info(f"Bỏ qua {len(times) - len(pending)} giờ đã tải trong checkpoint")
+            times = pending
+
+        parts = split_times(times, self.shards)
+        if not parts:
+            return
+        logger.info(f"Chia {len(times)} giờ cho {len(parts)} tiến trình")
+
+        config = self._config(len(parts))
+        work_dir = self.work_dir or tempfile.mkdtemp(prefix='evn_shards_')
+        os.makedirs(work_dir, exist_ok=True)
+
+        try:
+            with ProcessPoolExecutor(max_workers=len(parts)) as executor:
+                futures = [executor.submit(_run_shard, config, index, part, work_dir)
+                           for index, part in enumerate(parts)]
+
+                # Ghép các phân đoạn theo thứ tự thời gian
+                for index, future in enumerate(futures):
+                    path, failed, metrics = future.result()
+                    self.scraper.failed_times.update(failed)
+                    get_metrics().merge(metrics)
+                    logger.info(f"Đoạn {index + 1}/{len(parts)} xong, ghép kết quả")
+
+                    with open(path, 'rb') as f:
+                        while True:
+                            try:
+                                batch = pickle.load(f)
+                            except EOFError:
+                                break
+                            for date_time, rows in batch:
+                                yield date_time, tracker.filter(rows) if tracker is not None else rows
+                    os.remove(path)
+        finally:
+            if self.work_dir is None:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+        if self.scraper.failed_times:
+            logger.warning(f"{len(self.scraper.failed_times)} thời điểm tải lỗi sau khi đã thử lại")
+        if tracker is not None and tracker.skipped:
+            logger.info(f"Bỏ {tracker.skipped} bản ghi trùng quan trắc trước đó")
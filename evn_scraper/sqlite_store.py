@@ -0,0 +1,173 @@
+"""
+Lưu dữ liệu mực nước vào SQLite (chế độ WAL), mỗi (hồ, thời điểm đo) chỉ có một dòng
+Chạy lại hoặc lấy chồng khoảng thời gian sẽ cập nhật dòng cũ thay vì tạo dòng trùng
+
+Thời gian lưu dạng text 'YYYY-MM-DD HH:MM:SS' theo giờ Việt Nam (Asia/Ho_Chi_Minh),
+so sánh theo thứ tự chuỗi đúng bằng thứ tự thời gian
+"""
+
+import sqlite3
+import logging
+
+import pandas as pd
+
+from .records import FLOAT_COLUMNS, INT_COLUMNS, to_typed_frame
+
+logger = logging.getLogger(__name__)
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+COLUMNS = (
+    ['reservoir_id', 'observed_at', 'reservoir_name', 'requested_at']
+    + list(FLOAT_COLUMNS.values())
+    + list(INT_COLUMNS.values())
+)
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS readings (
+    reservoir_id TEXT NOT NULL,
+    observed_at TEXT NOT NULL,
+    reservoir_name TEXT,
+    requested_at TEXT NOT NULL,
+    {', '.join(f'{column} REAL' for column in FLOAT_COLUMNS.values())},
+    {', '.join(f'{column} INTEGER' for column in INT_COLUMNS.values())},
+    PRIMARY KEY (reservoir_id, observed_at)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_readings_observed_at ON readings (observed_at);
+CREATE INDEX IF NOT EXISTS idx_readings_requested_at ON readings (reservoir_id, requested_at);
+"""
+
+_UPSERT = (
+    f"INSERT INTO readings ({', '.join(COLUMNS)}) VALUES ({', '.join('?' for _ in COLUMNS)}) "
+    f"ON CONFLICT (reservoir_id, observed_at) DO UPDATE SET "
+    + ', '.join(f"{column} = excluded.{column}" for column in COLUMNS[2:])
+)
+
+
+def _time_text(value):
+    """Timestamp (có hoặc không có múi giờ) -> text lưu trong SQLite"""
+    if value is None or pd.isna(value):
+        return None
+    return pd.Timestamp(value).strftime(TIME_FORMAT)
+
+
+def _values(series):
+    """Giá trị Python của một cột (NaN/NA thành None)"""
+    return [None if pd.isna(value) else value for value in series.astype(object).tolist()]
+
+
+def _records(typed):
+    """Các tuple giá trị theo COLUMNS, bỏ dòng không có thời điểm đo"""
+    columns = [
+        _values(typed['reservoir_id']),
+        [_time_text(value) for value in typed['observed_at']],
+        _values(typed['reservoir_name']),
+        [_time_text(value) for value in typed['requested_at']],
+    ]
+    columns += [_values(typed[column]) for column in COLUMNS[4:]]
+    return [record for record in zip(*columns) if record[1] is not None]
+
+
+class SQLiteStore:
+    """Kho dữ liệu SQLite, khóa chính (reservoir_id, observed_at)"""
+
+    def __init__(self, path="evn_water_level.db"):
+        """
+        Args:
+            path (str): File cơ sở dữ liệu
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        # WAL: người đọc không chặn người ghi; NORMAL đủ an toàn với WAL và nhanh hơn FULL
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(_SCHEMA)
+
+    def upsert(self, df, batch_size=1000):
+        """
+        Ghi dữ liệu, dòng trùng (hồ, thời điểm đo) được cập nhật theo lần tải mới nhất
+
+        Toàn bộ df được ghi trong một transaction (executemany theo từng lô batch_size dòng)
+
+        Args:
+            df (pd.DataFrame): Dữ liệu dạng text (OUTPUT_COLUMNS) hoặc đã có kiểu
+            batch_size (int): Số dòng mỗi lần executemany
+
+        Returns:
+            int: Số dòng đã ghi
+        """
+        if df is None or df.empty:
+            return 0
+
+        typed = df if 'requested_at' in df.columns else to_typed_frame(df, float_dtype='float64')
+        records = _records(typed)
+        skipped = len(typed) - len(records)
+        if skipped:
+            logger.warning(f"Bỏ qua {skipped} dòng không đọc được thời điểm đo")
+
+        with self.connection:
+            for i in range(0, len(records), batch_size):
+                self.connection.executemany(_UPSERT, records[i:i + batch_size])
+
+        logger.info(f"Đã ghi {len(records)} dòng vào {self.path}")
+        return len(records)
+
+    def read(self, reservoir_ids=None, start=None, end=None, columns=None, time_column='observed_at'):
+        """
+        Đọc dữ liệu theo hồ / khoảng thời gian (dùng khóa chính và index, không quét toàn bảng)
+
+        Args:
+            reservoir_ids (iterable): ID các hồ cần đọc (mặc định: tất cả)
+            start (datetime): Thời điểm bắt đầu (bao gồm)
+            end (datetime): Thời điểm kết thúc (bao gồm)
+            columns (list): Các cột cần đọc (mặc định: tất cả)
+            time_column (str): Cột thời gian dùng để lọc ('observed_at' hoặc 'requested_at')
+
+        Returns:
+            pd.DataFrame: Dữ liệu sắp theo hồ và thời gian, cột thời gian dạng datetime
+
+        Raises:
+            ValueError: Tên cột không hợp lệ
+        """
+        columns = list(columns or COLUMNS)
+        unknown = [column for column in columns + [time_column] if column not in COLUMNS]
+        if unknown or time_column not in ('observed_at', 'requested_at'):
+            raise ValueError(f"Cột không hợp lệ: {', '.join(unknown) or time_column}")
+
+        conditions = []
+        params = []
+        if reservoir_ids is not None:
+            reservoir_ids = [str(reservoir_id) for reservoir_id in reservoir_ids]
+            conditions.append(f"reservoir_id IN ({', '.join('?' for _ in reservoir_ids)})")
+            params.extend(reservoir_ids)
+        if start is not None:
+            conditions.append(f"{time_column} >= ?")
+            params.append(_time_text(start))
+        if end is not None:
+            conditions.append(f"{time_column} <= ?")
+            params.append(_time_text(end))
+
+        query = f"SELECT {', '.join(columns)} FROM readings"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += f" ORDER BY reservoir_id, {time_column}"
+
+        df = pd.read_sql_query(query, self.connection, params=params)
+        for column in ('observed_at', 'requested_at'):
+            if column in df.columns:
+                df[column] = pd.to_datetime(df[column], format=TIME_FORMAT)
+        return df
+
+    def count(self):
+        """Số dòng trong kho"""
+        return self.connection.execute("SELECT COUNT(*) FROM readings").fetchone()[0]
+
+    def close(self):
+        """Đóng kết nối"""
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
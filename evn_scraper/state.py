@@ -0,0 +1,242 @@
+"""
+Lưu mốc thời gian đã lấy dữ liệu (high-water mark) cho từng hồ
+Cho phép chạy incremental: chỉ lấy các giờ còn thiếu từ mốc cuối cùng đến hiện tại
+"""
+
+import os
+import io
+import csv
+import json
+import logging
+from datetime import datetime, timedelta
+
+from .timeutil import floor_hour, parse_requested_time
+
+logger = logging.getLogger(__name__)
+
+REQUESTED_COLUMN = 'Thời điểm yêu cầu'
+
+# Cột ID hồ trong DataFrame dạng text trong lúc xử lý (không ghi vào file CSV / Excel kết quả)
+ID_COLUMN = 'reservoir_id'
+
+# Số byte đọc từ cuối file CSV khi khởi tạo mốc (đủ cho vài chục dòng)
+_TAIL_BYTES = 8192
+
+
+def read_last_row(csv_path):
+    """
+    Đọc dòng cuối có 'Thời điểm yêu cầu' hợp lệ trong file CSV mà không quét toàn bộ file
+
+    Args:
+        csv_path (str): Đường dẫn file CSV kết quả
+
+    Returns:
+        dict: {tên cột: giá trị} của dòng cuối, hoặc None nếu không đọc được
+    """
+    if not os.path.exists(csv_path):
+        return None
+
+    with open(csv_path, 'rb') as f:
+        header = f.readline().decode('utf-8-sig').strip()
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(0, size - _TAIL_BYTES))
+        tail = f.read().decode('utf-8', errors='ignore')
+
+    columns = next(csv.reader([header]), [])
+    if REQUESTED_COLUMN not in columns:
+        return None
+    index = columns.index(REQUESTED_COLUMN)
+
+    lines = [line for line in tail.splitlines() if line.strip()]
+    if size > _TAIL_BYTES:
+        # Dòng đầu của đoạn cuối file có thể bị cắt giữa chừng
+        lines = lines[1:]
+
+    for row in csv.reader(io.StringIO('\n'.join(reversed(lines)))):
+        try:
+            parse_requested_time(row[index])
+        except (IndexError, ValueError):
+            continue
+        return dict(zip(columns, row))
+    return None
+
+
+def read_last_requested_time(csv_path):
+    """
+    Đọc 'Thời điểm yêu cầu' của dòng cuối trong file CSV mà không quét toàn bộ file
+
+    Args:
+        csv_path (str): Đường dẫn file CSV kết quả
+
+    Returns:
+        datetime: Thời điểm yêu cầu cuối cùng, hoặc None nếu không đọc được
+    """
+    row = read_last_row(csv_path)
+    return parse_requested_time(row[REQUESTED_COLUMN]) if row else None
+
+
+class HighWaterMarks:
+    """Mốc 'Thời điểm yêu cầu' mới nhất đã lưu cho từng hồ, ghi trong một file JSON nhỏ"""
+
+    def __init__(self, path="evn_scraper_state.json"):
+        """
+        Args:
+            path (str): Đường dẫn file trạng thái
+        """
+        self.path = path
+        self.marks = {}
+        # Các khoảng giờ đã bỏ vì nguồn trả lại quan trắc cũ (không phải giờ bị thiếu)
+        self.collapsed = {}
+
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            self.marks = {reservoir_id: datetime.fromisoformat(value)
+                          for reservoir_id, value in data.get('high_water_marks', {}).items()}
+            self.collapsed = {reservoir_id: [(datetime.fromisoformat(start), datetime.fromisoformat(end))
+                                             for start, end in runs]
+                              for reservoir_id, runs in data.get('collapsed_slots', {}).items()}
+
+    def get(self, reservoir_id):
+        """
+        Args:
+            reservoir_id (str): ID hồ chứa
+
+        Returns:
+            datetime: Mốc đã lưu, hoặc None nếu chưa có
+        """
+        return self.marks.get(str(reservoir_id))
+
+    def advance(self, reservoir_id, requested_time):
+        """
+        Dời mốc của một hồ lên requested_time (không bao giờ lùi mốc)
+
+        Args:
+            reservoir_id (str): ID hồ chứa
+            requested_time (datetime): Thời điểm yêu cầu mới nhất đã lưu
+        """
+        reservoir_id = str(reservoir_id)
+        current = self.marks.get(reservoir_id)
+        if current is None or requested_time > current:
+            self.marks[reservoir_id] = requested_time
+
+    def bootstrap_from_csv(self, reservoir_id, csv_path):
+        """
+        Khởi tạo mốc từ cuối file CSV hiện có nếu hồ chưa có mốc
+
+        Args:
+            reservoir_id (str): ID hồ chứa
+            csv_path (str): File CSV kết quả của hồ
+        """
+        if self.get(reservoir_id) is not None:
+            return
+        last = read_last_requested_time(csv_path)
+        if last is not None:
+            logger.info(f"Khởi tạo mốc cho hồ {reservoir_id} từ {csv_path}: {last}")
+            self.marks[str(reservoir_id)] = last
+
+    def pending_range(self, reservoir_ids, default_start, end_date=None):
+        """
+        Khoảng giờ còn thiếu của các hồ (từ mốc sớm nhất đến hiện tại)
+
+        Args:
+            reservoir_ids (iterable): ID các hồ cần cập nhật
+            default_start (datetime): Thời điểm bắt đầu cho hồ chưa có mốc
+            end_date (datetime): Thời điểm kết thúc (mặc định: giờ hiện tại)
+
+        Returns:
+            tuple: (start_date, end_date), hoặc None nếu mọi hồ đã cập nhật
+        """
+        if end_date is None:
+            end_date = floor_hour(datetime.now())
+
+        starts = []
+        for reservoir_id in reservoir_ids:
+            mark = self.get(reservoir_id)
+            starts.append(mark + timedelta(hours=1) if mark is not None else default_start)
+
+        start_date = min(starts)
+        if start_date > end_date:
+            return None
+        return start_date, end_date
+
+    def select_new(self, reservoir_id, df):
+        """
+        Lọc các dòng có 'Thời điểm yêu cầu' sau mốc của hồ
+
+        Args:
+            reservoir_id (str): ID hồ chứa
+            df (pd.DataFrame): Dữ liệu của hồ
+
+        Returns:
+            pd.DataFrame: Các dòng chưa được lưu
+        """
+        mark = self.get(reservoir_id)
+        if mark is None or df.empty:
+            return df
+        requested = df[REQUESTED_COLUMN].map(parse_requested_time)
+        return df[requested > mark]
+
+    def advance_from(self, reservoir_id, df):
+        """
+        Dời mốc theo 'Thời điểm yêu cầu' lớn nhất trong dữ liệu vừa lưu
+
+        Args:
+            reservoir_id (str): ID hồ chứa
+            df (pd.DataFrame): Dữ liệu vừa lưu
+        """
+        if df.empty:
+            return
+        latest = max(parse_requested_time(value) for value in df[REQUESTED_COLUMN])
+        self.advance(reservoir_id, latest)
+
+    def mark_collapsed(self, reservoir_id, slots):
+        """
+        Ghi nhận các giờ yêu cầu đã bỏ vì trùng quan trắc trước đó (để không bị coi là giờ thiếu)
+
+        Args:
+            reservoir_id (str): ID hồ chứa
+            slots (iterable): Các giờ yêu cầu (datetime)
+        """
+        reservoir_id = str(reservoir_id)
+        merged = set(self.collapsed_slots(reservoir_id)) | set(slots)
+        if not merged:
+            return
+
+        runs = []
+        for slot in sorted(merged):
+            if runs and slot - runs[-1][1] == timedelta(hours=1):
+                runs[-1][1] = slot
+            else:
+                runs.append([slot, slot])
+        self.collapsed[reservoir_id] = [tuple(run) for run in runs]
+
+    def collapsed_slots(self, reservoir_id):
+        """
+        Args:
+            reservoir_id (str): ID hồ chứa
+
+        Returns:
+            frozenset: Các giờ yêu cầu đã bỏ vì trùng quan trắc
+        """
+        slots = set()
+        for start, end in self.collapsed.get(str(reservoir_id), []):
+            slot = start
+            while slot <= end:
+                slots.add(slot)
+                slot += timedelta(hours=1)
+        return frozenset(slots)
+
+    def save(self):
+        """Ghi file trạng thái (ghi file tạm rồi đổi tên để không hỏng file khi bị ngắt)"""
+        data = {
+            'high_water_marks': {reservoir_id: mark.isoformat()
+                                 for reservoir_id, mark in sorted(self.marks.items())},
+            'collapsed_slots': {reservoir_id: [[start.isoformat(), end.isoformat()] for start, end in runs]
+                                for reservoir_id, runs in sorted(self.collapsed.items())},
+            'updated_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,139 @@
+"""
+Bước nhảy giờ thích ứng cho scrape_date_range
+
+Trang trả về quan trắc mới nhất tại hoặc trước giờ yêu cầu, nên với hồ chỉ báo số liệu
+vài giờ một lần (hoặc đã ngừng báo) thì tải từng giờ chỉ nhận lại cùng một quan trắc.
+HourStride học chu kỳ báo số liệu của từng hồ từ 'Thời điểm', dùng 'Đồng bộ lúc' để
+nhận ra hồ đã ngừng đồng bộ, rồi nhảy tới giờ sớm nhất có thể có quan trắc mới.
+Hồ báo số liệu hằng giờ giữ bước một giờ
+"""
+
+import logging
+from collections import deque
+from datetime import timedelta
+
+from .timeutil import floor_hour
+
+logger = logging.getLogger(__name__)
+
+HOUR = timedelta(hours=1)
+
+
+class HourStride:
+    """Chọn giờ yêu cầu tiếp theo theo chu kỳ báo số liệu của các hồ"""
+
+    def __init__(self, max_stride=timedelta(hours=6), stall_after=timedelta(hours=6), history=4):
+        """
+        Args:
+            max_stride (timedelta): Bước nhảy tối đa
+            stall_after (timedelta): Hồ không đồng bộ ('Đồng bộ lúc') lâu hơn mức này
+                so với giờ yêu cầu được coi là đã ngừng báo số liệu
+            history (int): Số khoảng cách giữa các quan trắc dùng để ước lượng chu kỳ
+        """
+        self.max_stride = max_stride
+        self.stall_after = stall_after
+        self.history = history
+        self.previous = None        # Giờ yêu cầu đã tải gần nhất
+        self.observed = {}          # reservoir_id -> quan trắc mới nhất đã thấy
+        self.intervals = {}         # reservoir_id -> các khoảng cách gần đây giữa hai quan trắc
+        self.backoff = {}           # reservoir_id -> bước chờ hồ ngừng báo / không có trên trang
+
+    def cadence(self, reservoir_id):
+        """
+        Chu kỳ báo số liệu ước lượng của một hồ (nhỏ nhất trong các khoảng gần đây)
+
+        Args:
+            reservoir_id (str): ID hồ chứa
+
+        Returns:
+            timedelta: Chu kỳ, tối thiểu một giờ (chưa đủ dữ liệu: một giờ)
+        """
+        intervals = self.intervals.get(reservoir_id)
+        if not intervals:
+            return HOUR
+        return min(max(min(intervals), HOUR), self.max_stride)
+
+    def _wait(self, reservoir_id):
+        """Bước chờ tăng gấp đôi cho hồ ngừng báo số liệu"""
+        backoff = min(self.backoff.get(reservoir_id, HOUR / 2) * 2, self.max_stride)
+        self.backoff[reservoir_id] = backoff
+        return backoff
+
+    def observe(self, requested_at, readings, reservoir_ids):
+        """
+        Ghi nhận kết quả của một giờ yêu cầu
+
+        Args:
+            requested_at (datetime): Giờ yêu cầu vừa tải
+            readings (list): Các Reading của trang
+            reservoir_ids (iterable): ID các hồ cần theo dõi
+
+        Returns:
+            bool: True nếu cần tải lại các giờ vừa nhảy qua
+                (có hồ có thể đã báo số liệu trong các giờ đó)
+        """
+        jumped_from = self.previous if self.previous is not None and requested_at - self.previous > HOUR else None
+        by_id = {reading.reservoir_id: reading for reading in readings}
+        backfill = False
+
+        for reservoir_id in reservoir_ids:
+            reading = by_id.get(reservoir_id)
+            if reading is None or reading.observed_at is None:
+                continue
+
+            last = self.observed.get(reservoir_id)
+            if last is not None and reading.observed_at <= last:
+                continue
+
+            # Sau một bước nhảy, có thể đã bỏ sót quan trắc khi:
+            # - quan trắc đến sớm hơn chu kỳ (hồ chuyển sang báo dày hơn), hoặc
+            # - quan trắc liền trước theo chu kỳ rơi vào các giờ đã nhảy qua
+            cadence = self.cadence(reservoir_id)
+            early = last is not None and reading.observed_at < last + cadence
+            if jumped_from is not None and (early or reading.observed_at - cadence > jumped_from):
+                backfill = True
+                self.intervals.pop(reservoir_id, None)
+            elif last is not None:
+                self.intervals.setdefault(reservoir_id, deque(maxlen=self.history)).append(
+                    reading.observed_at - last)
+
+            self.observed[reservoir_id] = reading.observed_at
+            self.backoff.pop(reservoir_id, None)
+
+        self.previous = requested_at
+        return backfill
+
+    def next_time(self, requested_at, readings, reservoir_ids):
+        """
+        Giờ yêu cầu tiếp theo sau requested_at
+
+        Args:
+            requested_at (datetime): Giờ yêu cầu vừa tải
+            readings (list): Các Reading của trang
+            reservoir_ids (iterable): ID các hồ cần theo dõi
+
+        Returns:
+            datetime: Giờ yêu cầu tiếp theo (từ một giờ đến max_stride sau requested_at)
+        """
+        by_id = {reading.reservoir_id: reading for reading in readings}
+        due = []
+
+        for reservoir_id in reservoir_ids:
+            reading = by_id.get(reservoir_id)
+            if reading is None or reading.observed_at is None:
+                # Hồ không có trên trang: thử lại thưa dần
+                due.append(requested_at + self._wait(reservoir_id))
+                continue
+
+            expected = reading.observed_at + self.cadence(reservoir_id)
+            if expected > requested_at:
+                due.append(expected)
+            elif reading.synced_at is not None and requested_at - reading.synced_at >= self.stall_after:
+                # Quá hạn và nguồn đã lâu không đồng bộ hồ này: coi như ngừng báo số liệu
+                due.append(requested_at + self._wait(reservoir_id))
+            else:
+                # Quá hạn nhưng nguồn vẫn đồng bộ: quan trắc mới có thể đến bất cứ giờ nào
+                due.append(requested_at + HOUR)
+
+        next_time = floor_hour(min(due)) if due else requested_at + HOUR
+        return min(max(next_time, requested_at + HOUR), requested_at + self.max_stride)
@@ -0,0 +1,83 @@
+"""
+Xử lý thời gian của dữ liệu EVN
+- 'Thời điểm yêu cầu': tham số td đã gửi, dạng 'DD/MM/YYYY HH:MM'
+- 'Thời điểm': thời điểm đo do trang trả về, dạng 'DD/MM HH:MM' (không có năm)
+"""
+
+from datetime import datetime, timedelta
+
+REQUESTED_FORMAT = "%d/%m/%Y %H:%M"
+
+# Thời điểm đo có thể muộn hơn giờ yêu cầu một chút (đồng hồ nguồn sai lệch, giờ yêu cầu đã
+# làm tròn xuống); muộn hơn mức này thì là ngày của năm trước
+OBSERVED_TOLERANCE = timedelta(hours=6)
+
+
+def floor_hour(value):
+    """Làm tròn xuống đầu giờ"""
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def parse_requested_time(value):
+    """
+    Args:
+        value (str): 'Thời điểm yêu cầu', ví dụ '15/07/2025 02:00'
+
+    Returns:
+        datetime: Thời điểm yêu cầu
+    """
+    return datetime.strptime(value.strip(), REQUESTED_FORMAT)
+
+
+def parse_observed_time(value, reference, tolerance=OBSERVED_TOLERANCE):
+    """
+    Chuyển 'Thời điểm' (không có năm) thành datetime, suy ra năm từ thời điểm tham chiếu
+
+    Số liệu luôn ở thời điểm bằng hoặc trước thời điểm yêu cầu, nên nếu ghép với năm
+    của thời điểm tham chiếu mà ra một thời điểm sau đó quá tolerance (ví dụ '31/12 23:00'
+    khi yêu cầu '01/01/2026 00:00', '04/12 11:00' khi yêu cầu '15/07/2025 00:00') thì số liệu
+    thuộc năm trước
+
+    Args:
+        value (str): 'Thời điểm', ví dụ '14/07 23:00'
+        reference (datetime): Thời điểm yêu cầu tương ứng
+        tolerance (timedelta): Độ muộn tối đa so với reference vẫn coi là cùng năm
+
+    Returns:
+        datetime: Thời điểm đo, hoặc None nếu không đọc được
+    """
+    try:
+        day_month, clock = value.split()
+        day, month = (int(part) for part in day_month.split('/'))
+        hour, minute = (int(part) for part in clock.split(':'))
+        observed = datetime(reference.year, month, day, hour, minute)
+    except (AttributeError, ValueError):
+        return None
+
+    if observed - reference > tolerance:
+        try:
+            observed = observed.replace(year=observed.year - 1)
+        except ValueError:
+            return None
+    return observed
+
+
+def parse_synced_time(value, reference):
+    """
+    Chuyển 'Đồng bộ lúc' (dạng 'HH:MM DD/MM', không có năm) thành datetime
+
+    Trang của giờ cũ vẫn ghi lần đồng bộ gần nhất của nguồn, có thể muộn hơn giờ yêu cầu nhiều
+    ngày, nên chỉ coi là năm trước khi muộn hơn quá nửa năm
+
+    Args:
+        value (str): 'Đồng bộ lúc', ví dụ '12:13 04/12'
+        reference (datetime): Thời điểm yêu cầu tương ứng (để suy ra năm)
+
+    Returns:
+        datetime: Thời điểm đồng bộ, hoặc None nếu không đọc được
+    """
+    try:
+        clock, day_month = value.split()
+    except (AttributeError, ValueError):
+        return None
+    return parse_observed_time(f"{day_month} {clock}", reference, tolerance=timedelta(days=183))
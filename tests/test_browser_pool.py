@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+
+from evn_scraper.browser_pool import BrowserPool
+from evn_scraper.fetchers import FetchError, SeleniumFetcher
+
+
+class FakeDriver:
+    def execute_script(self, script):
+        return 1
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def launches(monkeypatch):
+    """Thay Chrome bằng driver giả; đặt launches['fail'] để lần khởi động thứ n bị lỗi"""
+    state = {'count': 0, 'fail': None, 'closed': 0}
+    lock = threading.Lock()
+
+    def setup_driver(self):
+        with lock:
+            state['count'] += 1
+            if state['count'] == state['fail']:
+                raise RuntimeError("chrome crashed")
+        self.driver = FakeDriver()
+
+    def close(self):
+        if self.driver is not None:
+            state['closed'] += 1
+            self.driver = None
+
+    monkeypatch.setattr(SeleniumFetcher, 'setup_driver', setup_driver)
+    monkeypatch.setattr(SeleniumFetcher, 'close', close)
+    return state
+
+
+def test_open_failure_closes_pool_and_can_retry(launches):
+    launches['fail'] = 2
+    pool = BrowserPool(size=3, checkout_timeout=0.1)
+
+    with pytest.raises(FetchError):
+        pool.open()
+    # Các browser đã khởi động được đóng lại, pool chưa được coi là đã mở
+    assert launches['closed'] == launches['count'] - 1
+    assert not pool._browsers
+
+    pool.open()
+    assert pool._idle.qsize() == 3
+    with pool.browser() as browser:
+        assert browser.driver is not None
+    pool.close()
+
+
+def test_placeholder_is_closed_with_pool(launches):
+    pool = BrowserPool(size=1, checkout_timeout=0.1)
+    pool.open()
+    placeholder = pool._new_browser_placeholder()
+    assert placeholder in pool._browsers
+    pool.close()
+    assert not pool._browsers
@@ -0,0 +1,65 @@
+from pathlib import Path
+
+import pytest
+
+from evn_scraper.catalog import Reservoir, ReservoirCatalog
+from evn_scraper.parser import parse_table
+from evn_scraper.reservoirs import RESERVOIRS, normalize_name
+
+FIXTURE = Path(__file__).resolve().parent.parent / "iframe_page_source.html"
+
+# Vùng miền của từng hồ theo hàng vùng miền trong iframe_page_source.html
+EXPECTED_REGIONS = {
+    "Tuyên Quang": "Đông Bắc Bộ",
+    "Lai Châu": "Tây Bắc Bộ", "Bản Chát": "Tây Bắc Bộ", "Huội Quảng": "Tây Bắc Bộ",
+    "Sơn La": "Tây Bắc Bộ", "Hòa Bình": "Tây Bắc Bộ", "Thác Bà": "Tây Bắc Bộ",
+    "Trung Sơn": "Bắc Trung Bộ", "Bản Vẽ": "Bắc Trung Bộ", "KHE BỐ": "Bắc Trung Bộ",
+    "Quảng Trị": "Bắc Trung Bộ",
+    "A Vương": "Nam Trung Bộ", "Sông Bung 2": "Nam Trung Bộ", "Vĩnh Sơn A": "Nam Trung Bộ",
+    "Sông Bung 4": "Nam Trung Bộ", "Vĩnh Sơn B": "Nam Trung Bộ", "Vĩnh Sơn C": "Nam Trung Bộ",
+    "Sông Tranh 2": "Nam Trung Bộ", "Sông Ba Hạ": "Nam Trung Bộ", "Sông Hinh": "Nam Trung Bộ",
+    "Thượng Kon Tum": "Tây Nguyên", "Pleikrông": "Tây Nguyên", "Ialy": "Tây Nguyên",
+    "Sê San 3": "Tây Nguyên", "Sê San 3A": "Tây Nguyên", "Sê San 4": "Tây Nguyên",
+    "Kanak": "Tây Nguyên", "An Khê": "Tây Nguyên", "Srêpốk 3": "Tây Nguyên",
+    "Buôn Kuốp": "Tây Nguyên", "Buôn Tua Srah": "Tây Nguyên", "Đồng Nai 3": "Tây Nguyên",
+    "Đồng Nai 4": "Tây Nguyên", "Đơn Dương": "Tây Nguyên", "Đại Ninh": "Tây Nguyên",
+    "Hàm Thuận": "Tây Nguyên", "Đa Mi": "Tây Nguyên",
+    "Trị An": "Đông Nam Bộ",
+}
+
+
+@pytest.fixture(scope='module')
+def html():
+    return FIXTURE.read_text(encoding='utf-8')
+
+
+def test_parse_table_regions(html):
+    rows = parse_table(html)
+    assert {row.name: row.region for row in rows} == EXPECTED_REGIONS
+
+
+def test_catalog_from_html_regions(html):
+    catalog = ReservoirCatalog.from_html(html)
+    assert all(reservoir.region for reservoir in catalog)
+    expected = {normalize_name(name): region for name, region in EXPECTED_REGIONS.items()}
+    for reservoir in catalog:
+        if normalize_name(reservoir.name) in expected:
+            assert reservoir.region == expected[normalize_name(reservoir.name)], reservoir.name
+
+
+def test_builtin_catalog_matches_page(html):
+    builtin = ReservoirCatalog.builtin()
+    assert len(builtin) == len(RESERVOIRS)
+    assert [(reservoir.reservoir_id, reservoir.region) for reservoir in builtin] == \
+        [(reservoir.reservoir_id, reservoir.region) for reservoir in ReservoirCatalog.from_html(html)]
+
+
+def test_resolve_region():
+    selected = ReservoirCatalog.builtin().resolve("Tây Nguyên")
+    assert "46" in selected and "20" in selected and "26" not in selected
+
+
+def test_resolve_region_without_region_data():
+    catalog = ReservoirCatalog([Reservoir("26", "Bản Vẽ", "")])
+    with pytest.raises(ValueError, match="không có vùng miền"):
+        catalog.resolve("Tây Nguyên")
@@ -0,0 +1,66 @@
+from datetime import datetime
+from pathlib import Path
+
+from evn_scraper.changes import ChangeDetector, table_digest
+from evn_scraper.scraper import EVNMultiReservoirScraper
+
+FIXTURE = Path(__file__).resolve().parent.parent / "iframe_page_source.html"
+SLOT = datetime(2025, 12, 4, 12)
+
+
+class StaticFetcher:
+    name = 'fake'
+
+    def __init__(self, html):
+        self.html = html
+        self.calls = 0
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def fetch(self, url):
+        self.calls += 1
+        return self.html
+
+
+def fixture_html():
+    return FIXTURE.read_text(encoding='utf-8')
+
+
+def test_table_digest_ignores_markup_outside_table():
+    html = fixture_html()
+    assert table_digest(html) is not None
+    assert table_digest(html.replace('__VIEWSTATE', '__VIEWSTATE_CHANGED')) == table_digest(html)
+    assert table_digest(html.replace('199.62', '199.70')) != table_digest(html)
+    assert table_digest("<html></html>") is None
+
+
+def test_unchanged_page_is_not_parsed_again():
+    fetcher = StaticFetcher(fixture_html())
+    scraper = EVNMultiReservoirScraper(["26", "46"], fetcher=fetcher)
+    changes = ChangeDetector()
+
+    assert len(scraper.scrape_single_time(SLOT, changes=changes)) == 2
+    assert scraper.scrape_single_time(SLOT, changes=changes) == []
+    assert fetcher.calls == 2
+    assert SLOT not in scraper.failed_times
+
+
+def test_only_changed_rows_are_extracted():
+    html = fixture_html()
+    scraper = EVNMultiReservoirScraper(["26", "46"], fetcher=StaticFetcher(html))
+    changes = ChangeDetector()
+    assert len(scraper.extract_readings(html, SLOT, changes)) == 2
+
+    # Chỉ mực nước Bản Vẽ thay đổi
+    updated = html.replace('<td class="tdclass">199.62</td>', '<td class="tdclass">199.70</td>')
+    assert changes.table_changed(updated)
+    readings = scraper.extract_readings(updated, SLOT, changes)
+    assert [reading.reservoir_id for reading in readings] == ["26"]
+    assert scraper.extract_readings(updated, SLOT, changes) == []
+
+    # Không có changes: vẫn trả về mọi hồ
+    assert len(scraper.extract_readings(updated, SLOT)) == 2
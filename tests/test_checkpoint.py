@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from evn_scraper.checkpoint import Checkpoint
+from evn_scraper.pipeline import ResultWriter
+from evn_scraper.scraper import OUTPUT_COLUMNS
+from evn_scraper.state import REQUESTED_COLUMN
+from evn_scraper.timeutil import REQUESTED_FORMAT
+
+START = datetime(2025, 7, 1)
+
+
+def batch(slots):
+    rows = []
+    for slot in slots:
+        row = dict.fromkeys(OUTPUT_COLUMNS, '')
+        row.update({'Tên hồ': 'Bản Vẽ', 'Thời điểm': slot.strftime('%d/%m %H:%M'), 'Htl (m)': '199.6',
+                    REQUESTED_COLUMN: slot.strftime(REQUESTED_FORMAT)})
+        rows.append(row)
+    return pd.DataFrame(rows, columns=OUTPUT_COLUMNS)
+
+
+def test_resume_after_crash_between_write_and_flush(tmp_path):
+    output = str(tmp_path / "ban_ve.csv")
+    path = str(tmp_path / "checkpoint")
+    slots = [START + timedelta(hours=hour) for hour in range(6)]
+
+    # Lần chạy đầu: lô thứ nhất xong, lô thứ hai đã ghi CSV thì bị ngắt trước flush()
+    checkpoint = Checkpoint(path, key="26")
+    writer = ResultWriter({"26": output}, {"26": "Bản Vẽ"})
+    checkpoint.begin_write(slots[:3])
+    writer.write(batch(slots[:3]))
+    for slot in slots[:3]:
+        checkpoint.add(slot, ())
+    checkpoint.flush()
+    checkpoint.begin_write(slots[3:])
+    writer.write(batch(slots[3:]))
+
+    # Lần chạy sau: tải lại các giờ chưa xong nhưng không ghi trùng
+    checkpoint = Checkpoint(path, key="26")
+    assert checkpoint.completed == set(slots[:3])
+    assert checkpoint.unconfirmed == set(slots[3:])
+    writer = ResultWriter({"26": output}, {"26": "Bản Vẽ"})
+    writer.skip_existing(checkpoint.unconfirmed)
+    pending = [slot for slot in slots if slot not in checkpoint.completed]
+    checkpoint.begin_write(pending)
+    assert writer.write(batch(pending)) == 0
+    for slot in pending:
+        checkpoint.add(slot, ())
+    checkpoint.flush()
+
+    df = pd.read_csv(output, dtype=str, encoding='utf-8-sig')
+    assert list(df[REQUESTED_COLUMN]) == [slot.strftime(REQUESTED_FORMAT) for slot in slots]
+    assert Checkpoint(path, key="26").unconfirmed == set()
@@ -0,0 +1,28 @@
+from datetime import datetime
+from pathlib import Path
+
+from evn_scraper.gaps import FetchRun, execute_plan
+from evn_scraper.scraper import EVNMultiReservoirScraper
+
+FIXTURE = Path(__file__).resolve().parent.parent / "iframe_page_source.html"
+SLOT = datetime(2025, 7, 1, 10)
+
+
+class StaticRangeScraper:
+    """Trả về cùng một trang cho mọi giờ, tên hồ trên trang khác tên trong danh mục"""
+
+    def __init__(self, scraper):
+        self.readings = [reading._replace(reservoir_name=reading.reservoir_name.upper())
+                         for reading in scraper.extract_readings(FIXTURE.read_text(encoding='utf-8'), SLOT)]
+
+    def iter_times(self, times):
+        for slot in times:
+            yield slot, [reading._replace(requested_at=slot) for reading in self.readings]
+
+
+def test_execute_plan_keeps_rows_by_reservoir_id():
+    scraper = EVNMultiReservoirScraper(["26", "46"], fetcher=object())
+    plan = [FetchRun(SLOT, SLOT, frozenset({"26"}))]
+    df = execute_plan(scraper, plan, StaticRangeScraper(scraper))
+    assert df is not None and len(df) == 1
+    assert df.iloc[0]['Htl (m)'] == '199.62'
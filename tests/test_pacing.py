@@ -0,0 +1,34 @@
+import random
+
+from evn_scraper.pacing import AdaptivePacer
+
+
+def test_jitter_after_fast_period_does_not_back_off():
+    pacer = AdaptivePacer(min_delay=0.1)
+    for _ in range(20):
+        pacer.record(0.05)
+    rng = random.Random(1)
+    for _ in range(200):
+        pacer.record(rng.uniform(0.05, 0.3))
+        assert pacer.delay < 1.0
+    assert pacer.delay == pacer.min_delay
+
+
+def test_sustained_slowdown_backs_off_then_recovers():
+    pacer = AdaptivePacer(min_delay=0.1)
+    for _ in range(20):
+        pacer.record(0.1)
+    for _ in range(5):
+        pacer.record(3.0)
+    assert pacer.delay >= 1.0
+
+    for _ in range(50):
+        pacer.record(0.1)
+    assert pacer.delay == pacer.min_delay
+
+
+def test_error_backs_off():
+    pacer = AdaptivePacer(min_delay=0.1)
+    pacer.record(0.1)
+    pacer.record(0.1, ok=False)
+    assert pacer.delay >= 1.0
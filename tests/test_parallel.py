@@ -0,0 +1,52 @@
+from datetime import datetime
+from pathlib import Path
+
+from evn_scraper.pacing import AdaptivePacer
+from evn_scraper.page_cache import PageCache
+from evn_scraper.parallel import ParallelRangeScraper
+from evn_scraper.scraper import EVNMultiReservoirScraper
+from evn_scraper.timeutil import floor_hour
+
+FIXTURE = Path(__file__).resolve().parent.parent / "iframe_page_source.html"
+
+
+class CountingFetcher:
+    """Backend giả: trả về trang mẫu và đếm số lần tải qua mạng"""
+
+    name = 'fake'
+
+    def __init__(self):
+        self.html = FIXTURE.read_text(encoding='utf-8')
+        self.calls = 0
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def fetch(self, url):
+        self.calls += 1
+        return self.html
+
+
+def test_refetch_bypasses_page_cache(tmp_path):
+    fetcher = CountingFetcher()
+    cache = PageCache(str(tmp_path / "cache"))
+    scraper = EVNMultiReservoirScraper("26", fetcher=fetcher, cache=cache, pacer=AdaptivePacer(min_delay=0))
+    range_scraper = ParallelRangeScraper(scraper, concurrency=1, requests_per_second=None,
+                                         fetcher_factory=lambda: fetcher)
+    slot = floor_hour(datetime.now())
+    try:
+        range_scraper.scrape_times([slot])
+        assert fetcher.calls == 1
+        assert scraper.is_cached(slot)
+
+        # Trang còn trong cache nhưng giờ nguồn trễ phải được tải lại từ server
+        range_scraper.scrape_times([slot])
+        assert fetcher.calls == 1
+        df = range_scraper.scrape_times([slot], fresh=True)
+        assert fetcher.calls == 2
+        assert df is not None and len(df) == 1
+    finally:
+        cache.close()
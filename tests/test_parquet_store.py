@@ -0,0 +1,53 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from evn_scraper.parquet_store import ParquetStore
+from evn_scraper.scraper import OUTPUT_COLUMNS
+from evn_scraper.state import REQUESTED_COLUMN
+
+
+def text_frame(rows):
+    frame = []
+    for observed, requested, ncxm in rows:
+        row = dict.fromkeys(OUTPUT_COLUMNS, '')
+        row.update({'Tên hồ': 'Bản Vẽ', 'Thời điểm': observed, 'Htl (m)': '199.6', 'Ncxs': '0', 'Ncxm': ncxm,
+                    REQUESTED_COLUMN: requested})
+        frame.append(row)
+    return pd.DataFrame(frame, columns=OUTPUT_COLUMNS)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ParquetStore(str(tmp_path / "parquet"))
+    store.write(text_frame([
+        ('31/07 22:00', '31/07/2025 22:00', '1'),
+        # Quan trắc tháng 7 của giờ yêu cầu tháng 8: nằm ở phân vùng month=2025-07
+        ('31/07 23:00', '01/08/2025 00:00', ''),
+        ('01/08 01:00', '01/08/2025 01:00', '2'),
+    ]))
+    return store
+
+
+def test_read_by_requested_at_across_month_boundary(store):
+    df = store.read(time_column='requested_at', start=datetime(2025, 8, 1))
+    assert len(df) == 2
+    assert df['requested_at'].dt.strftime('%d/%m %H:%M').tolist() == ['01/08 00:00', '01/08 01:00']
+
+    df = store.read(time_column='requested_at', end=datetime(2025, 7, 31, 23))
+    assert len(df) == 1
+
+
+def test_read_by_observed_at(store):
+    df = store.read(start=datetime(2025, 8, 1))
+    assert df['observed_at'].dt.strftime('%d/%m %H:%M').tolist() == ['01/08 01:00']
+
+
+def test_gate_columns_keep_nullable_int(store):
+    df = store.read(reservoir_ids=["26"])
+    assert str(df['ncxm'].dtype) == 'Int16'
+    assert df['ncxm'].isna().sum() == 1
+    assert df['ncxm'].dropna().tolist() == [1, 2]
@@ -0,0 +1,46 @@
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from evn_scraper.checkpoint import Checkpoint
+from evn_scraper.lag import ObservationTracker
+from evn_scraper.pipeline import ResultWriter
+from evn_scraper.records import ReadingBatch
+from evn_scraper.scraper import OUTPUT_COLUMNS, EVNMultiReservoirScraper
+
+FIXTURE = Path(__file__).resolve().parent.parent / "iframe_page_source.html"
+SLOT = datetime(2025, 12, 4, 12)
+
+
+def renamed_readings():
+    """Bản ghi của Bản Vẽ và Đơn Dương với tên hiển thị khác danh mục (trang đổi tên / trùng tên)"""
+    scraper = EVNMultiReservoirScraper(["26", "46"], fetcher=object())
+    readings = scraper.extract_readings(FIXTURE.read_text(encoding='utf-8'), SLOT)
+    return [reading._replace(reservoir_name="Hồ chứa") for reading in readings]
+
+
+def test_writer_routes_rows_by_reservoir_id(tmp_path):
+    outputs = {"26": str(tmp_path / "ban_ve.csv"), "46": str(tmp_path / "don_duong.csv")}
+    writer = ResultWriter(outputs, {"26": "Bản Vẽ", "46": "Đơn Dương"})
+    assert writer.write(ReadingBatch(renamed_readings()).to_text_frame()) == 2
+
+    ban_ve = pd.read_csv(outputs["26"], dtype=str, encoding='utf-8-sig')
+    don_duong = pd.read_csv(outputs["46"], dtype=str, encoding='utf-8-sig')
+    # File kết quả giữ đúng cột cũ (không có cột ID)
+    assert list(ban_ve.columns) == OUTPUT_COLUMNS
+    assert ban_ve['Htl (m)'].tolist() == ['199.62']
+    assert don_duong['Htl (m)'].tolist() == ['1041.15']
+
+
+def test_checkpoint_seeds_tracker_by_reservoir_id(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint"), key="26,46")
+    readings = renamed_readings()
+    checkpoint.add(SLOT, readings)
+    checkpoint.flush()
+
+    tracker = ObservationTracker()
+    Checkpoint(str(tmp_path / "checkpoint"), key="26,46").seed(tracker, {"26": "Bản Vẽ", "46": "Đơn Dương"})
+    assert tracker.last["26"][0] == readings[0].observed_at
+    assert tracker.last["46"][0] == readings[1].observed_at
+    assert tracker.last["26"][1] != tracker.last["46"][1]
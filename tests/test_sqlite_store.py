@@ -0,0 +1,49 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from evn_scraper.scraper import OUTPUT_COLUMNS
+from evn_scraper.sqlite_store import SQLiteStore
+from evn_scraper.state import REQUESTED_COLUMN
+
+
+def text_frame(rows):
+    frame = []
+    for observed, requested, htl in rows:
+        row = dict.fromkeys(OUTPUT_COLUMNS, '')
+        row.update({'Tên hồ': 'Bản Vẽ', 'Thời điểm': observed, 'Htl (m)': htl, REQUESTED_COLUMN: requested})
+        frame.append(row)
+    return pd.DataFrame(frame, columns=OUTPUT_COLUMNS)
+
+
+@pytest.fixture
+def store(tmp_path):
+    with SQLiteStore(str(tmp_path / "evn.db")) as store:
+        yield store
+
+
+def test_upsert_replaces_same_observation(store):
+    assert store.upsert(text_frame([
+        ('31/07 22:00', '31/07/2025 22:00', '199.6'),
+        ('31/07 23:00', '31/07/2025 23:00', '199.7'),
+    ])) == 2
+
+    # Giờ yêu cầu sau trả về cùng quan trắc 23:00 với số liệu đã sửa: cập nhật, không thêm dòng
+    assert store.upsert(text_frame([('31/07 23:00', '01/08/2025 00:00', '199.8')])) == 1
+    assert store.count() == 2
+
+    df = store.read(reservoir_ids=["26"], start=datetime(2025, 7, 31, 23))
+    assert len(df) == 1
+    assert df['htl'].tolist() == [199.8]
+    assert df['requested_at'].tolist() == [pd.Timestamp(2025, 8, 1)]
+
+
+def test_upsert_keeps_reservoirs_apart(store):
+    df = text_frame([('31/07 22:00', '31/07/2025 22:00', '199.6')])
+    store.upsert(df)
+    other = df.copy()
+    other['Tên hồ'] = 'Đơn Dương'
+    store.upsert(other)
+    assert store.count() == 2
+    assert sorted(store.read(columns=['reservoir_id'])['reservoir_id']) == ["26", "46"]
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+from evn_scraper.records import Reading
+from evn_scraper.stride import HourStride
+
+START = datetime(2025, 7, 1)
+HOUR = timedelta(hours=1)
+
+
+def reading(observed_at, requested_at, synced_at=None):
+    values = (None,) * 9
+    return Reading("26", "Bản Vẽ", observed_at, requested_at, synced_at or observed_at, *values)
+
+
+def run(stride, observations, until):
+    """Tải theo HourStride; observations(requested_at) -> quan trắc mới nhất của trang"""
+    requested = []
+    current = START
+    while current <= until:
+        requested.append(current)
+        rows = [reading(observations(current), current)]
+        stride.observe(current, rows, ["26"])
+        current = stride.next_time(current, rows, ["26"])
+    return requested
+
+
+def test_widens_to_reporting_cadence():
+    # Hồ báo số liệu ba giờ một lần: sau khi học được chu kỳ chỉ tải các giờ có quan trắc mới
+    stride = HourStride()
+    requested = run(stride, lambda at: START + (at - START) // (3 * HOUR) * 3 * HOUR, START + 12 * HOUR)
+    assert stride.cadence("26") == 3 * HOUR
+    assert requested == [START + hour * HOUR for hour in (0, 1, 2, 3, 6, 9, 12)]
+
+
+def test_hourly_reservoir_keeps_one_hour_step():
+    stride = HourStride()
+    requested = run(stride, lambda at: at, START + 5 * HOUR)
+    assert requested == [START + hour * HOUR for hour in range(6)]
+
+
+def test_narrows_when_observation_arrives_early():
+    stride = HourStride()
+    requested = run(stride, lambda at: START + (at - START) // (3 * HOUR) * 3 * HOUR, START + 3 * HOUR)
+    assert requested[-1] == START + 3 * HOUR
+    assert stride.cadence("26") == 3 * HOUR
+    assert stride.next_time(requested[-1], [reading(requested[-1], requested[-1])], ["26"]) == START + 6 * HOUR
+
+    # Nhảy từ 03:00 tới 06:00 nhưng hồ đã chuyển sang báo hằng giờ (quan trắc 05:00 đến sớm):
+    # cần tải lại các giờ vừa nhảy qua và quay về bước một giờ
+    at = START + 6 * HOUR
+    rows = [reading(START + 5 * HOUR, at)]
+    assert stride.observe(at, rows, ["26"])
+    assert stride.cadence("26") == HOUR
+    assert stride.next_time(at, rows, ["26"]) == at + HOUR
+
+
+def test_stalled_reservoir_backs_off_to_max_stride():
+    # Nguồn đã ngừng đồng bộ hồ: bước chờ tăng gấp đôi tới max_stride
+    stride = HourStride(max_stride=timedelta(hours=6), stall_after=timedelta(hours=6))
+    last = START - 12 * HOUR
+    at = START
+    steps = []
+    for _ in range(5):
+        rows = [reading(last, at)]
+        stride.observe(at, rows, ["26"])
+        next_time = stride.next_time(at, rows, ["26"])
+        steps.append(next_time - at)
+        at = next_time
+    assert steps == [HOUR, 2 * HOUR, 4 * HOUR, 6 * HOUR, 6 * HOUR]
@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from evn_scraper.timeutil import parse_observed_time, parse_synced_time
+
+
+def test_observed_time_same_year():
+    assert parse_observed_time('14/07 23:00', datetime(2025, 7, 15, 2)) == datetime(2025, 7, 14, 23)
+
+
+def test_observed_time_slightly_after_request():
+    assert parse_observed_time('15/07 02:10', datetime(2025, 7, 15, 2)) == datetime(2025, 7, 15, 2, 10)
+
+
+def test_observed_time_across_new_year():
+    assert parse_observed_time('31/12 23:00', datetime(2026, 1, 1, 0)) == datetime(2025, 12, 31, 23)
+
+
+def test_observed_time_months_after_request_is_previous_year():
+    # Không bao giờ có quan trắc sau giờ yêu cầu: '04/12' khi yêu cầu tháng 7 là tháng 12 năm trước
+    assert parse_observed_time('04/12 11:00', datetime(2025, 7, 15)) == datetime(2024, 12, 4, 11)
+    assert parse_observed_time('04/12 11:00', datetime(2026, 10, 17, 14)) == datetime(2025, 12, 4, 11)
+
+
+def test_observed_time_invalid():
+    assert parse_observed_time('', datetime(2025, 7, 15)) is None
+    assert parse_observed_time(None, datetime(2025, 7, 15)) is None
+
+
+def test_synced_time_after_old_request_keeps_year():
+    assert parse_synced_time('12:13 04/12', datetime(2025, 12, 1)) == datetime(2025, 12, 4, 12, 13)